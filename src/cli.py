@@ -1,10 +1,21 @@
+import json
+from contextlib import nullcontext
+from pathlib import Path
+from typing import List, Optional
+
 import typer
 from rich.console import Console
 from rich.table import Table
 
-from src.ingestion.indexer.manager import LibraryManager
-from src.ui.app import RAGApp
-from src.utils.config import get_config
+from src.retrieval.filters import SearchFilter
+from src.shared.context import get_app_context
+from src.utils.logger import setup_logger
+from src.utils.metrics import MetricsSnapshot, metrics
+from src.utils.profiling import profiler
+from src.utils.tracing import setup_tracing
+
+# Commands import what they need when they run: chromadb, torch, docling and
+# textual each take seconds to load, and `--help` or `info` need none of them.
 
 app = typer.Typer(
     name="open-books",
@@ -14,11 +25,102 @@ app = typer.Typer(
 console = Console()
 
 
+@app.callback()
+def main():
+    setup_logger()
+    setup_tracing()
+    metrics.enabled = get_app_context().config.metrics.enabled
+
+
+def _metrics_path() -> Path:
+    return get_app_context().config.logging.log_dir / "metrics.json"
+
+
+def _flush_metrics() -> None:
+    """Add this command's timings to the ones `stats --perf` shows."""
+    if metrics.enabled:
+        metrics.flush(_metrics_path())
+
+
+def _perf_table(snapshot: MetricsSnapshot, title: str) -> Table:
+    table = Table(title=title)
+    table.add_column("Stage", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total s", style="magenta", justify="right")
+    for column in ("Mean ms", "p50 ms", "p95 ms", "Max ms"):
+        table.add_column(column, justify="right")
+
+    # Where the time went, biggest share first
+    summary = sorted(
+        snapshot.summary().items(), key=lambda item: item[1]["total_s"], reverse=True
+    )
+    for stage, stats in summary:
+        table.add_row(
+            stage,
+            str(int(stats["count"])),
+            f"{stats['total_s']:.2f}",
+            f"{stats['mean_ms']:.1f}",
+            f"{stats['p50_ms']:.1f}",
+            f"{stats['p95_ms']:.1f}",
+            f"{stats['max_ms']:.1f}",
+        )
+    return table
+
+
+def _profile_option(unit: str):
+    return typer.Option(
+        False,
+        help=f"Profile each {unit} with cProfile and tracemalloc into logs/profiles/",
+    )
+
+
+def _start_profiling(enabled: bool, top: int) -> None:
+    if enabled:
+        profiler.start(get_app_context().config.logging.log_dir / "profiles", top_n=top)
+
+
+def _print_profiles() -> None:
+    """Per-unit cost, then the hottest functions over all of them."""
+    profiler.stop()
+    if not profiler.reports:
+        return
+    units = Table(title="Profiled")
+    units.add_column("Unit", style="cyan", overflow="fold")
+    units.add_column("Seconds", style="magenta", justify="right")
+    units.add_column("Peak MB", justify="right")
+    units.add_column("Call tree")
+    for report in profiler.reports:
+        units.add_row(
+            report.label,
+            f"{report.seconds:.2f}",
+            f"{report.peak_mb:.1f}" if report.peak_mb is not None else "-",
+            str(report.profile_path),
+        )
+    console.print(units)
+
+    functions = Table(title="Hottest functions (own time)")
+    functions.add_column("Function", style="cyan", overflow="fold")
+    functions.add_column("Calls", justify="right")
+    functions.add_column("Own s", style="magenta", justify="right")
+    functions.add_column("Cumulative s", justify="right")
+    for function in profiler.hot_functions():
+        functions.add_row(
+            function.function,
+            str(function.calls),
+            f"{function.own_s:.3f}",
+            f"{function.cumulative_s:.3f}",
+        )
+    console.print(functions)
+
+
 @app.command()
-def sync():
+def sync(
+    profile: bool = _profile_option("book"),
+    profile_top: int = typer.Option(20, help="Functions listed per profile"),
+):
     """Sync the library: scan books folder and update vector store."""
-    config = get_config()
-    manager = LibraryManager(config.librery)
+    manager = get_app_context().library_manager
+    _start_profiling(profile, profile_top)
 
     console.print(f"[bold blue]Starting sync process...[/bold blue]")
     # The manager has its own logging, but we could wrap it with specific Rich feedback if we refactor Manager to return generators.
@@ -30,12 +132,62 @@ def sync():
     console.print(f"Indexed Files: {stats['indexed_files']}")
     console.print(f"Total Chunks: {stats['total_chunks']}")
 
+    snapshot = metrics.snapshot()
+    if snapshot.timers:
+        console.print(_perf_table(snapshot, "Sync timings"))
+    _flush_metrics()
+    _print_profiles()
+
+
+@app.command()
+def stats(
+    perf: bool = typer.Option(
+        False, help="Show the stage timings recorded by sync, ask and chat"
+    ),
+    prometheus: bool = typer.Option(
+        False, help="Print the timings in the Prometheus text format instead"
+    ),
+    reset: bool = typer.Option(False, help="Clear the recorded timings afterwards"),
+):
+    """Show library counts and, with --perf, where the time goes."""
+    if not perf:
+        library = get_app_context().library_manager.get_stats()
+        console.print(f"Indexed Files: {library['indexed_files']}")
+        console.print(f"Total Chunks: {library['total_chunks']}")
+        return
+
+    path = _metrics_path()
+    snapshot = MetricsSnapshot.load(path)
+    if snapshot is None:
+        console.print("[yellow]No timings recorded yet.[/yellow]")
+        return
+
+    if prometheus:
+        # Plain print: Rich would reflow and highlight the exposition text
+        print(snapshot.to_prometheus(), end="")
+    else:
+        console.print(
+            _perf_table(
+                snapshot, f"Stage timings since {snapshot.since:%Y-%m-%d %H:%M}"
+            )
+        )
+        if snapshot.counters:
+            console.print(
+                ", ".join(
+                    f"{name}: {value:g}"
+                    for name, value in sorted(snapshot.counters.items())
+                )
+            )
+    if reset:
+        path.unlink()
+
 
 @app.command()
 def info():
     """Show information about the indexed library."""
-    config = get_config()
-    manager = LibraryManager(config.librery)
+    context = get_app_context()
+    config = context.config
+    manager = context.library_manager
 
     stats = manager.get_stats()
     manifest = manager.manifest
@@ -53,19 +205,479 @@ def info():
     if manifest:
         book_table = Table(title="Indexed Books")
         book_table.add_column("Filename", style="green")
+        book_table.add_column("Parser", style="cyan")
         book_table.add_column("Hash", style="dim", overflow="fold")
 
-        for filename, file_hash in manifest.items():
-            book_table.add_row(filename, file_hash)
+        for filename, entry in manifest.items():
+            book_table.add_row(filename, entry.get("parser") or "-", entry["hash"])
 
         console.print(book_table)
 
 
 @app.command()
-def chat():
+def migrate_store(
+    batch_size: int = typer.Option(1000, help="Chunks copied per batch"),
+    to_numpy: bool = typer.Option(
+        False, help="Copy the Chroma collection into the NumPy backend instead"
+    ),
+):
+    """Rebuild the vector store with the configured distance and HNSW settings."""
+    from src.ingestion.vector_store.numpy_store import NumpyStore
+    from src.ingestion.vector_store.stores import ChromaStore
+
+    context = get_app_context()
+    config = context.config
+    store = ChromaStore(
+        config.vector_store, client=context.chroma_client, embedder=context.embedder
+    )
+
+    if to_numpy:
+        target = NumpyStore(config.vector_store, embedder=context.embedder)
+        console.print(
+            f"[bold blue]Copying '{config.vector_store.collection_name}' "
+            f"to {config.vector_store.numpy_path}...[/bold blue]"
+        )
+        target.clear()
+        copied = target.copy_from(store.collection, batch_size=batch_size)
+        console.print(f"[bold green]Copied {copied} chunks.[/bold green]")
+        return
+
+    console.print(
+        f"[bold blue]Rebuilding '{config.vector_store.collection_name}' "
+        f"in {config.vector_store.distance} space...[/bold blue]"
+    )
+    copied = store.rebuild_index(batch_size=batch_size)
+    console.print(f"[bold green]Migrated {copied} chunks.[/bold green]")
+
+
+@app.command()
+def benchmark_index(
+    k: int = typer.Option(10, help="Neighbours per query (recall@k)"),
+    queries: int = typer.Option(100, help="Stored chunks sampled as queries"),
+    m: Optional[List[int]] = typer.Option(None, help="HNSW M values to sweep"),
+    ef_construction: Optional[List[int]] = typer.Option(
+        None, help="HNSW ef_construction values to sweep"
+    ),
+    ef_search: List[int] = typer.Option(
+        [10, 50, 100, 200], help="HNSW ef_search values to sweep"
+    ),
+    seed: int = typer.Option(0, help="Query sampling seed"),
+    output: Optional[Path] = typer.Option(None, help="Write results as JSON lines"),
+):
+    """Measure recall@k and query latency of HNSW settings on a copy of the store."""
+    from src.retrieval.benchmark import IndexBenchmark
+
+    context = get_app_context()
+    store_config = context.config.vector_store
+    collection = context.chroma_client.get_collection(name=store_config.collection_name)
+    space = (collection.configuration.get("hnsw") or {}).get(
+        "space", store_config.distance
+    )
+
+    console.print(
+        f"[bold blue]Benchmarking '{store_config.collection_name}' "
+        f"({collection.count()} chunks, {space} space)...[/bold blue]"
+    )
+    benchmark = IndexBenchmark(
+        collection, space=space, k=k, num_queries=queries, seed=seed
+    )
+
+    table = Table(title=f"HNSW sweep (recall@{k})")
+    for column in ("M", "ef_construction", "ef_search"):
+        table.add_column(column, style="cyan", justify="right")
+    table.add_column("Recall", style="magenta", justify="right")
+    for column in ("p50 ms", "p95 ms", "p99 ms"):
+        table.add_column(column, justify="right")
+
+    results = benchmark.run(
+        m or [store_config.hnsw_m],
+        ef_construction or [store_config.hnsw_ef_construction],
+        ef_search,
+    )
+    with output.open("w") if output else nullcontext() as sink:
+        for result in results:
+            table.add_row(
+                str(result.m),
+                str(result.ef_construction),
+                str(result.ef_search),
+                f"{result.recall:.3f}",
+                f"{result.p50_ms:.2f}",
+                f"{result.p95_ms:.2f}",
+                f"{result.p99_ms:.2f}",
+            )
+            if sink:
+                sink.write(json.dumps(result.model_dump()) + "\n")
+
+    console.print(table)
+
+
+@app.command("benchmark-quantization")
+def benchmark_quantization_command(
+    k: int = typer.Option(10, help="Neighbours per query (recall@k)"),
+    queries: int = typer.Option(100, help="Stored chunks sampled as queries"),
+    mode: List[str] = typer.Option(
+        ["none", "int8", "binary"], help="Quantization modes to compare"
+    ),
+    rescore_factor: Optional[int] = typer.Option(
+        None, help="Shortlist size per result (default: from config)"
+    ),
+    seed: int = typer.Option(0, help="Query sampling seed"),
+    output: Optional[Path] = typer.Option(None, help="Write results as JSON lines"),
+):
+    """Compare recall, memory and latency of quantized NumPy-store search."""
+    from src.ingestion.vector_store.numpy_store import NumpyStore
+    from src.retrieval.benchmark import benchmark_quantization, load_vectors
+
+    context = get_app_context()
+    store_config = context.config.vector_store
+    if rescore_factor is not None:
+        store_config = store_config.model_copy(
+            update={"rescore_factor": rescore_factor}
+        )
+
+    if store_config.backend == "numpy":
+        source = NumpyStore(store_config)
+        ids, matrix = source.ids, source.vectors
+    else:
+        ids, matrix = load_vectors(
+            context.chroma_client.get_collection(name=store_config.collection_name)
+        )
+    console.print(
+        f"[bold blue]Comparing {', '.join(mode)} on {len(ids)} vectors "
+        f"({store_config.distance} space)...[/bold blue]"
+    )
+
+    table = Table(
+        title=f"Quantization (recall@{k}, rescore x{store_config.rescore_factor})"
+    )
+    table.add_column("Mode", style="cyan")
+    table.add_column("Recall", style="magenta", justify="right")
+    table.add_column("First-pass MB", justify="right")
+    for column in ("p50 ms", "p95 ms", "p99 ms"):
+        table.add_column(column, justify="right")
+
+    results = benchmark_quantization(
+        ids, matrix, store_config, modes=mode, k=k, num_queries=queries, seed=seed
+    )
+    with output.open("w") if output else nullcontext() as sink:
+        for result in results:
+            table.add_row(
+                result.mode,
+                f"{result.recall:.3f}",
+                f"{result.first_pass_mb:.1f}",
+                f"{result.p50_ms:.2f}",
+                f"{result.p95_ms:.2f}",
+                f"{result.p99_ms:.2f}",
+            )
+            if sink:
+                sink.write(json.dumps(result.model_dump()) + "\n")
+
+    console.print(table)
+
+
+@app.command()
+def benchmark_ingest(
+    docs: int = typer.Option(
+        10, help="Synthetic books for the chunk/embed/write stages"
+    ),
+    pages: int = typer.Option(50, help="Pages per synthetic book"),
+    words_per_page: int = typer.Option(300, help="Words per synthetic page"),
+    pdfs: int = typer.Option(3, help="Generated PDFs indexed by the sync stage"),
+    pdf_pages: int = typer.Option(10, help="Pages per generated PDF"),
+    parser: str = typer.Option(
+        "pymupdf", help="Sync stage parser: pymupdf, or 'configured' for parsing.parser"
+    ),
+    seed: int = typer.Option(0, help="Text generation seed"),
+    output: Optional[Path] = typer.Option(
+        None, help="Append the run as a JSON line to this file"
+    ),
+):
+    """Measure ingestion throughput per stage on synthetic books."""
+    from src.ingestion.benchmark import IngestBenchmark
+    from src.ingestion.chunking.get_chunker import get_chunker
+    from src.ingestion.parsers.get_parser import get_parser
+    from src.ingestion.parsers.parsers import PyMuPDFParser
+
+    if parser not in {"pymupdf", "configured"}:
+        raise typer.BadParameter(f"Unknown parser: {parser}")
+
+    context = get_app_context()
+    config = context.config
+    benchmark = IngestBenchmark(
+        chunker=get_chunker(),
+        embedder=context.embedder,
+        store_config=config.vector_store,
+        parser=get_parser()
+        if parser == "configured"
+        else PyMuPDFParser(config.parsing.heading_font_threshold),
+    )
+
+    console.print(
+        f"[bold blue]Benchmarking ingestion on {docs} x {pages} synthetic pages "
+        f"and {pdfs} x {pdf_pages} PDF pages ({config.vector_store.backend} store)..."
+        "[/bold blue]"
+    )
+    run = benchmark.run(
+        docs=docs,
+        pages=pages,
+        words_per_page=words_per_page,
+        pdfs=pdfs,
+        pdf_pages=pdf_pages,
+        seed=seed,
+    )
+
+    table = Table(title="Ingestion throughput")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Items", justify="right")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Throughput", style="magenta", justify="right")
+    table.add_column("Peak RSS MB", justify="right")
+    for stage in run.stages:
+        table.add_row(
+            stage.stage,
+            str(stage.items),
+            f"{stage.seconds:.2f}",
+            f"{stage.per_second:.1f} {stage.unit}/s",
+            "-" if stage.peak_rss_mb is None else f"{stage.peak_rss_mb:.0f}",
+        )
+    console.print(table)
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("a") as sink:
+            sink.write(run.model_dump_json() + "\n")
+        console.print(f"Appended run to {output}")
+
+
+@app.command()
+def evaluate(
+    dataset: Path = typer.Argument(
+        ..., help='JSONL of {"query": ..., "book": ..., "pages": [first, last]}'
+    ),
+    k: int = typer.Option(5, help="Results scored per question (recall@k, nDCG@k)"),
+    pipeline: List[str] = typer.Option(
+        ["simple"], help="Pipelines to evaluate: simple, multi"
+    ),
+    generate: bool = typer.Option(False, help="Also time answer generation"),
+    label: Optional[str] = typer.Option(None, help="Suffix for the run's id"),
+    runs_dir: Optional[Path] = typer.Option(
+        None, help="Where runs are saved (default: <log_dir>/eval)"
+    ),
+):
+    """Score retrieval on labeled questions and compare with the previous run."""
+    from datetime import datetime
+
+    from src.ingestion.vector_store.numpy_store import NumpyStore
+    from src.ingestion.vector_store.stores import ChromaStore
+    from src.retrieval.evaluation import (
+        EvalRun,
+        RetrievalEvaluator,
+        StageTimer,
+        TimedEmbedder,
+        load_dataset,
+        load_runs,
+    )
+
+    unknown = set(pipeline) - {"simple", "multi"}
+    if unknown:
+        raise typer.BadParameter(f"Unknown pipeline(s): {', '.join(sorted(unknown))}")
+
+    context = get_app_context()
+    config = context.config
+    runs_dir = runs_dir or config.logging.log_dir / "eval"
+    questions = load_dataset(dataset)
+
+    # A store of its own, whose embedder reports the time spent embedding
+    timer = StageTimer()
+    embedder = TimedEmbedder(context.embedder, timer)
+    if config.vector_store.backend == "numpy":
+        store = NumpyStore(config.vector_store, embedder=embedder)
+    else:
+        store = ChromaStore(
+            config.vector_store, client=context.chroma_client, embedder=embedder
+        )
+    evaluator = RetrievalEvaluator(
+        store,
+        context.answerer,
+        timer,
+        query_constructor=context.query_constructor if "multi" in pipeline else None,
+        k=k,
+        generate=generate,
+    )
+
+    console.print(
+        f"[bold blue]Evaluating {', '.join(pipeline)} on {len(questions)} "
+        f"questions...[/bold blue]"
+    )
+    reports, results = evaluator.run(questions, pipeline)
+    created = datetime.now()
+    run = EvalRun(
+        run_id=created.strftime("%Y%m%d-%H%M%S") + (f"-{label}" if label else ""),
+        created=created,
+        dataset=str(dataset),
+        settings={
+            "chunking": config.chunking.model_dump(mode="json"),
+            "embedding": config.embedding.model_dump(mode="json"),
+            "vector_store": config.vector_store.model_dump(mode="json"),
+            "llm_model": config.llm.model_name,
+        },
+        reports=reports,
+        questions=results,
+    )
+    previous = load_runs(runs_dir) if runs_dir.exists() else []
+    path = run.save(runs_dir)
+
+    table = Table(
+        title=f"Retrieval @{k} (vs {previous[-1].run_id})"
+        if previous
+        else f"Retrieval @{k}"
+    )
+    table.add_column("Pipeline", style="cyan")
+    for column in ("Recall", "MRR", "nDCG"):
+        table.add_column(column, style="magenta", justify="right")
+    table.add_column("Prompt tokens", justify="right")
+    table.add_column("p50 ms per stage")
+
+    for report in reports:
+        before = previous[-1].report(report.pipeline, k) if previous else None
+        scores = []
+        for name in ("recall", "mrr", "ndcg"):
+            value = getattr(report, name)
+            delta = "" if before is None else f" ({value - getattr(before, name):+.3f})"
+            scores.append(f"{value:.3f}{delta}")
+
+        table.add_row(
+            report.pipeline,
+            *scores,
+            f"{report.prompt_tokens:.0f}",
+            ", ".join(
+                f"{stage} {latency.p50_ms:.1f}"
+                for stage, latency in report.latency.items()
+            ),
+        )
+
+    console.print(table)
+    console.print(f"Saved run to {path}")
+
+
+@app.command()
+def ask(
+    question: Optional[str] = typer.Argument(None, help="Question to answer"),
+    batch: Optional[Path] = typer.Option(
+        None, help='JSONL file of questions, {"id": ..., "query": ...} per line'
+    ),
+    output: Optional[Path] = typer.Option(
+        None, help="Answers file for --batch (default: <batch>.answers.jsonl)"
+    ),
+    top_k: int = typer.Option(5, help="Chunks retrieved per question"),
+    book: Optional[List[str]] = typer.Option(None, help="Only search these books"),
+    parallel: Optional[int] = typer.Option(
+        None,
+        help="Answers generated at once (default: enough to fill the LLM's batches)",
+    ),
+    resume: bool = typer.Option(
+        True, help="Skip questions already answered in the output file"
+    ),
+    profile: bool = _profile_option(
+        "question (with --batch, those answered while no other is profiled; "
+        "--parallel 1 for all)"
+    ),
+    profile_top: int = typer.Option(20, help="Functions listed per profile"),
+):
+    """Answer a question, or a whole file of them with --batch."""
+    from src.generation.batch import BatchAnswerer
+    from src.generation.pipeline import SimpleRAGPipeline
+    from src.shared.models import SearchResult
+
+    if (question is None) == (batch is None):
+        raise typer.BadParameter("Pass either a question or --batch")
+
+    context = get_app_context()
+    filters = SearchFilter(books=[Path(name).stem for name in book]) if book else None
+    _start_profiling(profile, profile_top)
+
+    if question is not None:
+        # The pipeline traces and profiles the question like the TUI's
+        pipeline = SimpleRAGPipeline(context.vector_store, context.answerer)
+        sources: List[SearchResult] = []
+        answer = pipeline.query(
+            question,
+            top_k=top_k,
+            filters=filters,
+            on_retrieved=lambda _, results: sources.extend(results),
+        )
+        console.print(answer)
+        for result in sources:
+            meta = result.metadata
+            console.print(
+                f"[dim]- {meta.source_doc_title}, {meta.chapter_name}, "
+                f"pages {meta.page_range[0]}-{meta.page_range[1]}[/dim]"
+            )
+        _flush_metrics()
+        _print_profiles()
+        return
+
+    assert batch is not None
+    llm_config = context.config.llm
+    runner = BatchAnswerer(
+        context.vector_store,
+        context.answerer,
+        top_k=top_k,
+        filters=filters,
+        parallel=parallel or llm_config.max_concurrency * llm_config.max_batch_size,
+    )
+    output = output or batch.with_suffix(".answers.jsonl")
+    console.print(f"[bold blue]Answering {batch} into {output}...[/bold blue]")
+    summary = runner.run(batch, output, resume=resume)
+    console.print(
+        f"[bold green]{summary.answered} answered[/bold green], "
+        f"{summary.failed} failed, {summary.skipped} already done "
+        f"in {summary.elapsed_s:.1f}s"
+    )
+    _flush_metrics()
+    _print_profiles()
+
+
+@app.command()
+def serve(
+    host: Optional[str] = typer.Option(
+        None, help="Interface to bind (default: config)"
+    ),
+    port: Optional[int] = typer.Option(
+        None, help="Port to listen on (default: config)"
+    ),
+):
+    """Serve /query, /search and /stats over HTTP from one warm pipeline."""
+    import uvicorn
+
+    from src.server.app import create_app
+
+    context = get_app_context()
+    server_config = context.config.server
+    # A single process: every request shares its loaded models
+    uvicorn.run(
+        create_app(context),
+        host=host or server_config.host,
+        port=port or server_config.port,
+    )
+
+
+@app.command()
+def chat(
+    profile: bool = _profile_option("question"),
+    profile_top: int = typer.Option(20, help="Functions listed per profile"),
+):
     """Launch the terminal interactive chat."""
-    app = RAGApp()
-    app.run()
+    from src.ui.app import RAGApp
+
+    app = RAGApp(get_app_context())
+    _start_profiling(profile, profile_top)
+    try:
+        app.run()
+    finally:
+        _flush_metrics()
+        # After the app gives the terminal back
+        _print_profiles()
 
 
 if __name__ == "__main__":
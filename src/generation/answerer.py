@@ -1,8 +1,19 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from typing import List
 
 from src.generation.generator import BaseGenerator
 from src.shared.models import SearchResult
+from src.utils.logger import logger
+from src.utils.tracing import tracer
+
+NO_RESULTS_ANSWER = "No relevant documents found."
+# Rough size of an English token; the LLM's tokenizer is not available here
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
 
 
 class BaseQueryAnswerer(ABC):
@@ -13,15 +24,19 @@ class BaseQueryAnswerer(ABC):
         """Generate answer from search results and query."""
         pass
 
+    def stream(self, result_search: List[SearchResult], query: str) -> Iterator[str]:
+        """Yield the answer in pieces as it is generated; one piece by default."""
+        yield self.answer(result_search, query)
+
 
 class QueryAnswerer(BaseQueryAnswerer):
     """Generates answers using LLM with retrieved context."""
 
     def __init__(self, generator: BaseGenerator) -> None:
         self.generator = generator
-        self.template = """Answer this question using only the context below.
-
-        Context:
+        # Identical for every question, so it goes first as the system prompt
+        self.instructions = "Answer the question using only the context below."
+        self.template = """Context:
         {context}
 
         Question: {question}
@@ -30,10 +45,31 @@ class QueryAnswerer(BaseQueryAnswerer):
 
     def answer(self, result_search: List[SearchResult], query: str) -> str:
         if not result_search:
-            return "No relevant documents found."
+            return NO_RESULTS_ANSWER
+
+        prompt = self.build_prompt(result_search, query)
+        with tracer.span("generate", kind="llm") as span:
+            answer = self.generator.generate(prompt, system=self.instructions).strip()
+            span.set(
+                prompt_tokens=self.prompt_tokens(prompt),
+                completion_tokens=estimate_tokens(answer),
+            )
+        return answer
+
+    def stream(self, result_search: List[SearchResult], query: str) -> Iterator[str]:
+        if not result_search:
+            yield NO_RESULTS_ANSWER
+            return
+
+        prompt = self.build_prompt(result_search, query)
+        yield from self.generator.stream(prompt, system=self.instructions)
+
+    def prompt_tokens(self, prompt: str) -> int:
+        """Estimated size of a prompt as sent, system instructions included."""
+        return estimate_tokens(self.instructions + prompt)
 
+    def build_prompt(self, result_search: List[SearchResult], query: str) -> str:
         context_parts = [f"[{i}] {r.content}" for i, r in enumerate(result_search, 1)]
         context = "\n\n".join(context_parts)
-        print(context)
-        prompt = self.template.format(context=context, question=query)
-        return self.generator.generate(prompt).strip()
+        logger.debug("Answering from context:\n{}", context)
+        return self.template.format(context=context, question=query)
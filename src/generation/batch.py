@@ -0,0 +1,178 @@
+"""Answer a file of questions in bulk.
+
+Questions are read from JSON lines ({"id": ..., "query": ...}) and handled a
+chunk at a time: one embedding batch and one vector-store query for the whole
+chunk, then answers generated by a bounded pool of threads, which queue in
+the generation scheduler like any other LLM call. Each answer is appended to
+the output JSONL as soon as it is ready, so an interrupted run picks up where
+it stopped.
+
+Under --profile, each chunk's retrieval and each answer are profiled units.
+The profiler takes one unit at a time, so answers generated alongside a
+profiled one are not profiled; --parallel 1 profiles every question.
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TextIO
+
+from pydantic import BaseModel, Field
+
+from src.generation.answerer import BaseQueryAnswerer
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.retrieval.filters import SearchFilter
+from src.shared.models import SearchResult
+from src.utils.logger import logger
+from src.utils.profiling import profiler
+
+
+class BatchQuestion(BaseModel):
+    id: str
+    query: str = Field(min_length=1)
+
+
+class BatchAnswer(BaseModel):
+    id: str
+    query: str
+    answer: str | None = None
+    sources: list[SearchResult] = Field(default_factory=list)
+    error: str | None = Field(default=None, description="Set when answering failed")
+    latency_ms: float = Field(description="Generation time for this answer")
+
+
+class BatchSummary(BaseModel):
+    answered: int
+    failed: int
+    skipped: int = Field(description="Already answered by an earlier run")
+    elapsed_s: float
+
+
+def read_questions(path: Path) -> Iterator[BatchQuestion]:
+    """Questions from a JSONL file; lines without an id get their line number."""
+    with path.open() as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record.setdefault("id", str(number))
+            yield BatchQuestion.model_validate(record)
+
+
+def load_answered(path: Path) -> set[str]:
+    """Ids answered without error in an earlier run's output.
+
+    The file is rewritten with only those lines, dropping failed answers (to
+    be retried) and a line cut short by an interrupted run.
+    """
+    if not path.exists():
+        return set()
+    kept: list[str] = []
+    answered: set[str] = set()
+    for line in path.read_text().splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if record.get("error") is None and "id" in record:
+            answered.add(record["id"])
+            kept.append(line)
+    path.write_text("".join(f"{line}\n" for line in kept))
+    return answered
+
+
+class BatchAnswerer:
+    """Runs questions through retrieval and generation, chunk by chunk."""
+
+    def __init__(
+        self,
+        vector_store: BaseVectorStore,
+        answerer: BaseQueryAnswerer,
+        top_k: int = 5,
+        filters: SearchFilter | None = None,
+        parallel: int = 4,
+        chunk_size: int = 256,
+    ) -> None:
+        self.vector_store = vector_store
+        self.answerer = answerer
+        self.top_k = top_k
+        self.filters = filters
+        self.parallel = parallel
+        self.chunk_size = chunk_size
+
+    def run(self, questions: Path, output: Path, resume: bool = True) -> BatchSummary:
+        started = time.perf_counter()
+        if resume:
+            answered = load_answered(output)
+        else:
+            output.unlink(missing_ok=True)
+            answered = set()
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        summary = BatchSummary(answered=0, failed=0, skipped=0, elapsed_s=0.0)
+        chunk: list[BatchQuestion] = []
+        with output.open("a") as sink:
+            for question in read_questions(questions):
+                if question.id in answered:
+                    summary.skipped += 1
+                    continue
+                chunk.append(question)
+                if len(chunk) == self.chunk_size:
+                    self._run_chunk(chunk, sink, summary)
+                    chunk = []
+            if chunk:
+                self._run_chunk(chunk, sink, summary)
+
+        summary.elapsed_s = time.perf_counter() - started
+        return summary
+
+    def _run_chunk(
+        self, chunk: list[BatchQuestion], sink: TextIO, summary: BatchSummary
+    ) -> None:
+        logger.info("Retrieving context for {} questions", len(chunk))
+        with profiler.profile(f"retrieve {chunk[0].id}-{chunk[-1].id}"):
+            results = self.vector_store.query_batch(
+                [question.query for question in chunk], self.top_k, self.filters
+            )
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            futures = [
+                executor.submit(self._answer, question, sources)
+                for question, sources in zip(chunk, results)
+            ]
+            # Written as they finish; the id ties each line to its question
+            for future in as_completed(futures):
+                answer = future.result()
+                sink.write(answer.model_dump_json() + "\n")
+                sink.flush()
+                if answer.error is None:
+                    summary.answered += 1
+                else:
+                    summary.failed += 1
+        logger.info("{} answered, {} failed so far", summary.answered, summary.failed)
+
+    def _answer(
+        self, question: BatchQuestion, sources: list[SearchResult]
+    ) -> BatchAnswer:
+        started = time.perf_counter()
+        answer: str | None = None
+        error: str | None = None
+        try:
+            with profiler.profile(f"{question.id} {question.query}"):
+                answer = self.answerer.answer(sources, question.query)
+            # Generators report backend failures in the text rather than raise
+            if answer.startswith("Error: "):
+                answer, error = None, answer.removeprefix("Error: ")
+        except Exception as e:
+            logger.warning("Question {} failed: {}", question.id, e)
+            error = str(e)
+        return BatchAnswer(
+            id=question.id,
+            query=question.query,
+            answer=answer,
+            sources=sources,
+            error=error,
+            latency_ms=(time.perf_counter() - started) * 1000,
+        )
@@ -1,10 +1,22 @@
+import json
+import os
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
+import httpx
 import ollama
 
 from src.utils.config import LLMConfig
 from src.utils.logger import logger
 
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+# Rate limits and transient server errors; anything else fails at once
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 0.5
+
 
 class OllamaManager:
     """Manages Ollama model availability."""
@@ -26,28 +38,238 @@ class OllamaManager:
             return False
 
 
+def chat_messages(
+    prompt: str, system: str | None, cache_system_prompt: bool = True
+) -> list[dict[str, str]]:
+    if system is None:
+        return [{"role": "user", "content": prompt}]
+    if cache_system_prompt:
+        # An identical leading message lets the server reuse its evaluated
+        # prefix while the model stays loaded
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ]
+    return [{"role": "user", "content": f"{system}\n\n{prompt}"}]
+
+
+def _is_retryable(error: httpx.HTTPError) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUSES
+    return isinstance(error, httpx.TransportError)
+
+
 class BaseGenerator(ABC):
+    # Whether generate_batch serves several prompts faster than one at a time
+    supports_batching = False
+
     @abstractmethod
-    def generate(self, prompt: str) -> str:
-        """Generate text from a prompt."""
+    def generate(self, prompt: str, system: str | None = None) -> str:
+        """Generate text from a prompt, after fixed system instructions if given."""
         pass
 
+    def generate_batch(
+        self, prompts: list[str], system: str | None = None
+    ) -> list[str]:
+        """Generate one answer per prompt, in order."""
+        return [self.generate(prompt, system) for prompt in prompts]
+
+    def stream(self, prompt: str, system: str | None = None) -> Iterator[str]:
+        """Yield the answer in pieces as it is generated; one piece by default."""
+        yield self.generate(prompt, system)
+
+    def warm_up(self) -> None:
+        """Load the model ahead of the first request; a no-op by default."""
+
 
 class OllamaGenerator(BaseGenerator):
     def __init__(self, config: LLMConfig, auto_setup: bool = True) -> None:
         self.model = config.model_name
         self.temperature = config.temperature
+        self.keep_alive = config.keep_alive
+        self.cache_system_prompt = config.cache_system_prompt
+        # Sent with every request: Ollama reloads the model when num_ctx changes
+        self.options: dict[str, Any] = {
+            "temperature": config.temperature,
+            "num_ctx": config.num_ctx,
+            "num_predict": config.num_predict,
+        }
+        if config.num_thread is not None:
+            self.options["num_thread"] = config.num_thread
         if auto_setup:
             OllamaManager.ensure_ready(self.model)
 
-    def generate(self, prompt: str) -> str:
+    def warm_up(self) -> None:
+        """Have Ollama load the model: an empty prompt generates no tokens."""
+        ollama.generate(
+            model=self.model,
+            prompt="",
+            options=self.options,
+            keep_alive=self.keep_alive,
+        )
+
+    def generate(self, prompt: str, system: str | None = None) -> str:
         """Generate text using Ollama."""
         try:
-            response = ollama.chat(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                options={"temperature": self.temperature},
-            )
-            return response["message"]["content"]
+            return "".join(self.stream(prompt, system))
+        except Exception as e:
+            return f"Error: {e}"
+
+    def stream(self, prompt: str, system: str | None = None) -> Iterator[str]:
+        """Yield the answer as Ollama produces it, logging time to first token."""
+        started = time.perf_counter()
+        first_token_s: float | None = None
+        last_chunk = None
+        for chunk in ollama.chat(
+            model=self.model,
+            messages=chat_messages(prompt, system, self.cache_system_prompt),
+            options=self.options,
+            keep_alive=self.keep_alive,
+            stream=True,
+        ):
+            content = chunk["message"]["content"]
+            if content and first_token_s is None:
+                first_token_s = time.perf_counter() - started
+            last_chunk = chunk
+            yield content
+
+        if last_chunk is None:
+            # Nothing came back, not even the stats: an empty answer
+            return
+        total_s = time.perf_counter() - started
+        # The last chunk carries Ollama's stats (durations in ns); a long load
+        # means the model had been evicted since the previous request
+        logger.info(
+            "{}: first token {:.2f}s, load {:.2f}s, total {:.2f}s, "
+            "{} prompt / {} output tokens",
+            self.model,
+            total_s if first_token_s is None else first_token_s,
+            (last_chunk.get("load_duration") or 0) / 1e9,
+            total_s,
+            last_chunk.get("prompt_eval_count"),
+            last_chunk.get("eval_count"),
+        )
+
+
+class OpenAIGenerator(BaseGenerator):
+    """Chat completions from an OpenAI-compatible server (OpenAI, vLLM, llama.cpp).
+
+    Speaks the HTTP API through one httpx client per generator, whose pool
+    keeps connections to the server alive between requests (and threads).
+    Connection errors, timeouts, 429 and 5xx responses are retried with
+    exponential backoff.
+    """
+
+    # The server batches concurrent requests (continuous batching in vLLM)
+    supports_batching = True
+
+    def __init__(self, config: LLMConfig) -> None:
+        self.model = config.model_name
+        self.temperature = config.temperature
+        self.max_tokens = config.num_predict if config.num_predict > 0 else None
+        self.cache_system_prompt = config.cache_system_prompt
+        self.max_retries = config.max_retries
+        self.max_connections = config.max_connections
+        # Local servers usually need no key
+        api_key = config.api_key or os.getenv("OPENAI_API_KEY")
+        self.client = httpx.Client(
+            base_url=config.base_url or OPENAI_BASE_URL,
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+            timeout=config.request_timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_connections,
+            ),
+        )
+
+    def warm_up(self) -> None:
+        """Open a pooled connection and check that the server answers."""
+        self.client.get("/models").raise_for_status()
+
+    def generate(self, prompt: str, system: str | None = None) -> str:
+        """Generate text from a streamed completion."""
+        try:
+            return "".join(self.stream(prompt, system))
         except Exception as e:
             return f"Error: {e}"
+
+    def stream(self, prompt: str, system: str | None = None) -> Iterator[str]:
+        """Yield the completion as the server sends it, logging time to first token."""
+        payload: dict[str, Any] = {
+            "model": self.model,
+            "messages": chat_messages(prompt, system, self.cache_system_prompt),
+            "temperature": self.temperature,
+            "stream": True,
+        }
+        if self.max_tokens is not None:
+            payload["max_tokens"] = self.max_tokens
+
+        started = time.perf_counter()
+        first_token_s: float | None = None
+        for content in self._complete(payload):
+            if content and first_token_s is None:
+                first_token_s = time.perf_counter() - started
+            yield content
+
+        total_s = time.perf_counter() - started
+        logger.info(
+            "{}: first token {:.2f}s, total {:.2f}s",
+            self.model,
+            total_s if first_token_s is None else first_token_s,
+            total_s,
+        )
+
+    def generate_batch(
+        self, prompts: list[str], system: str | None = None
+    ) -> list[str]:
+        """Send the prompts concurrently over the connection pool."""
+        workers = min(len(prompts), self.max_connections)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(lambda prompt: self.generate(prompt, system), prompts)
+            )
+
+    def _complete(self, payload: dict[str, Any]) -> Iterator[str]:
+        attempt = 0
+        while True:
+            started = False
+            try:
+                for content in self._stream_once(payload):
+                    started = True
+                    yield content
+                return
+            except httpx.HTTPError as e:
+                # Text already handed to the caller cannot be taken back
+                if started or attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                attempt += 1
+                logger.warning(
+                    "{} request failed ({}), retry {}/{}",
+                    self.model,
+                    e,
+                    attempt,
+                    self.max_retries,
+                )
+                time.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+    def _stream_once(self, payload: dict[str, Any]) -> Iterator[str]:
+        # Each attempt starts over, so a stream cut off midway is not reused
+        with self.client.stream("POST", "/chat/completions", json=payload) as response:
+            if response.is_error:
+                response.read()
+                response.raise_for_status()
+            yield from self._stream_deltas(response)
+
+    @staticmethod
+    def _stream_deltas(response: httpx.Response) -> Iterator[str]:
+        """Content of each server-sent chunk, read to the end of the body."""
+        # Reading past [DONE] lets the connection go back to the pool
+        for line in response.iter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line.removeprefix("data:").strip()
+            if data == "[DONE]":
+                continue
+            choices = json.loads(data).get("choices") or []
+            if choices:
+                yield choices[0].get("delta", {}).get("content") or ""
@@ -0,0 +1,11 @@
+from src.generation.generator import BaseGenerator, OllamaGenerator, OpenAIGenerator
+from src.utils.config import LLMConfig, settings
+
+
+def get_generator(config: LLMConfig | None = None) -> BaseGenerator:
+    config = config or settings.llm
+    if config.provider == "ollama":
+        return OllamaGenerator(config)
+    elif config.provider == "openai":
+        return OpenAIGenerator(config)
+    raise ValueError(f"Unsupported LLM provider: {config.provider}")
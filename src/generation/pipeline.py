@@ -1,32 +1,73 @@
-from typing import List
+from typing import Callable, List, Optional
 
-from src.ingestion.vector_store.stores import ChromaStore
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.retrieval.filters import SearchFilter
 from src.shared.models import SearchResult
 from src.utils.logger import logger
+from src.utils.profiling import profiler
+from src.utils.tracing import tracer
 
 from .answerer import BaseQueryAnswerer
 from .query_constructor import QueryConstructor
 
+# Called with the question and its search results before the answer is generated
+RetrievedHook = Callable[[str, List[SearchResult]], None]
+
+
+def retrieved(results: List[SearchResult]) -> dict:
+    """Span attributes naming the chunks a search returned."""
+    return {
+        "results": len(results),
+        "chunk_ids": [str(result.metadata.chunk_id) for result in results],
+    }
+
 
 class SimpleRAGPipeline:
-    def __init__(self, vector_store: ChromaStore, answerer: BaseQueryAnswerer) -> None:
+    def __init__(
+        self, vector_store: BaseVectorStore, answerer: BaseQueryAnswerer
+    ) -> None:
         self.vector_store = vector_store
         self.answerer = answerer
 
-    def query(self, query: str, top_k: int = 5) -> str:
+    def retrieve(
+        self, query: str, top_k: int = 5, filters: Optional[SearchFilter] = None
+    ) -> List[SearchResult]:
         logger.info(f"Searching for: {query}")
 
-        results: List[SearchResult] = self.vector_store.query([query], n_result=top_k)
+        with tracer.span("retrieve") as span:
+            results: List[SearchResult] = self.vector_store.query(
+                [query], n_result=top_k, filters=filters
+            )
+            span.set(**retrieved(results))
         logger.info(f"Found {len(results)} results")
+        return results
 
-        answer = self.answerer.answer(results, query)
+    def query(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[SearchFilter] = None,
+        on_retrieved: Optional[RetrievedHook] = None,
+    ) -> str:
+        with (
+            profiler.profile(query),
+            tracer.trace(
+                "rag.query", pipeline="simple", query=query, top_k=top_k
+            ) as root,
+        ):
+            results = self.retrieve(query, top_k, filters)
+            if on_retrieved:
+                on_retrieved(query, results)
+
+            answer = self.answerer.answer(results, query)
+            root.set(answer=answer)
         return answer
 
 
 class MultiQueryRAGPipeline:
     def __init__(
         self,
-        vector_store: ChromaStore,
+        vector_store: BaseVectorStore,
         answerer: BaseQueryAnswerer,
         query_constructor: QueryConstructor,
     ) -> None:
@@ -34,14 +75,41 @@ class MultiQueryRAGPipeline:
         self.answerer = answerer
         self.query_constructor = query_constructor
 
-    def query(self, query: str, top_k: int = 10) -> str:
+    def retrieve(
+        self, query: str, top_k: int = 10, filters: Optional[SearchFilter] = None
+    ) -> List[SearchResult]:
         # Generate multiple query variations
-        queries = self.query_constructor.refine_query(query)
+        with tracer.span("expand", kind="llm") as span:
+            queries = self.query_constructor.refine_query(query)
+            span.set(variations=queries)
         logger.info(f"Using {len(queries)} query variations")
         logger.info(queries)
 
-        results: List[SearchResult] = self.vector_store.query(queries, n_result=top_k)
+        with tracer.span("retrieve") as span:
+            results: List[SearchResult] = self.vector_store.query(
+                queries, n_result=top_k, filters=filters
+            )
+            span.set(**retrieved(results))
         logger.info(f"Found {len(results)} total results")
+        return results
+
+    def query(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[SearchFilter] = None,
+        on_retrieved: Optional[RetrievedHook] = None,
+    ) -> str:
+        with (
+            profiler.profile(query),
+            tracer.trace(
+                "rag.query", pipeline="multi", query=query, top_k=top_k
+            ) as root,
+        ):
+            results = self.retrieve(query, top_k, filters)
+            if on_retrieved:
+                on_retrieved(query, results)
 
-        answer = self.answerer.answer(results, query)
+            answer = self.answerer.answer(results, query)
+            root.set(answer=answer)
         return answer
@@ -0,0 +1,293 @@
+"""Concurrency limiting, priorities and micro-batching in front of a generator.
+
+Every LLM call of the process goes through one GenerationScheduler: a fixed
+number of worker threads (the concurrency limit) take requests from a
+priority queue, so answers overtake query expansions and a burst of
+questions queues up instead of thrashing a single local model. Backends that
+serve concurrent requests well (OpenAI-compatible servers batch them) get
+requests that arrive together handed over as one batch.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.generation.generator import BaseGenerator
+from src.utils.config import LLMConfig
+from src.utils.logger import logger
+from src.utils.metrics import metrics
+
+# Queue waits kept per priority for the percentiles in stats()
+WAIT_SAMPLES = 1000
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    ANSWER = 0
+    EXPANSION = 1
+
+
+@dataclass(order=True)
+class _Request:
+    priority: Priority
+    sequence: int
+    prompt: str = field(compare=False)
+    system: str | None = field(compare=False)
+    submitted: float = field(compare=False, default_factory=time.perf_counter)
+    future: Future = field(compare=False, default_factory=Future)
+    # Set for streamed requests, which are never batched
+    on_token: Callable[[str], None] | None = field(compare=False, default=None)
+
+
+class QueueStats(BaseModel):
+    completed: int
+    wait_p50_ms: float
+    wait_p95_ms: float
+
+
+class SchedulerStats(BaseModel):
+    waiting: int
+    running: int
+    batches: int
+    mean_batch_size: float
+    failed: int
+    priorities: dict[str, QueueStats]
+
+
+class GenerationScheduler(BaseGenerator):
+    """Runs a generator's calls on a bounded pool of workers, by priority."""
+
+    def __init__(
+        self,
+        generator: BaseGenerator,
+        max_concurrency: int = 1,
+        max_batch_size: int = 1,
+        batch_window_ms: float = 0.0,
+    ) -> None:
+        self.generator = generator
+        self.max_concurrency = max_concurrency
+        # Waiting for company only pays off when the backend batches
+        batching = generator.supports_batching and max_batch_size > 1
+        self.max_batch_size = max_batch_size if batching else 1
+        self.batch_window = batch_window_ms / 1000 if batching else 0.0
+
+        self._queue: list[_Request] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._workers: list[threading.Thread] = []
+        self._closed = False
+        self._running = 0
+        self._batches = 0
+        self._batched_requests = 0
+        self._failed = 0
+        self._waits: dict[Priority, deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in Priority
+        }
+
+    @classmethod
+    def from_config(
+        cls, generator: BaseGenerator, config: LLMConfig
+    ) -> "GenerationScheduler":
+        return cls(
+            generator,
+            max_concurrency=config.max_concurrency,
+            max_batch_size=config.max_batch_size,
+            batch_window_ms=config.batch_window_ms,
+        )
+
+    def generate(self, prompt: str, system: str | None = None) -> str:
+        return self.submit(prompt, system, Priority.ANSWER).result()
+
+    def stream(
+        self,
+        prompt: str,
+        system: str | None = None,
+        priority: Priority = Priority.ANSWER,
+    ) -> Iterator[str]:
+        """Yield the answer's pieces as the worker receives them."""
+        tokens: queue.SimpleQueue[str | None] = queue.SimpleQueue()
+        future = self.submit(prompt, system, priority, on_token=tokens.put)
+        future.add_done_callback(lambda _: tokens.put(None))
+        while (token := tokens.get()) is not None:
+            yield token
+        # Raises the generator's error, if any
+        future.result()
+
+    def warm_up(self) -> None:
+        self.generator.warm_up()
+
+    def with_priority(self, priority: Priority) -> BaseGenerator:
+        """A generator whose calls are queued with the given priority."""
+        return _PrioritizedGenerator(self, priority)
+
+    def submit(
+        self,
+        prompt: str,
+        system: str | None = None,
+        priority: Priority = Priority.ANSWER,
+        on_token: Callable[[str], None] | None = None,
+    ) -> "Future[str]":
+        request = _Request(
+            priority, next(self._sequence), prompt, system, on_token=on_token
+        )
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("GenerationScheduler is shut down")
+            self._start_workers()
+            heapq.heappush(self._queue, request)
+            self._cond.notify()
+        return request.future
+
+    def shutdown(self) -> None:
+        """Finish the queued requests and stop the workers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def stats(self) -> SchedulerStats:
+        with self._cond:
+            priorities = {}
+            for priority, waits in self._waits.items():
+                p50, p95 = np.percentile(waits, [50, 95]) if waits else (0.0, 0.0)
+                priorities[priority.name.lower()] = QueueStats(
+                    completed=len(waits), wait_p50_ms=p50, wait_p95_ms=p95
+                )
+            return SchedulerStats(
+                waiting=len(self._queue),
+                running=self._running,
+                batches=self._batches,
+                mean_batch_size=self._batched_requests / self._batches
+                if self._batches
+                else 0.0,
+                failed=self._failed,
+                priorities=priorities,
+            )
+
+    def _start_workers(self) -> None:
+        # Started on first use so an idle scheduler costs no threads
+        while len(self._workers) < self.max_concurrency:
+            worker = threading.Thread(
+                target=self._work, name=f"generation-{len(self._workers)}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch = self._take_batch()
+                if not batch:
+                    continue
+                self._running += len(batch)
+            try:
+                self._run(batch)
+            finally:
+                with self._cond:
+                    self._running -= len(batch)
+
+    def _take_batch(self) -> list[_Request]:
+        """Pop the most urgent request and, when batching, compatible ones.
+
+        Called with the lock held; may wait up to the batch window for more
+        requests to arrive.
+        """
+        deadline = time.perf_counter() + self.batch_window
+        while len(self._queue) < self.max_batch_size and not self._closed:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+        if not self._queue:
+            # Another worker took them while this one waited
+            return []
+
+        first = heapq.heappop(self._queue)
+        batch = [first]
+        if self.max_batch_size > 1 and first.on_token is None:
+            compatible = [
+                request
+                for request in self._queue
+                if request.priority == first.priority
+                and request.system == first.system
+                and request.on_token is None
+            ]
+            batch += sorted(compatible)[: self.max_batch_size - 1]
+            taken = {id(request) for request in batch}
+            self._queue = [r for r in self._queue if id(r) not in taken]
+            heapq.heapify(self._queue)
+        return batch
+
+    def _run(self, batch: list[_Request]) -> None:
+        started = time.perf_counter()
+        with self._cond:
+            self._batches += 1
+            self._batched_requests += len(batch)
+            for request in batch:
+                self._waits[request.priority].append(
+                    (started - request.submitted) * 1000
+                )
+        for request in batch:
+            metrics.observe("llm_queue_wait", started - request.submitted)
+        metrics.inc("llm_requests", len(batch))
+        logger.debug(
+            "Generating {} {} request(s), oldest queued {:.0f} ms",
+            len(batch),
+            batch[0].priority.name.lower(),
+            (started - batch[0].submitted) * 1000,
+        )
+
+        try:
+            with metrics.timer("llm_generate"):
+                if batch[0].on_token is not None:
+                    parts = []
+                    for token in self.generator.stream(
+                        batch[0].prompt, batch[0].system
+                    ):
+                        batch[0].on_token(token)
+                        parts.append(token)
+                    results = ["".join(parts)]
+                elif len(batch) == 1:
+                    results = [
+                        self.generator.generate(batch[0].prompt, batch[0].system)
+                    ]
+                else:
+                    results = self.generator.generate_batch(
+                        [request.prompt for request in batch], batch[0].system
+                    )
+        except Exception as e:
+            with self._cond:
+                self._failed += len(batch)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+
+class _PrioritizedGenerator(BaseGenerator):
+    def __init__(self, scheduler: GenerationScheduler, priority: Priority) -> None:
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def generate(self, prompt: str, system: str | None = None) -> str:
+        return self.scheduler.submit(prompt, system, self.priority).result()
+
+    def stream(self, prompt: str, system: str | None = None) -> Iterator[str]:
+        return self.scheduler.stream(prompt, system, self.priority)
@@ -0,0 +1,337 @@
+"""Throughput benchmarks for the ingestion hot path on synthetic books.
+
+Synthetic ParsedDocs of configurable size go through each stage on its own:
+chunking, embedding and writing to a throwaway store (with embeddings
+computed beforehand, so only the write is timed). A full LibraryManager.sync
+then indexes small generated PDFs end to end. Each stage reports its
+throughput and the peak resident memory while it ran.
+"""
+
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Self, TypeVar
+
+import pymupdf
+from pydantic import BaseModel, Field
+
+from src.ingestion.chunking.base_chunker import BaseChunker
+from src.ingestion.embedding.base_embed import TemplateEmbedder
+from src.ingestion.indexer.manager import LibraryManager
+from src.ingestion.parsers.base import BaseParser
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.ingestion.vector_store.numpy_store import NumpyStore
+from src.shared.models import Chunk, EmbeddedChunk, MetaData, ParsedDoc
+from src.utils.config import LibreryConfig, VectorStoreConfig
+from src.utils.logger import logger
+
+T = TypeVar("T")
+# How often the memory sampler reads the process's resident set size
+RSS_SAMPLE_SECONDS = 0.01
+WORDS = [
+    "vector", "index", "query", "matrix", "kernel", "buffer", "thread", "cache",
+    "latency", "graph", "tensor", "parser", "stream", "module", "record", "shard",
+    "replica", "commit", "schema", "token", "layer", "model", "batch", "page",
+]  # fmt: skip
+
+
+class StageResult(BaseModel):
+    stage: str
+    items: int
+    unit: str
+    seconds: float
+    per_second: float
+    peak_rss_mb: float | None = Field(
+        description="Peak resident memory during the stage (None: not measurable)"
+    )
+
+
+class IngestBenchmarkRun(BaseModel):
+    created: datetime
+    commit: str | None = Field(description="git HEAD of the benchmarked tree")
+    params: dict[str, Any]
+    stages: list[StageResult]
+
+
+def _current_rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakRss:
+    """Samples the resident set size in a background thread while open.
+
+    Reads /proc, so it only measures on Linux; elsewhere peak_mb stays None.
+    """
+
+    def __init__(self) -> None:
+        self.peak_bytes = _current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            rss = _current_rss_bytes()
+            if rss is not None and rss > (self.peak_bytes or 0):
+                self.peak_bytes = rss
+
+    def __enter__(self) -> Self:
+        if self.peak_bytes is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        rss = _current_rss_bytes()
+        if rss is not None and rss > (self.peak_bytes or 0):
+            self.peak_bytes = rss
+
+    @property
+    def peak_mb(self) -> float | None:
+        return None if self.peak_bytes is None else self.peak_bytes / 2**20
+
+
+def measure(
+    stage: str, unit: str, run: Callable[[], T], count: Callable[[T], int]
+) -> tuple[T, StageResult]:
+    """Run one stage, returning its output and a StageResult."""
+    logger.info("Benchmarking {}...", stage)
+    with PeakRss() as rss:
+        started = time.perf_counter()
+        output = run()
+        seconds = time.perf_counter() - started
+    items = count(output)
+    result = StageResult(
+        stage=stage,
+        items=items,
+        unit=unit,
+        seconds=seconds,
+        per_second=items / seconds if seconds else 0.0,
+        peak_rss_mb=rss.peak_mb,
+    )
+    logger.info("{}: {:.1f} {}/s", stage, result.per_second, unit)
+    return output, result
+
+
+def synthetic_markdown(
+    pages: int, words_per_page: int, pages_per_chapter: int = 10, seed: int = 0
+) -> str:
+    """Markdown with page breaks, a chapter every few pages and sections between."""
+    rng = random.Random(seed)
+    page_texts = []
+    for page in range(pages):
+        lines = []
+        if page % pages_per_chapter == 0:
+            lines.append(f"# Chapter {page // pages_per_chapter + 1}")
+        elif page % 3 == 0:
+            lines.append(f"## Section {page}")
+        words = rng.choices(WORDS, k=words_per_page)
+        # Paragraphs of about 60 words
+        for start in range(0, len(words), 60):
+            lines.append(" ".join(words[start : start + 60]).capitalize() + ".")
+        page_texts.append("\n\n".join(lines))
+    return f"\n\n{BaseParser.PAGE_BREAK}\n\n".join(page_texts)
+
+
+class SyntheticParser(BaseParser):
+    """Generates a book instead of reading one; parse() ignores the file."""
+
+    def __init__(self, pages: int, words_per_page: int, seed: int = 0) -> None:
+        self.pages = pages
+        self.words_per_page = words_per_page
+        self.seed = seed
+
+    def parse(self, pdf_path: os.PathLike) -> ParsedDoc:
+        scanned = self._scan_markdown(
+            synthetic_markdown(self.pages, self.words_per_page, seed=self.seed)
+        )
+        return ParsedDoc(
+            text=scanned.text,
+            metadata=MetaData(
+                title=Path(pdf_path).stem, nbr_pages=self.pages, parser="synthetic"
+            ),
+            structure=self._build_structure(
+                scanned.headers, len(scanned.text), scanned.page_map
+            ),
+            page_map=scanned.page_map,
+        )
+
+
+def write_pdf(path: Path, pages: int, words_per_page: int, seed: int = 0) -> None:
+    """A small born-digital PDF with larger-font headings, for a full sync."""
+    markdown_pages = synthetic_markdown(pages, words_per_page, seed=seed).split(
+        BaseParser.PAGE_BREAK
+    )
+    with pymupdf.open() as doc:
+        for page_markdown in markdown_pages:
+            page = doc.new_page()
+            y = 72.0
+            for block in page_markdown.strip().split("\n\n"):
+                heading = block.startswith("#")
+                text = block.lstrip("# ")
+                size = 18 if heading else 10
+                box = pymupdf.Rect(72, y, page.rect.width - 72, page.rect.height - 72)
+                # Returns the unused height, negative when the text overflows
+                left = page.insert_textbox(box, text, fontsize=size)
+                if left < 0:
+                    break
+                y = page.rect.height - 72 - left + size
+        doc.save(path)
+
+
+class PrecomputedEmbedder(TemplateEmbedder):
+    """Returns vectors embedded earlier, so a store's ingest only writes."""
+
+    def __init__(self, vectors: dict[str, list[float]], batch_size: int) -> None:
+        super().__init__(batch_size)
+        self.vectors = vectors
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return [self.vectors[text] for text in texts]
+
+    def embed_text(self, text: str) -> list[float]:
+        return self.vectors[self._preprocess(text)]
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+@contextmanager
+def _scratch_dir() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory(prefix="ingest-bench-") as path:
+        yield Path(path)
+
+
+class IngestBenchmark:
+    """Measures chunking, embedding, store writes and a full sync."""
+
+    def __init__(
+        self,
+        chunker: BaseChunker,
+        embedder: TemplateEmbedder,
+        store_config: VectorStoreConfig,
+        parser: BaseParser,
+    ) -> None:
+        self.chunker = chunker
+        self.embedder = embedder
+        self.store_config = store_config
+        self.parser = parser
+
+    def run(
+        self,
+        docs: int = 10,
+        pages: int = 50,
+        words_per_page: int = 300,
+        pdfs: int = 3,
+        pdf_pages: int = 10,
+        seed: int = 0,
+    ) -> IngestBenchmarkRun:
+        params = {
+            "docs": docs,
+            "pages": pages,
+            "words_per_page": words_per_page,
+            "pdfs": pdfs,
+            "pdf_pages": pdf_pages,
+            "seed": seed,
+            "chunker": type(self.chunker).__name__,
+            "embedder": type(self.embedder).__name__,
+            "backend": self.store_config.backend,
+            "parser": type(self.parser).__name__,
+        }
+        parsed = [
+            SyntheticParser(pages, words_per_page, seed=seed + i).parse(
+                Path(f"synthetic-{i}.pdf")
+            )
+            for i in range(docs)
+        ]
+
+        stages: list[StageResult] = []
+        chunks, result = measure(
+            "chunk",
+            "chunks",
+            lambda: [chunk for doc in parsed for chunk in self.chunker.chunk(doc)],
+            len,
+        )
+        stages.append(result)
+
+        embedded, result = measure(
+            "embed", "embeddings", lambda: self.embedder.embed_chunk(chunks), len
+        )
+        stages.append(result)
+
+        with _scratch_dir() as scratch:
+            stages.append(self._write(chunks, embedded, scratch / "write"))
+            stages.append(self._sync(pdfs, pdf_pages, words_per_page, seed, scratch))
+
+        return IngestBenchmarkRun(
+            created=datetime.now(), commit=git_commit(), params=params, stages=stages
+        )
+
+    def _scratch_store(self, path: Path, embedder: TemplateEmbedder) -> BaseVectorStore:
+        """A store of the configured backend that lives under path."""
+        config = self.store_config.model_copy(
+            update={"client_path": path / "chroma", "numpy_path": path / "numpy"}
+        )
+        if config.backend == "numpy":
+            return NumpyStore(config, embedder=embedder)
+        from src.ingestion.vector_store.stores import ChromaStore
+
+        return ChromaStore(config, embedder=embedder)
+
+    def _write(
+        self, chunks: list[Chunk], embedded: list[EmbeddedChunk], path: Path
+    ) -> StageResult:
+        vectors = {
+            self.embedder._preprocess(chunk.content): chunk.embedding
+            for chunk in embedded
+        }
+        store = self._scratch_store(
+            path, PrecomputedEmbedder(vectors, self.embedder.batch_size)
+        )
+        _, result = measure(
+            "write", "chunks", lambda: store.ingest(chunks), lambda _: store.count()
+        )
+        return result
+
+    def _sync(
+        self, pdfs: int, pages: int, words_per_page: int, seed: int, scratch: Path
+    ) -> StageResult:
+        books = scratch / "books"
+        books.mkdir()
+        for i in range(pdfs):
+            write_pdf(books / f"book-{i}.pdf", pages, words_per_page, seed=seed + i)
+
+        store = self._scratch_store(scratch / "sync", self.embedder)
+        manager = LibraryManager(
+            LibreryConfig(books_paths=books, manifest_path=scratch / "manifest.json"),
+            store=store,
+            parser=self.parser,
+            chunker=self.chunker,
+        )
+        _, result = measure(
+            "sync", "files", manager.sync, lambda _: len(manager.manifest)
+        )
+        return result
@@ -1,8 +1,14 @@
-from typing import List
+from typing import List, Optional
 from uuid import uuid4
 
 from src.ingestion.chunking.base_chunker import BaseChunker
-from src.shared.models import Chapter, Chunk, ChunkMetadata, ParsedDoc
+from src.shared.models import (
+    Chapter,
+    Chunk,
+    ChunkMetadata,
+    DocumentStructure,
+    ParsedDoc,
+)
 
 
 class MarkdownChunker(BaseChunker):
@@ -14,7 +20,11 @@ class MarkdownChunker(BaseChunker):
         return len(content) > self.chunk_size
 
     def _split_chapter(
-        self, content: str, chapter: Chapter, source_title: str
+        self,
+        content: str,
+        chapter: Chapter,
+        source_title: str,
+        structure: Optional[DocumentStructure] = None,
     ) -> List[Chunk]:
         chunks: List[Chunk] = []
         start = 0
@@ -25,9 +35,16 @@ class MarkdownChunker(BaseChunker):
             chunk_text = content[start:end]
             char_start = chapter.char_span[0] + start
             char_end = chapter.char_span[0] + min(end, content_length)
+            # A chunk belongs to the deepest section it starts in
+            section_path = (
+                structure.section_path(structure.section_at(char_start))
+                if structure
+                else []
+            )
             metadata = ChunkMetadata(
                 source_doc_title=source_title,
-                chapter_name=chapter.title,
+                chapter_name=section_path[0] if section_path else chapter.title,
+                section_path=section_path,
                 page_range=chapter.page_range,
                 char_span=(char_start, char_end),
                 chunk_id=uuid4(),
@@ -47,16 +64,21 @@ class MarkdownChunker(BaseChunker):
 
         for chapter in chapters:
             content = text[chapter.char_span[0] : chapter.char_span[1]]
+            # Chapter name is the top-level heading the span belongs to
+            section_path = doc.structure.section_path(chapter.section)
 
             if self._should_split(content):
                 # Split large chapter into smaller chunks
-                sub_chunks = self._split_chapter(content, chapter, doc.metadata.title)
+                sub_chunks = self._split_chapter(
+                    content, chapter, doc.metadata.title, doc.structure
+                )
                 chunk_list.extend(sub_chunks)
             else:
                 # Keep small chapter as single chunk
                 metadata = ChunkMetadata(
                     source_doc_title=doc.metadata.title,
-                    chapter_name=chapter.title,
+                    chapter_name=section_path[0] if section_path else chapter.title,
+                    section_path=section_path,
                     page_range=chapter.page_range,
                     char_span=chapter.char_span,
                     chunk_id=uuid4(),
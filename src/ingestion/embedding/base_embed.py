@@ -2,13 +2,24 @@ import re
 from abc import ABC, abstractmethod
 from typing import List
 
+import numpy as np
+
 from src.shared.models import Chunk, EmbeddedChunk
 from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.utils.tracing import tracer
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length; all-zero rows are left as they are."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(vectors.dtype).tiny)
 
 
 class TemplateEmbedder(ABC):
-    def __init__(self, batch_size: int) -> None:
+    def __init__(self, batch_size: int, normalize: bool = False) -> None:
         self.batch_size = batch_size
+        self.normalize = normalize
 
     def _preprocess(self, text: str) -> str:
         text = text.strip()
@@ -23,6 +34,15 @@ class TemplateEmbedder(ABC):
     def embed_text(self, text: str) -> List[float]:
         pass
 
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, unit-normalizing the whole batch at once if configured."""
+        with tracer.span("embed", texts=len(texts)), metrics.timer("embed_batch"):
+            vectors = self._embed_batch(texts)
+        metrics.inc("texts_embedded", len(texts))
+        if not self.normalize or not vectors:
+            return vectors
+        return l2_normalize(np.asarray(vectors, dtype=np.float32)).tolist()
+
     def embed_chunk(self, chunks: List[Chunk]) -> List[EmbeddedChunk]:
         if not chunks:
             logger.info("No chunks to embed")
@@ -33,7 +53,9 @@ class TemplateEmbedder(ABC):
             for i in range(0, len(chunks), self.batch_size):
                 batch = chunks[i : i + self.batch_size]
                 logger.debug(
-                    f"Embedding batch {i // self.batch_size + 1}/{(len(chunks) - 1) // self.batch_size + 1}"
+                    "Embedding batch {}/{}",
+                    i // self.batch_size + 1,
+                    (len(chunks) - 1) // self.batch_size + 1,
                 )
                 processed_texts = [self._preprocess(c.content) for c in batch]
                 valid_indices = [
@@ -49,7 +71,7 @@ class TemplateEmbedder(ABC):
                 valid_texts = [processed_texts[idx] for idx in valid_indices]
                 valid_chunks = [batch[idx] for idx in valid_indices]
 
-                embeddings = self._embed_batch(valid_texts)
+                embeddings = self.embed_batch(valid_texts)
                 for chunk, vector in zip(valid_chunks, embeddings):
                     chunk_data = chunk.model_dump()
                     embedded_chunk = EmbeddedChunk(
@@ -2,7 +2,7 @@ from typing import List
 
 from sentence_transformers import SentenceTransformer
 
-from src.ingestion.embedding.base_embed import TemplateEmbedder
+from src.ingestion.embedding.base_embed import TemplateEmbedder, l2_normalize
 from src.utils.logger import logger
 
 
@@ -13,11 +13,12 @@ class SentenceTransformerEmbedder(TemplateEmbedder):
         model_name: str = "all-MiniLM-L6-v2",
         batch_size: int = 32,
         device: str = "cpu",
+        normalize: bool = False,
     ):
-        super().__init__(batch_size=batch_size)
+        super().__init__(batch_size=batch_size, normalize=normalize)
 
         logger.info(f"Loading SentenceTransformer model: {model_name}")
-        self.model = SentenceTransformer(model_name, device=device)
+        self.model = self._load_model(model_name, device)
         self.model_name = model_name
         actual_dim = self.model.get_sentence_embedding_dimension()
         if actual_dim != expected_dim:
@@ -26,6 +27,9 @@ class SentenceTransformerEmbedder(TemplateEmbedder):
             )
         logger.info(f"Model loaded: {actual_dim}d on {self.model.device}")
 
+    def _load_model(self, model_name: str, device: str) -> SentenceTransformer:
+        return SentenceTransformer(model_name, device=device)
+
     def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         if not texts:
             return []
@@ -49,6 +53,8 @@ class SentenceTransformerEmbedder(TemplateEmbedder):
 
         try:
             embedding = self.model.encode(preprocessed, convert_to_numpy=True)
+            if self.normalize:
+                embedding = l2_normalize(embedding)
             return embedding.tolist()
         except Exception as e:
             logger.error(f"Text embedding failed: {e}")
@@ -1,28 +1,42 @@
 from src.ingestion.embedding.base_embed import TemplateEmbedder
-from src.ingestion.embedding.embedder import SentenceTransformerEmbedder
-from src.utils.config import settings
-
-_embedder_instance: TemplateEmbedder | None = None
+from src.utils.config import EmbeddingConfig
 
 
 def get_embedder() -> TemplateEmbedder:
-    global _embedder_instance
+    """The process's shared embedder, built once by the app context."""
+    from src.shared.context import get_app_context
 
-    if _embedder_instance is not None:
-        return _embedder_instance
+    return get_app_context().embedder
 
-    embed_settings = settings.embedding
 
-    if embed_settings.provider == "sentence_transformers":
-        _embedder_instance = SentenceTransformerEmbedder(
-            expected_dim=embed_settings.dimensions,
-            model_name=embed_settings.model_name,
-            batch_size=embed_settings.batch_size,
-            device=embed_settings.device,
+def build_embedder(config: EmbeddingConfig) -> TemplateEmbedder:
+    if config.provider == "sentence_transformers":
+        # Deferred: importing sentence-transformers pulls in torch
+        from src.ingestion.embedding.embedder import SentenceTransformerEmbedder
+
+        return SentenceTransformerEmbedder(
+            expected_dim=config.dimensions,
+            model_name=config.model_name,
+            batch_size=config.batch_size,
+            device=config.device,
+            normalize=config.normalize,
+        )
+
+    if config.provider == "onnx":
+        from src.ingestion.embedding.onnx_embedder import OnnxEmbedder
+
+        return OnnxEmbedder(
+            expected_dim=config.dimensions,
+            model_name=config.model_name,
+            batch_size=config.batch_size,
+            normalize=config.normalize,
+            quantization=config.onnx_quantization,
+            threads=config.onnx_threads,
+            onnx_dir=config.onnx_dir,
+            min_cosine=config.onnx_min_cosine,
         )
-        return _embedder_instance
 
-    raise ValueError(f"Unsupported embedder provider: {embed_settings.provider}")
+    raise ValueError(f"Unsupported embedder provider: {config.provider}")
 
 
 """def get_embedder():
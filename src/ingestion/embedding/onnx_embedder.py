@@ -0,0 +1,172 @@
+"""Sentence-transformers models run with ONNX Runtime on CPU.
+
+The first run exports the model to ONNX, optionally int8-quantized for the
+CPU's instruction set, and keeps it under ``embedding.onnx_dir``. Before it is
+kept, the export embeds a few check texts next to the PyTorch model and is
+rejected if any pair falls below ``embedding.onnx_min_cosine``. Later runs
+load the verified export directly.
+
+Tokenization, pooling and normalization stay with sentence-transformers, so
+the stored vectors are the PyTorch embedder's, within that tolerance.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from src.ingestion.embedding.base_embed import l2_normalize
+from src.ingestion.embedding.embedder import SentenceTransformerEmbedder
+from src.utils.logger import logger
+
+# Embedded by both runtimes before an export is kept: prose, code, maths, and
+# a text past the model's maximum sequence length
+CHECK_TEXTS = [
+    "A monad is a monoid in the category of endofunctors.",
+    "def fib(n):\n    return n if n < 2 else fib(n - 1) + fib(n - 2)",
+    "Theorem 3.2. Every bounded monotone sequence of real numbers converges.",
+    "The quick brown fox jumps over the lazy dog.",
+    "Gradient descent moves each parameter against the gradient of the loss. " * 40,
+]
+VERIFIED_FILE = "verified.json"
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+        import optimum.onnxruntime  # noqa: F401 - sentence-transformers' backend
+    except ImportError as e:
+        raise ImportError(
+            "embedding.provider 'onnx' needs ONNX Runtime: "
+            "uv sync --extra onnx (or pip install 'optimum[onnxruntime]')"
+        ) from e
+    return onnxruntime
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, which a container can restrict."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on macOS or Windows
+        return os.cpu_count() or 1
+
+
+def session_options(threads: int | None = None):
+    ort = _import_onnxruntime()
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # One batch at a time, so every thread goes to its matrix multiplications
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = threads or available_cpus()
+    options.inter_op_num_threads = 1
+    return options
+
+
+def cosine_agreement(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each row of a with the same row of b."""
+    a = l2_normalize(np.asarray(a, dtype=np.float32))
+    b = l2_normalize(np.asarray(b, dtype=np.float32))
+    return np.sum(a * b, axis=-1)
+
+
+class OnnxEmbedder(SentenceTransformerEmbedder):
+    def __init__(
+        self,
+        expected_dim: int,
+        model_name: str = "all-MiniLM-L6-v2",
+        batch_size: int = 32,
+        normalize: bool = False,
+        quantization: str = "none",
+        threads: int | None = None,
+        onnx_dir: Path = Path("models/onnx"),
+        min_cosine: float = 0.99,
+    ):
+        self.quantization = quantization
+        self.threads = threads
+        self.min_cosine = min_cosine
+        self.export_dir = onnx_dir / f"{model_name.replace('/', '--')}-{quantization}"
+        super().__init__(
+            expected_dim=expected_dim,
+            model_name=model_name,
+            batch_size=batch_size,
+            device="cpu",
+            normalize=normalize,
+        )
+
+    def _load_model(self, model_name: str, device: str) -> SentenceTransformer:
+        _import_onnxruntime()
+        verified = self.export_dir / VERIFIED_FILE
+        if not verified.exists():
+            self._export(model_name)
+        file_name = json.loads(verified.read_text())["file_name"]
+        logger.info(
+            "Running {} with ONNX Runtime on {} threads",
+            self.export_dir / file_name,
+            self.threads or available_cpus(),
+        )
+        return self._onnx_model(self.export_dir, file_name)
+
+    def _onnx_model(self, path: Path, file_name: str) -> SentenceTransformer:
+        return SentenceTransformer(
+            str(path),
+            device="cpu",
+            backend="onnx",
+            model_kwargs={
+                "file_name": file_name,
+                "provider": "CPUExecutionProvider",
+                "session_options": session_options(self.threads),
+            },
+        )
+
+    def _export(self, model_name: str) -> None:
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        logger.info("Exporting {} to ONNX in {}", model_name, self.export_dir)
+        # Built aside and renamed, so an interrupted export is never loaded
+        staging = self.export_dir.with_name(f"{self.export_dir.name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        SentenceTransformer(model_name, device="cpu", backend="onnx").save_pretrained(
+            str(staging)
+        )
+        pattern = "*.onnx"
+        if self.quantization != "none":
+            export_dynamic_quantized_onnx_model(
+                SentenceTransformer(str(staging), device="cpu", backend="onnx"),
+                self.quantization,
+                str(staging),
+            )
+            pattern = f"*qint8_{self.quantization}.onnx"
+        file_name = next(staging.rglob(pattern)).relative_to(staging).as_posix()
+
+        worst = self._check(model_name, self._onnx_model(staging, file_name))
+        if worst < self.min_cosine:
+            shutil.rmtree(staging)
+            raise ValueError(
+                f"ONNX export of {model_name} ({self.quantization}) drifts from "
+                f"PyTorch: cosine {worst:.4f} is below embedding.onnx_min_cosine "
+                f"{self.min_cosine}"
+            )
+        logger.info("ONNX export agrees with PyTorch: worst cosine {:.4f}", worst)
+
+        (staging / VERIFIED_FILE).write_text(
+            json.dumps(
+                {
+                    "model_name": model_name,
+                    "quantization": self.quantization,
+                    "file_name": file_name,
+                    "worst_cosine": worst,
+                }
+            )
+        )
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+        staging.rename(self.export_dir)
+
+    def _check(self, model_name: str, exported: SentenceTransformer) -> float:
+        """The lowest cosine between PyTorch's and the export's check embeddings."""
+        reference = SentenceTransformer(model_name, device="cpu")
+        expected = reference.encode(CHECK_TEXTS, convert_to_numpy=True)
+        actual = exported.encode(CHECK_TEXTS, convert_to_numpy=True)
+        return float(cosine_agreement(expected, actual).min())
@@ -3,34 +3,67 @@
 import hashlib
 import json
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
-from src.ingestion.chunking.get_chunker import get_chunker
-from src.ingestion.embedding.get_embbedder import get_embedder
-from src.ingestion.parsers.get_parser import get_parser
-from src.ingestion.vector_store.stores import get_ChromaStore
+from src.ingestion.chunking.base_chunker import BaseChunker
+from src.ingestion.parsers.base import BaseParser
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.ingestion.vector_store.get_store import get_vector_store
 from src.utils.config import LibreryConfig
 from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.utils.profiling import profiler
 
 
 class LibraryManager:
-    def __init__(self, config: LibreryConfig) -> None:
+    def __init__(
+        self,
+        config: LibreryConfig,
+        store: Optional[BaseVectorStore] = None,
+        parser: Optional[BaseParser] = None,
+        chunker: Optional[BaseChunker] = None,
+    ) -> None:
         self.books_dir = Path(config.books_paths)
         self.manifest_path = Path(config.manifest_path)
 
         logger.info("Initializing LibraryManager...")
 
-        self.store = get_ChromaStore()
-        self.parser = get_parser()
-        self.chunker = get_chunker()
+        self.store = store or get_vector_store()
+        self._parser = parser
+        self._chunker = chunker
 
         self.manifest = self._load_manifest()
         logger.info(f"Loaded manifest with {len(self.manifest)} entries")
 
-    def _load_manifest(self) -> Dict[str, str]:
+    # Parsing and chunking pull in docling and friends, so they are only
+    # built once a file actually needs indexing
+    @property
+    def parser(self) -> BaseParser:
+        if self._parser is None:
+            from src.ingestion.parsers.get_parser import get_parser
+
+            self._parser = get_parser()
+        return self._parser
+
+    @property
+    def chunker(self) -> BaseChunker:
+        if self._chunker is None:
+            from src.ingestion.chunking.get_chunker import get_chunker
+
+            self._chunker = get_chunker()
+        return self._chunker
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Optional[str]]]:
         if self.manifest_path.exists():
             try:
-                return json.loads(self.manifest_path.read_text())
+                manifest = json.loads(self.manifest_path.read_text())
+                # Older manifests mapped filename -> hash directly
+                return {
+                    name: entry
+                    if isinstance(entry, dict)
+                    else {"hash": entry, "parser": None}
+                    for name, entry in manifest.items()
+                }
             except Exception as e:
                 logger.warning(f"Failed to load manifest: {e}. Starting fresh.")
                 return {}
@@ -93,7 +126,7 @@ class LibraryManager:
                 logger.debug(f"Calculating hash for {name}...")
                 current_hash = self._calculate_hash(file_path)
 
-                if self.manifest.get(name) == current_hash:
+                if self.manifest.get(name, {}).get("hash") == current_hash:
                     logger.info(f"Skipping {name} (unchanged)")
                     continue
 
@@ -103,7 +136,8 @@ class LibraryManager:
                 else:
                     logger.info(f"New file: {name}")
 
-                self._index_file(file_path, name, current_hash)
+                with profiler.profile(name):
+                    self._index_file(file_path, name, current_hash)
 
             except Exception as e:
                 logger.error(f"Failed to process {name}: {e}")
@@ -111,18 +145,27 @@ class LibraryManager:
 
     def _index_file(self, file_path: Path, name: str, file_hash: str) -> None:
         logger.info(f"Parsing {name}...")
-        parsed_doc = self.parser.parse(file_path)
+        with metrics.timer("parse"):
+            parsed_doc = self.parser.parse(file_path)
         logger.info(f"Parsed {parsed_doc.metadata.nbr_pages} pages")
+        metrics.inc("pages_parsed", parsed_doc.metadata.nbr_pages)
 
         logger.info(f"Chunking {name}...")
-        chunked_doc = self.chunker.chunk(parsed_doc)
+        with metrics.timer("chunk"):
+            chunked_doc = self.chunker.chunk(parsed_doc)
         logger.info(f"Created {len(chunked_doc)} chunks")
+        metrics.inc("chunks_created", len(chunked_doc))
 
         logger.info(f"Storing {name}...")
-        self.store.ingest(chunks=chunked_doc)
+        with metrics.timer("ingest"):
+            self.store.ingest(chunks=chunked_doc)
         logger.info(f"Stored in vector DB")
+        metrics.inc("files_indexed")
 
-        self.manifest[name] = file_hash
+        self.manifest[name] = {
+            "hash": file_hash,
+            "parser": parsed_doc.metadata.parser,
+        }
         logger.success(f"Successfully indexed: {name}")
 
     def get_stats(self) -> Dict[str, int]:
@@ -1,10 +1,207 @@
 import os
+import re
 from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections.abc import Callable
+from typing import NamedTuple
 
-from src.shared.models import ParsedDoc
+from src.shared.models import Chapter, DocumentStructure, ParsedDoc, Section
+from src.utils.logger import logger
+
+# Markdown headers (# to ######) at the start of a line
+HEADER_PATTERN = re.compile(r"(#{1,6})\s+(.+)")
+# Deepest heading level that opens a chapter; deeper ones only open sections
+CHAPTER_LEVEL = 2
+# A "References"/"Bibliography" heading line, optionally as a markdown header
+REFERENCE_HEADING_PATTERN = re.compile(
+    r"#*\s*(?:references?|bibliography)\s*", re.IGNORECASE
+)
+# Bibliography entries: "- ...", "[12] ...", "12. ..."
+REFERENCE_ENTRY_PATTERN = re.compile(r"\s*[-\[\d]")
+
+
+class ScannedMarkdown(NamedTuple):
+    text: str
+    page_map: dict[int, tuple[int, int]]
+    headers: list[tuple[int, str, int]]  # (level, title, char position)
+    removed_references: int
 
 
 class BaseParser(ABC):
+    PAGE_BREAK = "<!-- PAGE_BREAK -->"
+
     @abstractmethod
     def parse(self, pdf_path: os.PathLike) -> ParsedDoc:
         pass
+
+    def _scan_markdown(
+        self, text_with_breaks: str, deduplicate_references: bool = True
+    ) -> ScannedMarkdown:
+        """Post-process exported markdown in one pass over its lines.
+
+        Strips page break placeholders while recording each page's char span,
+        drops every reference section after the first one and collects header
+        positions, all against the final text built with a single join.
+
+        A "References"/"Bibliography" line only opens a reference section when
+        bibliography entries follow it, so table-of-contents lines or headings
+        followed by prose are left alone.
+        """
+        parts: list[str] = []
+        page_map: dict[int, tuple[int, int]] = {}
+        headers: list[tuple[int, str, int]] = []
+        pos = 0
+        at_line_start = True
+        seen_references = False
+        dropping = False
+        held_blanks: list[str] = []
+        removed = 0
+
+        lines: list[str] = []
+        # Index just past each page's last line
+        page_ends: list[int] = []
+        for page_content in text_with_breaks.split(self.PAGE_BREAK):
+            lines.extend(page_content.splitlines(keepends=True))
+            page_ends.append(len(lines))
+
+        first_line = 0
+        for page_num, page_end in enumerate(page_ends, start=1):
+            page_start = pos
+            for line_idx in range(first_line, page_end):
+                line = lines[line_idx]
+                if deduplicate_references and at_line_start:
+                    stripped = line.strip()
+                    if dropping:
+                        # Blank lines inside a dropped section are only kept if
+                        # the section ends right after them
+                        if not stripped:
+                            held_blanks.append(line)
+                            continue
+                        if REFERENCE_ENTRY_PATTERN.match(line):
+                            held_blanks.clear()
+                            continue
+                        dropping = False
+                        for blank in held_blanks:
+                            parts.append(blank)
+                            pos += len(blank)
+                        held_blanks.clear()
+                    if REFERENCE_HEADING_PATTERN.fullmatch(
+                        stripped
+                    ) and self._entries_follow(lines, line_idx):
+                        if seen_references:
+                            dropping = True
+                            removed += 1
+                            continue
+                        seen_references = True
+
+                if at_line_start and (match := HEADER_PATTERN.match(line)):
+                    headers.append((len(match.group(1)), match.group(2).strip(), pos))
+
+                parts.append(line)
+                pos += len(line)
+                at_line_start = line.endswith("\n")
+            page_map[page_num] = (page_start, pos)
+            first_line = page_end
+
+        return ScannedMarkdown(
+            text="".join(parts),
+            page_map=page_map,
+            headers=headers,
+            removed_references=removed,
+        )
+
+    @staticmethod
+    def _entries_follow(lines: list[str], line_idx: int) -> bool:
+        """Whether the next non-blank line after line_idx is a bibliography entry."""
+        # Indexed rather than sliced: only the lines up to the next non-blank
+        # one are looked at, not every line before line_idx
+        for idx in range(line_idx + 1, len(lines)):
+            if lines[idx].strip():
+                return bool(REFERENCE_ENTRY_PATTERN.match(lines[idx]))
+        return False
+
+    @staticmethod
+    def _page_lookup(page_map: dict[int, tuple[int, int]]) -> Callable[[int], int]:
+        """Binary-search page finder; positions outside every page map to the last."""
+        pages = sorted(page_map.items(), key=lambda item: (item[1][0], item[0]))
+        starts = [start for _, (start, _) in pages]
+        last_page = max(page_map.keys())
+
+        def find(char_pos: int) -> int:
+            # Empty pages share their start with the next page, so the right-most
+            # page starting at or before char_pos is the only candidate
+            idx = bisect_right(starts, char_pos) - 1
+            if idx >= 0:
+                page_num, (start, end) = pages[idx]
+                if start <= char_pos < end:
+                    return page_num
+            return last_page
+
+        return find
+
+    def _build_structure(
+        self,
+        headers: list[tuple[int, str, int]],
+        text_length: int,
+        page_map: dict[int, tuple[int, int]],
+    ) -> DocumentStructure:
+        """Build chunkable chapters plus the heading tree.
+
+        Chapters are the spans between consecutive # and ## headers, and each
+        points at the section its header opens. Sections keep every heading,
+        deeper ones included, in text order with a parent pointer.
+        """
+        sections: list[Section] = []
+        # Indices of the open ancestors, shallowest first
+        stack: list[int] = []
+        for level, title, char_start in headers:
+            while stack and sections[stack[-1]].level >= level:
+                stack.pop()
+            sections.append(
+                Section(
+                    level=level,
+                    title=title,
+                    parent=stack[-1] if stack else None,
+                    char_start=char_start,
+                )
+            )
+            stack.append(len(sections) - 1)
+
+        openers = [
+            (index, headers[index])
+            for index, section in enumerate(sections)
+            if section.level <= CHAPTER_LEVEL
+        ]
+        if not openers:
+            # Fallback: create single chapter for entire document
+            logger.warning("No # or ## headers found, creating fallback chapter")
+            return DocumentStructure(
+                chapters=[
+                    Chapter(
+                        number=1,
+                        title="Full Document",
+                        page_range=(1, len(page_map)),
+                        char_span=(0, text_length),
+                    )
+                ],
+                sections=sections,
+            )
+
+        find_page = self._page_lookup(page_map)
+        chapters: list[Chapter] = []
+        for i, (section, (_, title, char_start)) in enumerate(openers, start=1):
+            # char_end is either the next chapter's start or end of document
+            char_end = openers[i][1][2] if i < len(openers) else text_length
+
+            chapters.append(
+                Chapter(
+                    number=i,
+                    title=title,
+                    section=section,
+                    page_range=(find_page(char_start), find_page(char_end - 1)),
+                    char_span=(char_start, char_end),
+                )
+            )
+
+        logger.debug(f"Found {len(chapters)} chapters")
+        return DocumentStructure(chapters=chapters, sections=sections)
@@ -0,0 +1,116 @@
+"""Cheap per-page complexity estimation used to route books between parsers."""
+
+import os
+
+import pymupdf
+from pydantic import BaseModel, Field
+
+from src.utils.logger import logger
+
+MATH_FONT_MARKERS = ("cmmi", "cmsy", "cmex", "msbm", "math", "symbol", "stix")
+# Mathematical operators, arrows, letter-like symbols and alphanumeric math
+MATH_CHAR_RANGES = (
+    (0x2190, 0x22FF),
+    (0x27C0, 0x27EF),
+    (0x2980, 0x2AFF),
+    (0x1D400, 0x1D7FF),
+)
+MIN_TEXT_CHARS = 50
+SCANNED_IMAGE_COVERAGE = 0.5
+COMPLEX_MATH_RATIO = 0.02
+FRONT_MATTER_MAX_PAGES = 20
+
+
+class PageComplexity(BaseModel):
+    page_number: int = Field(ge=1)
+    text_chars: int = Field(default=0, ge=0)
+    math_ratio: float = Field(default=0.0, ge=0)
+    image_coverage: float = Field(default=0.0, ge=0)
+    has_table: bool = Field(default=False)
+
+    @property
+    def is_scanned(self) -> bool:
+        return (
+            self.text_chars < MIN_TEXT_CHARS
+            and self.image_coverage >= SCANNED_IMAGE_COVERAGE
+        )
+
+    @property
+    def is_complex(self) -> bool:
+        return (
+            self.has_table or self.is_scanned or self.math_ratio >= COMPLEX_MATH_RATIO
+        )
+
+
+def _is_math_char(char: str) -> bool:
+    code = ord(char)
+    return any(low <= code <= high for low, high in MATH_CHAR_RANGES)
+
+
+def sample_page_numbers(page_count: int, sample_size: int) -> list[int]:
+    """Evenly spaced 0-based indices of interior pages.
+
+    Front matter (cover, title page, table of contents) and the back cover are
+    left out: covers are image-only and would always count as scanned pages.
+    """
+    front = min(max(page_count // 10, 1), FRONT_MATTER_MAX_PAGES)
+    interior = range(front, page_count - 1)
+    if len(interior) < 1:
+        return list(range(page_count))
+    if len(interior) <= sample_size:
+        return list(interior)
+    step = len(interior) / sample_size
+    return [interior[int((i + 0.5) * step)] for i in range(sample_size)]
+
+
+def profile_page(page: pymupdf.Page, detect_tables: bool = True) -> PageComplexity:
+    page_area = abs(page.rect) or 1.0
+    text_chars = 0
+    math_chars = 0
+    image_area = 0.0
+
+    # Text-only extraction: image blocks would carry the raw image bytes
+    for block in page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                text = span["text"].strip()
+                text_chars += len(text)
+                if any(marker in span["font"].lower() for marker in MATH_FONT_MARKERS):
+                    math_chars += len(text)
+                else:
+                    math_chars += sum(1 for char in text if _is_math_char(char))
+
+    for image in page.get_image_info():
+        image_area += abs(pymupdf.Rect(image["bbox"]) & page.rect)
+
+    has_table = False
+    if detect_tables:
+        try:
+            has_table = bool(page.find_tables().tables)
+        except (RuntimeError, ValueError) as e:
+            logger.debug(f"Table detection failed on page {page.number + 1}: {e}")
+
+    return PageComplexity(
+        page_number=page.number + 1,
+        text_chars=text_chars,
+        math_ratio=math_chars / text_chars if text_chars else 0.0,
+        image_coverage=min(image_area / page_area, 1.0),
+        has_table=has_table,
+    )
+
+
+def estimate_complexity(
+    pdf_path: os.PathLike, sample_size: int, detect_tables: bool = True
+) -> list[PageComplexity]:
+    with pymupdf.open(pdf_path) as doc:
+        return [
+            profile_page(doc[page_idx], detect_tables=detect_tables)
+            for page_idx in sample_page_numbers(doc.page_count, sample_size)
+        ]
+
+
+def is_complex_document(profiles: list[PageComplexity], complex_ratio: float) -> bool:
+    if not profiles:
+        return True
+    complex_pages = sum(1 for profile in profiles if profile.is_complex)
+    return complex_pages / len(profiles) >= complex_ratio
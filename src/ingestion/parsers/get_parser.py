@@ -1,12 +1,35 @@
 from src.ingestion.parsers.base import BaseParser
-from src.ingestion.parsers.parsers import DoclingParser, MarkerParser
+from src.ingestion.parsers.parsers import (
+    AutoParser,
+    DoclingParser,
+    MarkerParser,
+    PyMuPDFParser,
+)
 from src.utils.config import settings
 
 
+def _docling_parser() -> DoclingParser:
+    return DoclingParser(
+        parallel_min_pages=settings.parsing.parallel_min_pages,
+        parallel_workers=settings.parsing.parallel_workers,
+        parallel_range_pages=settings.parsing.parallel_range_pages,
+    )
+
+
 def get_parser() -> BaseParser:
     name = settings.parsing.parser
     if name == "docling":
-        return DoclingParser()
+        return _docling_parser()
     elif name == "marker":
         return MarkerParser()
+    elif name == "pymupdf":
+        return PyMuPDFParser(settings.parsing.heading_font_threshold)
+    elif name == "auto":
+        return AutoParser(
+            fast=PyMuPDFParser(settings.parsing.heading_font_threshold),
+            accurate=_docling_parser(),
+            sample_pages=settings.parsing.auto_sample_pages,
+            complex_ratio=settings.parsing.auto_complex_ratio,
+            detect_tables=settings.parsing.extract_tables,
+        )
     raise ValueError(f"Unknown parser: {name}")
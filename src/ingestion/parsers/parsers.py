@@ -1,69 +1,119 @@
+import multiprocessing
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import pymupdf
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions, TableStructureOptions
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling_core.types.doc.document import DoclingDocument
 
-from src.shared.models import Chapter, DocumentStructure, MetaData, ParsedDoc
+from src.shared.models import MetaData, ParsedDoc
 from src.utils.logger import logger
 
 from .base import BaseParser
+from .complexity import estimate_complexity, is_complex_document
+
+# Docling renders the page break placeholder as its own markdown block
+PAGE_SEPARATOR = f"\n\n{BaseParser.PAGE_BREAK}\n\n"
+
+_worker_converter: DocumentConverter | None = None
+
+
+def _build_docling_converter(num_threads: int | None = None) -> DocumentConverter:
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.do_ocr = False
+    pipeline_options.do_formula_enrichment = True
+    pipeline_options.do_table_structure = True
+    pipeline_options.table_structure_options = TableStructureOptions(
+        do_cell_matching=False
+    )
+    if num_threads is not None:
+        pipeline_options.accelerator_options.num_threads = num_threads
+
+    logger.debug("Initializing DocumentConverter with pipeline options")
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
+        }
+    )
+
+
+def _convert_page_range(
+    pdf_path: str, page_range: tuple[int, int], num_threads: int
+) -> str:
+    """Process-pool entry point: convert one page range to markdown.
+
+    The converter (and its layout/table models) is built once per worker
+    process and reused for every range that worker picks up.
+    """
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = _build_docling_converter(num_threads)
+
+    result = _worker_converter.convert(pdf_path, page_range=page_range)
+    doc = result.document
+    # Export page by page (Docling keeps source page numbers) instead of relying
+    # on placeholders, which are only emitted between pages that carry content:
+    # an empty page anywhere in the range would shift every later page
+    start, end = page_range
+    return PAGE_SEPARATOR.join(
+        doc.export_to_markdown(page_no=page_no) for page_no in range(start, end + 1)
+    )
 
 
 class DoclingParser(BaseParser):
-    def __init__(self) -> None:
-        self.PAGE_BREAK = "<!-- PAGE_BREAK -->"
+    def __init__(
+        self,
+        parallel_min_pages: int = 300,
+        parallel_workers: int = 4,
+        parallel_range_pages: int = 50,
+    ) -> None:
+        self.parallel_min_pages = parallel_min_pages
+        self.parallel_workers = parallel_workers
+        self.parallel_range_pages = parallel_range_pages
 
     def parse(self, pdf_path: os.PathLike) -> ParsedDoc:
         try:
             pdf_path = Path(pdf_path)
             logger.info(f"Starting to parse PDF: {pdf_path}")
 
-            pipeline_options = PdfPipelineOptions()
-            pipeline_options.do_ocr = False
-            pipeline_options.do_formula_enrichment = True
-            pipeline_options.do_table_structure = True
-            pipeline_options.table_structure_options = TableStructureOptions(
-                do_cell_matching=False
-            )
+            page_count = self._count_pages(pdf_path)
+            if self.parallel_workers > 1 and page_count >= self.parallel_min_pages:
+                text = self._convert_parallel(pdf_path, page_count)
+                metadata = MetaData(
+                    title=pdf_path.stem, nbr_pages=page_count, parser="docling"
+                )
+            else:
+                doc_converter = _build_docling_converter()
 
-            logger.debug("Initializing DocumentConverter with pipeline options")
-            doc_converter = DocumentConverter(
-                format_options={
-                    InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-                }
-            )
+                logger.debug("Converting document...")
+                result = doc_converter.convert(pdf_path)
+                doc = result.document
+                logger.info(f"Document converted successfully: {len(doc.pages)} pages")
+
+                logger.debug("Extracting metadata...")
+                metadata = self.extract_metadata(doc=doc)
 
-            logger.debug("Converting document...")
-            result = doc_converter.convert(pdf_path)
-            doc = result.document
-            logger.info(f"Document converted successfully: {len(doc.pages)} pages")
+                logger.debug("Exporting to markdown...")
+                text = doc.export_to_markdown(page_break_placeholder=self.PAGE_BREAK)
 
-            logger.debug("Extracting metadata...")
-            metadata = self.extract_metadata(doc=doc)
             logger.debug(
                 f"Metadata extracted: title='{metadata.title}', pages={metadata.nbr_pages}"
             )
-
-            logger.debug("Exporting to markdown...")
-            text = doc.export_to_markdown(page_break_placeholder=self.PAGE_BREAK)
             logger.debug(f"Markdown exported: {len(text)} characters")
 
-            logger.debug("Removing duplicate references...")
-            text = self._deduplicate_references(text)
-
-            logger.debug("Building page map...")
-            page_map = self._build_page_map(text)
-            logger.debug(f"Page map built: {len(page_map)} pages")
-
-            text = text.replace(self.PAGE_BREAK, "")
-
-            logger.debug("Extracting document structure...")
-            structure = self._extract_structure_from_markdown(
-                text=text, page_map=page_map
+            logger.debug("Scanning markdown...")
+            scanned = self._scan_markdown(text)
+            text, page_map = scanned.text, scanned.page_map
+            logger.debug(
+                f"Page map built: {len(page_map)} pages, removed "
+                f"{scanned.removed_references} duplicate reference section(s)"
             )
+
+            structure = self._build_structure(scanned.headers, len(text), page_map)
             logger.info(f"Structure extracted: {len(structure.chapters)} chapters")
 
             logger.success(f"Successfully parsed {pdf_path.name}")
@@ -77,40 +127,57 @@ class DoclingParser(BaseParser):
                 f"the pdf is not in a good shape, the parser gives this: {e}"
             )
 
+    def _count_pages(self, pdf_path: Path) -> int:
+        try:
+            with pymupdf.open(pdf_path) as doc:
+                return doc.page_count
+        except (RuntimeError, OSError) as e:
+            logger.debug(f"Could not count pages of {pdf_path}: {e}")
+            return 0
+
+    def _page_ranges(self, page_count: int) -> list[tuple[int, int]]:
+        """Split 1..page_count into inclusive ranges of parallel_range_pages."""
+        step = max(self.parallel_range_pages, 1)
+        return [
+            (start, min(start + step - 1, page_count))
+            for start in range(1, page_count + 1, step)
+        ]
+
+    def _convert_parallel(self, pdf_path: Path, page_count: int) -> str:
+        """Convert page ranges in a process pool and join them in page order.
+
+        Every range comes back with exactly one placeholder between its pages,
+        so joining ranges with another placeholder block yields the same layout
+        as a single conversion: page_map offsets and header positions computed on
+        the joined text are global.
+        """
+        ranges = self._page_ranges(page_count)
+        workers = min(self.parallel_workers, len(ranges))
+        num_threads = max((os.cpu_count() or 1) // workers, 1)
+        logger.info(
+            f"Converting {page_count} pages in {len(ranges)} ranges "
+            f"with {workers} workers ({num_threads} threads each)"
+        )
+
+        # spawn: forking a process that already holds torch threads can deadlock
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            parts = list(
+                pool.map(
+                    _convert_page_range,
+                    [str(pdf_path)] * len(ranges),
+                    ranges,
+                    [num_threads] * len(ranges),
+                )
+            )
+        return PAGE_SEPARATOR.join(parts)
+
     def extract_metadata(self, doc: DoclingDocument) -> MetaData:
         title = doc.name
         nbr_pages = len(doc.pages)
-        return MetaData(title=title or "Unknown", nbr_pages=nbr_pages)
-
-    def _build_page_map(self, text_with_breaks: str) -> dict[int, tuple[int, int]]:
-        page_map: dict[int, tuple[int, int]] = {}
-        pages = text_with_breaks.split(self.PAGE_BREAK)
-
-        current_pos = 0
-        for page_num, page_content in enumerate(pages, start=1):
-            page_len = len(page_content)
-            page_map[page_num] = (current_pos, current_pos + page_len)
-            current_pos += page_len
-
-        return page_map
-    def _deduplicate_references(self, text: str) -> str:
-        """Remove duplicate reference sections, keeping only the first occurrence"""
-        import re
-        
-        ref_pattern = r'(?:^|\n)((?:References?|Bibliography|REFERENCES?|BIBLIOGRAPHY)\s*\n(?:[-\[\d].*?\n?)+)'
-        
-        matches = list(re.finditer(ref_pattern, text, re.MULTILINE | re.IGNORECASE))
-        
-        if len(matches) <= 1:
-            return text
-        
-        # Keep only the first reference section, remove all others
-        result = text
-        for match in reversed(matches[1:]):  # Process in reverse to maintain positions
-            result = result[:match.start()] + result[match.end():]
-        
-        logger.debug(f"Removed {len(matches) - 1} duplicate reference section(s)")
-        return result
+        return MetaData(title=title or "Unknown", nbr_pages=nbr_pages, parser="docling")
+
     # def _build_page_map(self, doc: DoclingDocument) -> dict[int, tuple[int, int]]:
     #     page_map: dict[int, tuple[int, int]] = {}
     #     min_char, max_char = 0, 0
@@ -130,69 +197,6 @@ class DoclingParser(BaseParser):
     #     page_map[current_page] = (min_char, max_char)
     #     return page_map
 
-    def _find_page_for_char(
-        self, char_pos: int, page_map: dict[int, tuple[int, int]]
-    ) -> int:
-        for page_num, (start, end) in page_map.items():
-            if start <= char_pos < end:
-                return page_num
-        return max(page_map.keys())
-
-    def _extract_structure_from_markdown(
-        self, text: str, page_map: dict[int, tuple[int, int]]
-    ) -> DocumentStructure:
-        """Extract chapter structure by finding headers in the markdown text."""
-        import re
-
-        chapters: list[Chapter] = []
-
-        # Find all markdown headers (# or ## at start of line)
-        # Adjust the pattern based on what Docling actually outputs
-        header_pattern = r"^#{1,2}\s+(.+)$"
-
-        matches = []
-        for match in re.finditer(header_pattern, text, re.MULTILINE):
-            header_text = match.group(1).strip()
-            char_position = match.start()
-            matches.append((header_text, char_position))
-
-        if not matches:
-            # Fallback: create single chapter for entire document
-            logger.warning("No markdown headers found, creating fallback chapter")
-            return DocumentStructure(
-                chapters=[
-                    Chapter(
-                        number=1,
-                        title="Full Document",
-                        page_range=(1, len(page_map)),
-                        char_span=(0, len(text)),
-                    )
-                ]
-            )
-
-        # Build chapters from the matches
-        for i, (title, char_start) in enumerate(matches, start=1):
-            # char_end is either the next header's start or end of document
-            char_end = matches[i][1] if i < len(matches) else len(text)
-
-            # Find which pages this character span covers
-            page_start = self._find_page_for_char(char_start, page_map)
-            page_end = self._find_page_for_char(char_end - 1, page_map)
-
-            chapters.append(
-                Chapter(
-                    number=i,
-                    title=title,
-                    page_range=(page_start, page_end),
-                    char_span=(char_start, char_end),
-                )
-            )
-            logger.debug(
-                f"Found chapter {i}: '{title}' (chars {char_start}-{char_end})"
-            )
-
-        return DocumentStructure(chapters=chapters)
-
     # def _extract_structure(self, doc: DoclingDocument) -> DocumentStructure:
     #     chapters: list[Chapter] = []
     #     current_chapter_num = 0
@@ -250,6 +254,154 @@ class DoclingParser(BaseParser):
     #     return DocumentStructure(chapters=chapters)
 
 
+class PyMuPDFParser(BaseParser):
+    """Fast text-layer parser for born-digital, prose-only books.
+
+    Headings are recovered from font sizes: any line set noticeably larger than
+    the body text becomes a markdown header, ranked by size.
+    """
+
+    def __init__(self, heading_font_threshold: float = 1.2) -> None:
+        self.heading_font_threshold = heading_font_threshold
+
+    def parse(self, pdf_path: os.PathLike) -> ParsedDoc:
+        try:
+            pdf_path = Path(pdf_path)
+            logger.info(f"Starting to parse PDF with PyMuPDF: {pdf_path}")
+
+            # Two streaming passes keep a single page's text blocks in memory:
+            # font statistics first, then markdown with known heading sizes
+            with pymupdf.open(pdf_path) as doc:
+                page_count = doc.page_count
+                logger.info(f"Document opened: {page_count} pages")
+                size_weights: Counter[float] = Counter()
+                for page in doc:
+                    self._count_font_sizes(self._page_blocks(page), size_weights)
+                heading_levels = self._heading_levels(size_weights)
+                text = self.PAGE_BREAK.join(
+                    self._page_to_markdown(self._page_blocks(page), heading_levels)
+                    for page in doc
+                )
+            metadata = MetaData(
+                title=pdf_path.stem, nbr_pages=page_count, parser="pymupdf"
+            )
+            logger.debug(f"Markdown built: {len(text)} characters")
+
+            scanned = self._scan_markdown(text)
+            text, page_map = scanned.text, scanned.page_map
+
+            structure = self._build_structure(scanned.headers, len(text), page_map)
+            logger.info(f"Structure extracted: {len(structure.chapters)} chapters")
+
+            logger.success(f"Successfully parsed {pdf_path.name}")
+            return ParsedDoc(
+                text=text, metadata=metadata, structure=structure, page_map=page_map
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to parse {pdf_path}: {e}")
+            raise RuntimeError(
+                f"the pdf is not in a good shape, the parser gives this: {e}"
+            )
+
+    @staticmethod
+    def _line_size(line: dict) -> float:
+        return round(max((span["size"] for span in line["spans"]), default=0.0), 1)
+
+    @staticmethod
+    def _line_text(line: dict) -> str:
+        return "".join(span["text"] for span in line["spans"]).strip()
+
+    @staticmethod
+    def _page_blocks(page: pymupdf.Page) -> list[dict]:
+        # Text-only flags: image blocks would carry the raw image bytes
+        return page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]
+
+    def _count_font_sizes(
+        self, blocks: list[dict], size_weights: Counter[float]
+    ) -> None:
+        for block in blocks:
+            for line in block.get("lines", []):
+                size_weights[self._line_size(line)] += len(self._line_text(line))
+
+    def _heading_levels(self, size_weights: Counter[float]) -> dict[float, int]:
+        """Map heading font sizes to markdown levels (largest size -> level 1)."""
+        if not size_weights:
+            return {}
+        body_size = size_weights.most_common(1)[0][0]
+        heading_sizes = sorted(
+            (
+                size
+                for size in size_weights
+                if size >= body_size * self.heading_font_threshold
+            ),
+            reverse=True,
+        )
+        return {size: min(level, 6) for level, size in enumerate(heading_sizes, 1)}
+
+    def _page_to_markdown(
+        self, blocks: list[dict], heading_levels: dict[float, int]
+    ) -> str:
+        parts: list[str] = []
+        for block in blocks:
+            lines = [line for line in block.get("lines", []) if self._line_text(line)]
+            if not lines:
+                continue
+            text = " ".join(self._line_text(line) for line in lines)
+            levels = {heading_levels.get(self._line_size(line)) for line in lines}
+            if len(levels) == 1 and None not in levels:
+                parts.append(f"{'#' * levels.pop()} {text}")
+            else:
+                parts.append(text)
+        return "\n\n".join(parts) + "\n\n" if parts else ""
+
+
+class AutoParser(BaseParser):
+    """Routes each book to the fast or the accurate parser.
+
+    A handful of evenly spaced pages are profiled with PyMuPDF (tables, math
+    fonts/symbols, image-only scans); when enough of them look complex the book
+    goes to the accurate parser, otherwise to the fast one.
+    """
+
+    def __init__(
+        self,
+        fast: BaseParser,
+        accurate: BaseParser,
+        sample_pages: int = 8,
+        complex_ratio: float = 0.25,
+        detect_tables: bool = True,
+    ) -> None:
+        self.fast = fast
+        self.accurate = accurate
+        self.sample_pages = sample_pages
+        self.complex_ratio = complex_ratio
+        self.detect_tables = detect_tables
+
+    def choose(self, pdf_path: os.PathLike) -> BaseParser:
+        try:
+            profiles = estimate_complexity(
+                pdf_path, self.sample_pages, detect_tables=self.detect_tables
+            )
+        except (RuntimeError, OSError, ValueError) as e:
+            logger.warning(f"Complexity sampling failed for {pdf_path}: {e}")
+            return self.accurate
+
+        complex_pages = [p.page_number for p in profiles if p.is_complex]
+        logger.info(
+            f"Sampled {len(profiles)} pages of {Path(pdf_path).name}, "
+            f"complex: {complex_pages or 'none'}"
+        )
+        if is_complex_document(profiles, self.complex_ratio):
+            return self.accurate
+        return self.fast
+
+    def parse(self, pdf_path: os.PathLike) -> ParsedDoc:
+        parser = self.choose(pdf_path)
+        logger.info(f"Using {type(parser).__name__} for {Path(pdf_path).name}")
+        return parser.parse(pdf_path)
+
+
 class MarkerParser(BaseParser):
     def parse(self, pdf_path: os.PathLike) -> ParsedDoc:
         return super().parse(pdf_path)
@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from src.retrieval.filters import SearchFilter
+from src.shared.models import Chunk, SearchResult
+
+
+class BaseVectorStore(ABC):
+    @abstractmethod
+    def ingest(self, chunks: list[Chunk]) -> None:
+        pass
+
+    @abstractmethod
+    def query(
+        self,
+        sentences: list[str],
+        n_result: int,
+        filters: SearchFilter | None = None,
+    ) -> list[SearchResult]:
+        """Deduplicated results for all sentences, nearest (lowest score) first."""
+
+    def query_batch(
+        self,
+        sentences: list[str],
+        n_result: int,
+        filters: SearchFilter | None = None,
+    ) -> list[list[SearchResult]]:
+        """The results of each sentence on its own, nearest first.
+
+        Stores override this to embed and search all sentences in one go.
+        """
+        return [self.query([sentence], n_result, filters) for sentence in sentences]
+
+    @abstractmethod
+    def delete_by_filename(self, filename: str) -> None:
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @staticmethod
+    def source_titles(filename: str) -> list[str]:
+        """source_doc_title values a book file may have been indexed under.
+
+        Parsers title books after the file stem; the full filename is kept for
+        chunks written by parsers that used it.
+        """
+        stem = Path(filename).stem
+        return [stem] if stem == filename else [stem, filename]
@@ -0,0 +1,18 @@
+from chromadb.api import ClientAPI
+
+from src.ingestion.embedding.base_embed import TemplateEmbedder
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.ingestion.vector_store.numpy_store import NumpyStore
+from src.ingestion.vector_store.stores import ChromaStore
+from src.utils.config import settings
+
+
+def get_vector_store(
+    client: ClientAPI | None = None, embedder: TemplateEmbedder | None = None
+) -> BaseVectorStore:
+    backend = settings.vector_store.backend
+    if backend == "chroma":
+        return ChromaStore(settings.vector_store, client=client, embedder=embedder)
+    elif backend == "numpy":
+        return NumpyStore(settings.vector_store, embedder=embedder)
+    raise ValueError(f"Unknown vector store backend: {backend}")
@@ -0,0 +1,62 @@
+"""Flat, natively typed chunk metadata as stored next to the vectors."""
+
+from collections.abc import Mapping
+from typing import Any
+from uuid import UUID
+
+from src.retrieval.filters import page_fields, section_fields
+from src.shared.models import SECTION_PATH_SEPARATOR, ChunkMetadata, SearchResult
+
+
+def to_store_metadata(metadata: ChunkMetadata) -> dict[str, Any]:
+    """Scalar fields only, with spans as ints and one field per heading depth."""
+    return {
+        "source_doc_title": metadata.source_doc_title,
+        "chapter_name": metadata.chapter_name,
+        "section_path": SECTION_PATH_SEPARATOR.join(metadata.section_path),
+        "chunk_id": str(metadata.chunk_id),
+        **page_fields(metadata.page_range),
+        "char_start": metadata.char_span[0],
+        "char_end": metadata.char_span[1],
+        **section_fields(metadata.section_path),
+    }
+
+
+def from_store_metadata(
+    meta: Mapping[str, Any], validate: bool = False
+) -> ChunkMetadata:
+    """Rebuild ChunkMetadata from stored fields.
+
+    Store data was validated on the way in, so by default the model is built
+    with model_construct, skipping pydantic validation entirely. Entries
+    written before spans were stored natively ("a-b" strings) always go
+    through full validation.
+    """
+    if "char_start" not in meta:
+        return ChunkMetadata.model_validate(meta)
+
+    section_path = meta.get("section_path")
+    fields = {
+        "source_doc_title": meta["source_doc_title"],
+        "chapter_name": meta["chapter_name"],
+        "section_path": (
+            section_path.split(SECTION_PATH_SEPARATOR) if section_path else []
+        ),
+        "page_range": (meta["page_start"], meta["page_end"]),
+        "char_span": (meta["char_start"], meta["char_end"]),
+        "chunk_id": meta["chunk_id"],
+    }
+    if validate:
+        return ChunkMetadata.model_validate(fields)
+    fields["chunk_id"] = UUID(meta["chunk_id"])
+    return ChunkMetadata.model_construct(**fields)
+
+
+def build_search_result(
+    content: str, meta: Mapping[str, Any], score: float, validate: bool = False
+) -> SearchResult:
+    """A SearchResult for a stored chunk, validated only when asked to."""
+    metadata = from_store_metadata(meta, validate=validate)
+    if validate:
+        return SearchResult(content=content, metadata=metadata, score=score)
+    return SearchResult.model_construct(content=content, metadata=metadata, score=score)
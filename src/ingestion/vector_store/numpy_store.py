@@ -0,0 +1,616 @@
+"""In-process vector store backed by a memory-mapped float32 matrix.
+
+Vectors live in one raw float32 file that is memory-mapped for search, with
+the documents and flat metadata in a JSON lines file next to it, row for
+row. Search is exact (blocked NumPy matrix products) unless a FAISS HNSW or
+IVF index is configured; filtered searches always scan their candidate rows.
+With quantization enabled, the scan runs over int8 or binary codes held in
+memory and only a shortlist is rescored from the float32 file.
+"""
+
+import json
+import os
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from src.ingestion.embedding.base_embed import TemplateEmbedder, l2_normalize
+from src.ingestion.embedding.get_embbedder import get_embedder
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.ingestion.vector_store.metadata import (
+    build_search_result,
+    from_store_metadata,
+    to_store_metadata,
+)
+from src.ingestion.vector_store.quantization import (
+    dequantize_int8,
+    hamming_distances,
+    quantize_binary,
+    quantize_int8,
+)
+from src.retrieval.filters import SearchFilter
+from src.shared.models import Chunk, SearchResult
+from src.utils.config import VectorStoreConfig
+from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
+
+VECTORS_FILE = "vectors.f32"
+CHUNKS_FILE = "chunks.jsonl"
+STORE_FILE = "store.json"
+INDEX_FILE = "index.faiss"
+CODES_FILE = "codes.bin"
+SCALES_FILE = "scales.f32"
+# Rows scored per step of an exact search, bounding temporary memory
+SCAN_BLOCK_ROWS = 65_536
+# FAISS recommends at least ~39 training points per IVF cell
+IVF_MIN_POINTS_PER_CELL = 39
+IVF_TRAINING_POINTS_PER_CELL = 256
+
+
+def _import_faiss():
+    try:
+        import faiss
+    except ImportError as e:
+        raise ImportError(
+            "vector_store.numpy_index 'hnsw' and 'ivf' need FAISS: "
+            "uv sync --extra faiss (or pip install faiss-cpu)"
+        ) from e
+    return faiss
+
+
+class NumpyStore(BaseVectorStore):
+    def __init__(
+        self,
+        config: VectorStoreConfig,
+        embedder: TemplateEmbedder | None = None,
+        load_embedder: Callable[[], TemplateEmbedder] | None = None,
+    ) -> None:
+        self.config = config
+        self.path = Path(config.numpy_path)
+        self.space = config.distance
+        self.quantization = config.quantization
+        self.validate_results = config.validate_results
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._load()
+        logger.info(f"Loaded NumPy store with {self.count()} chunks from {self.path}")
+        self._embedder = embedder
+        self._load_embedder = load_embedder or get_embedder
+
+    @property
+    def embedder(self) -> TemplateEmbedder:
+        # Loaded on first use: searching with ready-made vectors needs no model
+        if self._embedder is None:
+            logger.info("getting the embedder")
+            self._embedder = self._load_embedder()
+        return self._embedder
+
+    def _load(self) -> None:
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[dict[str, Any]] = []
+        chunks_file = self.path / CHUNKS_FILE
+        if chunks_file.exists():
+            with chunks_file.open(encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.ids.append(record["id"])
+                    self.documents.append(record["document"])
+                    self.metadatas.append(record["metadata"])
+
+        store_file = self.path / STORE_FILE
+        store_info = json.loads(store_file.read_text()) if store_file.exists() else {}
+        self.dim: int | None = store_info.get("dim")
+        self._columns_stale = True
+        self.vectors = self._map_vectors()
+        self._index = None
+        self._load_codes(store_info.get("quantization", "none"))
+
+    def _write_store_info(self) -> None:
+        (self.path / STORE_FILE).write_text(
+            json.dumps({"dim": self.dim, "quantization": self.quantization})
+        )
+
+    def _encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        if self.quantization == "int8":
+            return quantize_int8(vectors)
+        return quantize_binary(vectors), None
+
+    def _load_codes(self, stored_mode: str) -> None:
+        """Read the quantized codes, re-encoding them if the mode changed."""
+        self.codes: np.ndarray | None = None
+        self.scales: np.ndarray | None = None
+        if self.dim is None:
+            return
+        if self.quantization == "none":
+            if stored_mode != "none":
+                # Stale codes would be mistaken for current ones later
+                (self.path / CODES_FILE).unlink(missing_ok=True)
+                (self.path / SCALES_FILE).unlink(missing_ok=True)
+                self._write_store_info()
+            return
+        codes_file = self.path / CODES_FILE
+        width = self._code_width()
+        if (
+            stored_mode == self.quantization
+            and codes_file.exists()
+            and codes_file.stat().st_size >= len(self.ids) * width
+        ):
+            self._map_codes()
+            return
+
+        logger.info(f"Encoding {len(self.ids)} vectors as {self.quantization} codes")
+        codes_file.unlink(missing_ok=True)
+        (self.path / SCALES_FILE).unlink(missing_ok=True)
+        for block in self._blocks(self.vectors):
+            self._write_codes(block)
+        self._map_codes()
+        self._write_store_info()
+
+    def _code_width(self) -> int:
+        """Bytes per row of codes: one per dimension, or one per 8 for binary."""
+        assert self.dim is not None
+        return self.dim if self.quantization == "int8" else (self.dim + 7) // 8
+
+    def _write_codes(self, vectors: np.ndarray) -> None:
+        """Append the codes (and int8 scales) of vectors to their files."""
+        codes, scales = self._encode(vectors)
+        with (self.path / CODES_FILE).open("ab") as f:
+            f.write(codes.tobytes())
+        if scales is not None:
+            with (self.path / SCALES_FILE).open("ab") as f:
+                f.write(scales.astype(np.float32).tobytes())
+
+    def _map_codes(self) -> None:
+        # Like the vectors: rows past the last chunk record are ignored
+        if not self.ids:
+            return
+        self.codes = np.memmap(
+            self.path / CODES_FILE,
+            dtype=np.int8 if self.quantization == "int8" else np.uint8,
+            mode="r",
+            shape=(len(self.ids), self._code_width()),
+        )
+        if self.quantization == "int8":
+            self.scales = np.memmap(
+                self.path / SCALES_FILE,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.ids),),
+            )
+
+    def _build_columns(self) -> None:
+        """Columns for the filters that are evaluated without Python loops.
+
+        Built when first needed after a change rather than on every add, so
+        ingesting batch after batch stays linear.
+        """
+        if not self._columns_stale:
+            return
+        self.titles = np.array(
+            [meta["source_doc_title"] for meta in self.metadatas], dtype=object
+        )
+        self.page_start = np.array(
+            [meta["page_start"] for meta in self.metadatas], dtype=np.int32
+        )
+        self.page_end = np.array(
+            [meta["page_end"] for meta in self.metadatas], dtype=np.int32
+        )
+        self._columns_stale = False
+
+    def _map_vectors(self) -> np.ndarray:
+        if not self.ids or self.dim is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        # Rows past the last chunk record (an interrupted write) are ignored
+        return np.memmap(
+            self.path / VECTORS_FILE,
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self.ids), self.dim),
+        )
+
+    def _invalidate_index(self) -> None:
+        self._index = None
+        (self.path / INDEX_FILE).unlink(missing_ok=True)
+
+    def ingest(self, chunks: list[Chunk]) -> None:
+        embch = self.embedder.embed_chunk(chunks=chunks)
+        if not embch:
+            return
+        logger.info("adding chunks to the NumPy store")
+        with metrics.timer("store_add"):
+            self.add(
+                ids=[str(embed.vector_id) for embed in embch],
+                vectors=np.asarray(
+                    [embed.embedding for embed in embch], dtype=np.float32
+                ),
+                documents=[embed.content for embed in embch],
+                metadatas=[to_store_metadata(embed.metadata) for embed in embch],
+            )
+
+    def add(
+        self,
+        ids: list[str],
+        vectors: np.ndarray,
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        """Append already embedded chunks with flat store metadata."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.space == "cosine":
+            vectors = l2_normalize(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._write_store_info()
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Vector dimension {vectors.shape[1]} doesn't match store {self.dim}"
+            )
+
+        vectors_file = self.path / VECTORS_FILE
+        if vectors_file.exists():
+            os.truncate(vectors_file, len(self.ids) * self.dim * 4)
+        with vectors_file.open("ab") as f:
+            f.write(vectors.tobytes())
+        if self.quantization != "none":
+            self._truncate_codes()
+            self._write_codes(vectors)
+        with (self.path / CHUNKS_FILE).open("a", encoding="utf-8") as f:
+            for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                record = {"id": chunk_id, "document": document, "metadata": metadata}
+                f.write(json.dumps(record) + "\n")
+
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        self._columns_stale = True
+        self.vectors = self._map_vectors()
+        if self.quantization != "none":
+            self._map_codes()
+        self._invalidate_index()
+
+    def _truncate_codes(self) -> None:
+        """Same truncation as the vectors file: drop codes of unrecorded rows."""
+        sizes = {CODES_FILE: self._code_width(), SCALES_FILE: 4}
+        for name, row_bytes in sizes.items():
+            path = self.path / name
+            if path.exists():
+                os.truncate(path, len(self.ids) * row_bytes)
+
+    def copy_from(self, collection: "Collection", batch_size: int = 1000) -> int:
+        """Append every chunk of a Chroma collection, reusing its embeddings."""
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"],
+            )
+            assert batch["embeddings"] is not None
+            assert batch["documents"] is not None
+            assert batch["metadatas"] is not None
+            self.add(
+                ids=batch["ids"],
+                vectors=np.asarray(batch["embeddings"], dtype=np.float32),
+                documents=batch["documents"],
+                metadatas=[
+                    to_store_metadata(from_store_metadata(meta))
+                    for meta in batch["metadatas"]
+                ],
+            )
+            logger.debug("Copied {}/{} chunks", offset + len(batch["ids"]), total)
+        return total
+
+    def query(
+        self,
+        sentences: list[str],
+        n_result: int,
+        filters: SearchFilter | None = None,
+    ) -> list[SearchResult]:
+        queries = np.asarray(self.embedder.embed_batch(sentences), dtype=np.float32)
+        candidates = self._candidates(filters)
+        logger.info(
+            f"querying the NumPy store ({len(sentences)} sentences, "
+            f"{self.count() if candidates is None else len(candidates)} candidates)"
+        )
+        rows, distances = self.search_vectors(queries, n_result, candidates)
+
+        all_chunks: list[SearchResult] = []
+        seen_rows: set[int] = set()
+        for row, score in zip(rows.ravel().tolist(), distances.ravel().tolist()):
+            # FAISS pads with -1 when it finds fewer than n_result neighbours
+            if row < 0 or row in seen_rows:
+                continue
+            seen_rows.add(row)
+            all_chunks.append(
+                build_search_result(
+                    self.documents[row],
+                    self.metadatas[row],
+                    score,
+                    validate=self.validate_results,
+                )
+            )
+        all_chunks.sort(key=lambda x: x.score)
+
+        logger.info("finished the querying - found {} unique results", len(all_chunks))
+        return all_chunks
+
+    def query_batch(
+        self,
+        sentences: list[str],
+        n_result: int,
+        filters: SearchFilter | None = None,
+    ) -> list[list[SearchResult]]:
+        """Embed all sentences in one batch and search them in one pass."""
+        queries = np.asarray(self.embedder.embed_batch(sentences), dtype=np.float32)
+        rows, distances = self.search_vectors(
+            queries, n_result, self._candidates(filters)
+        )
+        return [
+            [
+                build_search_result(
+                    self.documents[row],
+                    self.metadatas[row],
+                    score,
+                    validate=self.validate_results,
+                )
+                for row, score in zip(query_rows, query_distances)
+                # FAISS pads with -1 when it finds fewer than n_result neighbours
+                if row >= 0
+            ]
+            for query_rows, query_distances in zip(rows.tolist(), distances.tolist())
+        ]
+
+    def search_vectors(
+        self, queries: np.ndarray, k: int, candidates: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Row numbers and distances of the k nearest rows for each query vector."""
+        with (
+            tracer.span("search", kind="retrieval", store="numpy"),
+            metrics.timer("store_query"),
+        ):
+            if self.space == "cosine":
+                queries = l2_normalize(queries)
+            if candidates is None and self.config.numpy_index != "flat":
+                return self._index_search(queries, k)
+            if self.codes is not None:
+                return self._quantized_search(queries, k, candidates)
+            return self._exact_search(queries, k, candidates)
+
+    @property
+    def first_pass_bytes(self) -> int:
+        """Memory the flat scan reads per query: codes, or the float32 matrix."""
+        if self.codes is None:
+            return self.vectors.nbytes
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def _candidates(self, filters: SearchFilter | None) -> np.ndarray | None:
+        """Row numbers allowed by the filter, or None when nothing is filtered."""
+        if filters is None or filters.to_where() is None:
+            return None
+        self._build_columns()
+        mask = np.ones(len(self.ids), dtype=bool)
+        if filters.books:
+            mask &= np.isin(self.titles, filters.books)
+        if filters.pages:
+            first, last = filters.pages
+            mask &= (self.page_start <= last) & (self.page_end >= first)
+        rows = np.flatnonzero(mask)
+        if filters.chapter or filters.section:
+            matches = filters.matcher()
+            keep = [matches(self.metadatas[row]) for row in rows]
+            rows = rows[np.array(keep, dtype=bool)]
+        return rows
+
+    @staticmethod
+    def _blocks(matrix: np.ndarray):
+        for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+            yield matrix[start : start + SCAN_BLOCK_ROWS]
+
+    def _distances(self, queries: np.ndarray, block: np.ndarray) -> np.ndarray:
+        """Distances with the same meaning as Chroma's for the configured space."""
+        dots = queries @ block.T
+        if self.space == "l2":
+            query_sq = np.einsum("ij,ij->i", queries, queries)[:, None]
+            return query_sq + np.einsum("ij,ij->i", block, block) - 2.0 * dots
+        return 1.0 - dots
+
+    def _scan(
+        self,
+        k: int,
+        candidates: np.ndarray | None,
+        block_distances: Callable[[np.ndarray | slice], np.ndarray],
+        num_queries: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Blocked top-k over all rows (or the candidates), nearest first.
+
+        block_distances receives the rows of one block, as a slice when the
+        whole store is scanned so memory-mapped reads stay sequential.
+        """
+        rows = np.arange(len(self.ids)) if candidates is None else candidates
+        k = min(k, len(rows))
+        best_rows = np.empty((num_queries, 0), dtype=np.int64)
+        best_dist = np.empty((num_queries, 0), dtype=np.float32)
+        if k == 0:
+            return best_rows, best_dist
+
+        for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+            block_rows = rows[start : start + SCAN_BLOCK_ROWS]
+            index = (
+                slice(start, start + len(block_rows))
+                if candidates is None
+                else block_rows
+            )
+            # Merge this block's distances into the running top-k
+            dist = np.concatenate([best_dist, block_distances(index)], axis=1)
+            row_ids = np.concatenate(
+                [
+                    best_rows,
+                    np.broadcast_to(block_rows, (num_queries, len(block_rows))),
+                ],
+                axis=1,
+            )
+            keep = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            best_dist = np.take_along_axis(dist, keep, axis=1)
+            best_rows = np.take_along_axis(row_ids, keep, axis=1)
+
+        order = best_dist.argsort(axis=1)
+        return (
+            np.take_along_axis(best_rows, order, axis=1),
+            np.take_along_axis(best_dist, order, axis=1),
+        )
+
+    def _exact_search(
+        self, queries: np.ndarray, k: int, candidates: np.ndarray | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        return self._scan(
+            k,
+            candidates,
+            lambda index: self._distances(queries, self.vectors[index]),
+            len(queries),
+        )
+
+    def _quantized_search(
+        self, queries: np.ndarray, k: int, candidates: np.ndarray | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Shortlist on the codes, then rescore the shortlist in float32."""
+        assert self.codes is not None
+        if self.quantization == "int8":
+            assert self.scales is not None
+            codes, scales = self.codes, self.scales
+
+            def approx(index: np.ndarray | slice) -> np.ndarray:
+                block = dequantize_int8(codes[index], scales[index])
+                return self._distances(queries, block)
+        else:
+            query_codes = quantize_binary(queries)
+
+            def approx(index: np.ndarray | slice) -> np.ndarray:
+                return hamming_distances(self.codes[index], query_codes)
+
+        shortlist, _ = self._scan(
+            k * self.config.rescore_factor, candidates, approx, len(queries)
+        )
+        k = min(k, shortlist.shape[1])
+        rows = np.empty((len(queries), k), dtype=np.int64)
+        distances = np.empty((len(queries), k), dtype=np.float32)
+        for i, query in enumerate(queries):
+            # Sorted rows keep the reads from the memory-mapped file in order
+            shortlisted = np.sort(shortlist[i])
+            exact = self._distances(query[None], self.vectors[shortlisted])[0]
+            top = np.argsort(exact)[:k]
+            rows[i], distances[i] = shortlisted[top], exact[top]
+        return rows, distances
+
+    def _index_search(
+        self, queries: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if not self.ids:
+            return self._exact_search(queries, k, None)
+        faiss = _import_faiss()
+        index = self._faiss_index()
+        if self.config.numpy_index == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=self.config.hnsw_ef_search)
+        else:
+            params = faiss.SearchParametersIVF(nprobe=self.config.ivf_nprobe)
+        distances, rows = index.search(queries, min(k, len(self.ids)), params=params)
+        if self.space != "l2":
+            # FAISS returns inner products; report them as Chroma-style distances
+            distances = 1.0 - distances
+        return rows, distances
+
+    def _faiss_index(self):
+        """The configured FAISS index, loaded from disk or built from the matrix."""
+        if self._index is not None:
+            return self._index
+        faiss = _import_faiss()
+        index_file = self.path / INDEX_FILE
+        if index_file.exists():
+            index = faiss.read_index(str(index_file))
+            if index.ntotal == len(self.ids):
+                self._index = index
+                return index
+
+        assert self.dim is not None
+        metric = faiss.METRIC_L2 if self.space == "l2" else faiss.METRIC_INNER_PRODUCT
+        logger.info(
+            f"Building FAISS {self.config.numpy_index} index over {len(self.ids)} vectors"
+        )
+        if self.config.numpy_index == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dim, self.config.hnsw_m, metric)
+            index.hnsw.efConstruction = self.config.hnsw_ef_construction
+        else:
+            nlist = max(
+                1, min(self.config.ivf_nlist, len(self.ids) // IVF_MIN_POINTS_PER_CELL)
+            )
+            quantizer = faiss.IndexFlat(self.dim, metric)
+            index = faiss.IndexIVFFlat(quantizer, self.dim, nlist, metric)
+            rng = np.random.default_rng(0)
+            sample = np.sort(
+                rng.choice(
+                    len(self.ids),
+                    size=min(len(self.ids), nlist * IVF_TRAINING_POINTS_PER_CELL),
+                    replace=False,
+                )
+            )
+            index.train(np.ascontiguousarray(self.vectors[sample]))
+        for block in self._blocks(self.vectors):
+            index.add(np.ascontiguousarray(block))
+
+        faiss.write_index(index, str(index_file))
+        self._index = index
+        return index
+
+    def delete_by_filename(self, filename: str) -> None:
+        logger.info(f"Deleting all chunks for: {filename}")
+        self._build_columns()
+        keep = ~np.isin(self.titles, self.source_titles(filename))
+        if not keep.all():
+            self._rewrite(np.flatnonzero(keep))
+
+    def _rewrite(self, rows: Sequence[int]) -> None:
+        """Rewrite both files keeping only the given rows, in order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors_tmp = self.path / f"{VECTORS_FILE}.tmp"
+        chunks_tmp = self.path / f"{CHUNKS_FILE}.tmp"
+        with vectors_tmp.open("wb") as f:
+            for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+                f.write(self.vectors[rows[start : start + SCAN_BLOCK_ROWS]].tobytes())
+        with chunks_tmp.open("w", encoding="utf-8") as f:
+            for row in rows.tolist():
+                record = {
+                    "id": self.ids[row],
+                    "document": self.documents[row],
+                    "metadata": self.metadatas[row],
+                }
+                f.write(json.dumps(record) + "\n")
+
+        self.vectors = np.empty((0, self.dim or 0), dtype=np.float32)
+        os.replace(vectors_tmp, self.path / VECTORS_FILE)
+        os.replace(chunks_tmp, self.path / CHUNKS_FILE)
+        # Codes are re-encoded from the rewritten vectors on load
+        (self.path / CODES_FILE).unlink(missing_ok=True)
+        self._load()
+        self._invalidate_index()
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def clear(self) -> None:
+        logger.info(f"Clearing NumPy store at {self.path}")
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        for name in (
+            VECTORS_FILE,
+            CHUNKS_FILE,
+            STORE_FILE,
+            INDEX_FILE,
+            CODES_FILE,
+            SCALES_FILE,
+        ):
+            (self.path / name).unlink(missing_ok=True)
+        self._load()
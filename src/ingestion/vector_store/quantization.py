@@ -0,0 +1,48 @@
+"""Compact vector codes for a cheap first-pass search.
+
+int8 codes scale each row by its own max magnitude, so rows can be appended
+without refitting anything; binary codes keep one sign bit per dimension.
+Both only rank candidates: final scores are always recomputed from the
+float32 vectors.
+"""
+
+import numpy as np
+
+INT8_MAX = 127
+# Number of set bits for every byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(
+    axis=1, dtype=np.uint16
+)
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """int8 codes and the per-row float32 scale that restores them."""
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / INT8_MAX, 1.0).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * scales[:, None]
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits packed eight dimensions per byte."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def hamming_distances(codes: np.ndarray, query_codes: np.ndarray) -> np.ndarray:
+    """(queries, rows) Hamming distances between packed binary codes."""
+    return np.stack(
+        [_POPCOUNT[codes ^ query].sum(axis=1, dtype=np.int32) for query in query_codes]
+    )
+
+
+def code_bytes(mode: str, dim: int) -> int:
+    """Bytes of code per vector (int8 includes its float32 scale)."""
+    if mode == "int8":
+        return dim + 4
+    if mode == "binary":
+        return (dim + 7) // 8
+    return dim * 4
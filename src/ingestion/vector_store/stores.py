@@ -1,66 +1,127 @@
-from typing import List, Optional, Tuple, cast
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
 import chromadb
-from chromadb.api.types import Embedding, Metadata
-from redisvl.extensions.cache.llm import SemanticCache
+import numpy as np
+from chromadb.api import ClientAPI
+from chromadb.api.types import Embedding, Metadata, QueryResult
+from chromadb.errors import NotFoundError
 
+from src.ingestion.embedding.base_embed import TemplateEmbedder, l2_normalize
 from src.ingestion.embedding.get_embbedder import get_embedder
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.ingestion.vector_store.metadata import (
+    build_search_result,
+    from_store_metadata,
+    to_store_metadata,
+)
+from src.retrieval.filters import SearchFilter
 from src.shared.models import (
     CachedPromptResponse,
-    ChunkMetadata,
     EmbeddedChunk,
     Chunk,
     SearchResult,
 )
 from src.utils.config import RedisConfig, VectorStoreConfig, settings
 from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.utils.tracing import tracer
+
+
+# Index settings that can only be chosen when a collection is created
+FIXED_HNSW_SETTINGS = ("space", "max_neighbors", "ef_construction")
 
 
-class ChromaStore:
-    def __init__(self, config: VectorStoreConfig) -> None:
+class ChromaStore(BaseVectorStore):
+    def __init__(
+        self,
+        config: VectorStoreConfig,
+        client: Optional[ClientAPI] = None,
+        embedder: Optional[TemplateEmbedder] = None,
+        load_embedder: Optional[Callable[[], TemplateEmbedder]] = None,
+    ) -> None:
+        self.config = config
         self.client_path = config.client_path
         self.collection_name = config.collection_name
-        self.client = chromadb.PersistentClient(path=self.client_path)
+        self.validate_results = config.validate_results
+        self.client = client or chromadb.PersistentClient(path=self.client_path)
         try:
             logger.info("creating or getting the collection")
             self.collection = self.client.get_or_create_collection(
-                name=config.collection_name
+                name=config.collection_name, configuration=self._index_configuration()
             )
         except Exception as e:
             raise ValueError(f"Probably messed up the  name  huh {e}")
-        logger.info("getting the embedder")
-        self.embedder = get_embedder()
+        self._sync_index_settings()
+        self._embedder = embedder
+        self._load_embedder = load_embedder or get_embedder
+
+    @property
+    def embedder(self) -> TemplateEmbedder:
+        # Loaded on first use: counting or deleting chunks needs no model
+        if self._embedder is None:
+            logger.info("getting the embedder")
+            self._embedder = self._load_embedder()
+        return self._embedder
+
+    def _index_configuration(self) -> Dict[str, Any]:
+        return {
+            "hnsw": {
+                "space": self.config.distance,
+                "max_neighbors": self.config.hnsw_m,
+                "ef_construction": self.config.hnsw_ef_construction,
+                "ef_search": self.config.hnsw_ef_search,
+            }
+        }
+
+    def _sync_index_settings(self) -> None:
+        """Apply ef_search and warn when the collection was built differently."""
+        wanted = self._index_configuration()["hnsw"]
+        current = (self.collection.configuration or {}).get("hnsw") or {}
+        stale = [
+            f"{key}={current.get(key)} (config: {wanted[key]})"
+            for key in FIXED_HNSW_SETTINGS
+            if current.get(key) != wanted[key]
+        ]
+        if stale:
+            logger.warning(
+                f"Collection '{self.collection_name}' was built with "
+                f"{', '.join(stale)}; run the migrate-store command to rebuild it"
+            )
+        if current.get("ef_search") != wanted["ef_search"]:
+            self.collection.modify(
+                configuration={"hnsw": {"ef_search": wanted["ef_search"]}}
+            )
 
     def ingest(self, chunks: List[Chunk]) -> None:
         embch = self.embedder.embed_chunk(chunks=chunks)
         ids = [str(embed.vector_id) for embed in embch]
         metadatas: List[Metadata] = [
-            embed.metadata.model_dump(mode="json") for embed in embch
+            to_store_metadata(embed.metadata) for embed in embch
         ]
         documents = [embed.content for embed in embch]
         embeddings: List[Embedding] = cast(
             List[Embedding], [embed.embedding for embed in embch]
         )
         logger.info("adding chunks to the collection")
-        self.collection.add(
-            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
-        )
+        with metrics.timer("store_add"):
+            self.collection.add(
+                ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+            )
 
-    def query(self, sentences: List[str], n_result: int) -> List[SearchResult]:
+    def query(
+        self,
+        sentences: List[str],
+        n_result: int,
+        filters: Optional[SearchFilter] = None,
+    ) -> List[SearchResult]:
         """
         Returns flat list of SearchResult objects.
 
         This method queries the vector store with multiple sentences and returns
-        a deduplicated, flattened list of all results sorted by score.
+        a deduplicated, flattened list of all results sorted by score. When
+        filters are given, only chunks matching them are searched.
         """
-        query_embedding = cast(
-            List[Embedding],
-            self.embedder._embed_batch(sentences),
-        )
-        logger.info("querying the results")
-        results = self.collection.query(
-            query_embeddings=query_embedding, n_results=n_result
-        )
+        results = self._search(sentences, n_result, filters)
 
         all_chunks: List[SearchResult] = []
         seen_ids: set[str] = set()  # Track unique chunks to avoid duplicates
@@ -85,17 +146,59 @@ class ChromaStore:
                     continue
 
                 seen_ids.add(doc_id)
-                metadata = ChunkMetadata.model_validate(meta_json)
                 all_chunks.append(
-                    SearchResult(content=doc_text, metadata=metadata, score=score)
+                    build_search_result(
+                        doc_text, meta_json, score, validate=self.validate_results
+                    )
                 )
 
-        # Sort by score (L2 distance - lower is better)
+        # Sort by score (distance in the collection's space - lower is better)
         all_chunks.sort(key=lambda x: x.score)
 
-        logger.info(f"finished the querying - found {len(all_chunks)} unique results")
+        logger.info("finished the querying - found {} unique results", len(all_chunks))
         return all_chunks
 
+    def query_batch(
+        self,
+        sentences: List[str],
+        n_result: int,
+        filters: Optional[SearchFilter] = None,
+    ) -> List[List[SearchResult]]:
+        """One embedding batch and one collection query for all sentences."""
+        results = self._search(sentences, n_result, filters)
+        assert results["documents"] is not None
+        assert results["metadatas"] is not None
+        assert results["distances"] is not None
+
+        return [
+            [
+                build_search_result(
+                    doc_text, meta_json, score, validate=self.validate_results
+                )
+                for doc_text, meta_json, score in zip(docs, metas, dists)
+            ]
+            for docs, metas, dists in zip(
+                results["documents"], results["metadatas"], results["distances"]
+            )
+        ]
+
+    def _search(
+        self, sentences: List[str], n_result: int, filters: Optional[SearchFilter]
+    ) -> QueryResult:
+        query_embedding = cast(
+            List[Embedding],
+            self.embedder.embed_batch(sentences),
+        )
+        where = filters.to_where() if filters else None
+        logger.info("querying the results (where={})", where)
+        with (
+            tracer.span("search", kind="retrieval", store="chroma", where=str(where)),
+            metrics.timer("store_query"),
+        ):
+            return self.collection.query(
+                query_embeddings=query_embedding, n_results=n_result, where=where
+            )
+
     def count(self) -> int:
         return self.collection.count()
 
@@ -114,17 +217,74 @@ class ChromaStore:
         self.client.delete_collection(name=self.collection_name)
         logger.info(f"Collection '{self.collection_name}' deleted")
 
+    def rebuild_index(self, batch_size: int = 1000) -> int:
+        """Copy the collection into one built with the configured index settings.
+
+        Stored embeddings, documents and metadata are reused, so nothing is
+        re-parsed or re-embedded; vectors are re-normalized when the embedder
+        normalizes, and legacy metadata is rewritten in the flat format.
+        Returns the number of chunks copied.
+        """
+        staging_name = f"{self.collection_name}-rebuild"
+        try:
+            self.client.delete_collection(name=staging_name)
+        except NotFoundError:
+            pass
+        staging = self.client.create_collection(
+            name=staging_name, configuration=self._index_configuration()
+        )
+
+        total = self.collection.count()
+        logger.info(
+            f"Rebuilding '{self.collection_name}' ({total} chunks) "
+            f"in {self.config.distance} space"
+        )
+        for offset in range(0, total, batch_size):
+            batch = self.collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"],
+            )
+            assert batch["embeddings"] is not None
+            assert batch["metadatas"] is not None
+            embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+            if self.embedder.normalize:
+                embeddings = l2_normalize(embeddings)
+            metadatas: List[Metadata] = [
+                to_store_metadata(from_store_metadata(meta))
+                for meta in batch["metadatas"]
+            ]
+            staging.add(
+                ids=batch["ids"],
+                embeddings=embeddings,
+                documents=batch["documents"],
+                metadatas=metadatas,
+            )
+            logger.debug("Copied {}/{} chunks", offset + len(batch["ids"]), total)
+
+        self.client.delete_collection(name=self.collection_name)
+        staging.modify(name=self.collection_name)
+        self.collection = staging
+        logger.info(f"Collection '{self.collection_name}' rebuilt")
+        return total
+
     def delete_by_filename(self, filename: str) -> None:
         logger.info(f"Deleting all chunks for: {filename}")
-        self.collection.delete(where={"source_doc_title": filename})
+        self.collection.delete(
+            where={"source_doc_title": {"$in": self.source_titles(filename)}}
+        )
 
 
 class RedisCache:
-    def __init__(self, config: RedisConfig) -> None:
+    def __init__(
+        self, config: RedisConfig, embedder: Optional[TemplateEmbedder] = None
+    ) -> None:
         self.host: str = config.host
         self.port: int = config.port
         self.threshold = config.cache_threshold
-        self.embedder = get_embedder()
+        self.embedder = embedder or get_embedder()
+        from redisvl.extensions.cache.llm import SemanticCache
+
         self.cache = SemanticCache(
             name="book_assistant_cache",
             distance_threshold=self.threshold,
@@ -137,8 +297,10 @@ class RedisCache:
 
     def check(self, prompt: str) -> Optional[List[CachedPromptResponse]]:
         cached_prompt_responses: List[CachedPromptResponse] = []
-        prompt_embedding = self.embedder.embed_text(prompt)
-        cached_results = self.cache.check(prompt=prompt, vector=prompt_embedding)
+        with metrics.timer("cache_check"):
+            prompt_embedding = self.embedder.embed_text(prompt)
+            cached_results = self.cache.check(prompt=prompt, vector=prompt_embedding)
+        metrics.inc("cache_hits" if cached_results else "cache_misses")
         for cached_result in cached_results:
             cached_prompt_response = CachedPromptResponse(
                 prompt=cached_result["prompt"], response=cached_result["response"]
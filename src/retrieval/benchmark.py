@@ -0,0 +1,289 @@
+"""Recall/latency benchmarks for the vector search behind the stores.
+
+Ground truth is an exact brute-force search over the stored vectors with
+NumPy. Queries are sampled from those same vectors, so each query's own row
+is left out of both the exact and the indexed neighbours; otherwise every
+search would score a free hit on itself. HNSW settings and quantization modes are each measured on a throwaway
+copy of the vectors, so the real store is never modified.
+"""
+
+import tempfile
+import time
+from collections.abc import Iterator, Sequence
+from itertools import product
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from chromadb.api.models.Collection import Collection
+from pydantic import BaseModel
+
+from src.ingestion.embedding.base_embed import l2_normalize
+from src.ingestion.vector_store.numpy_store import NumpyStore
+from src.retrieval.filters import page_fields
+from src.utils.config import VectorStoreConfig
+from src.utils.logger import logger
+
+# Query rows scored against the full matrix at once during brute force
+EXACT_QUERY_BLOCK = 16
+
+
+class SweepResult(BaseModel):
+    m: int
+    ef_construction: int
+    ef_search: int
+    recall: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+class QuantizationResult(BaseModel):
+    mode: str
+    recall: float
+    first_pass_mb: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def load_vectors(
+    collection: Collection, batch_size: int = 5000
+) -> tuple[list[str], np.ndarray]:
+    """All ids and embeddings of a collection as a float32 matrix."""
+    total = collection.count()
+    ids: list[str] = []
+    matrix: np.ndarray | None = None
+    for offset in range(0, total, batch_size):
+        batch = collection.get(limit=batch_size, offset=offset, include=["embeddings"])
+        vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+        if matrix is None:
+            matrix = np.empty((total, vectors.shape[1]), dtype=np.float32)
+        matrix[len(ids) : len(ids) + len(vectors)] = vectors
+        ids.extend(batch["ids"])
+    if matrix is None:
+        raise ValueError(f"Collection '{collection.name}' is empty")
+    return ids, matrix[: len(ids)]
+
+
+def exact_top_k(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    space: str,
+    exclude: np.ndarray | None = None,
+) -> np.ndarray:
+    """Row indices of the k nearest vectors to each query, nearest first.
+
+    ``exclude`` optionally names one row per query that is never returned,
+    such as the row the query was sampled from. The matrix is never copied.
+    """
+    k = min(k, len(matrix) - (exclude is not None))
+    if space == "cosine":
+        # Dividing the scores by the row norms ranks like a normalized copy
+        # of the matrix would, without holding one
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+        inv_norms = 1.0 / np.maximum(norms, np.finfo(np.float32).tiny)
+        queries = l2_normalize(queries)
+    elif space == "l2":
+        sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+
+    top = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), EXACT_QUERY_BLOCK):
+        block = queries[start : start + EXACT_QUERY_BLOCK]
+        if space == "l2":
+            # ||q||^2 is constant per row, so it does not change the ranking
+            distances = sq_norms - 2.0 * (block @ matrix.T)
+        elif space == "cosine":
+            distances = -(block @ matrix.T) * inv_norms
+        else:
+            distances = -(block @ matrix.T)
+        if exclude is not None:
+            rows = np.arange(len(block))
+            distances[rows, exclude[start : start + len(block)]] = np.inf
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+        top[start : start + len(block)] = np.take_along_axis(nearest, order, axis=1)
+    return top
+
+
+def recall_at_k(
+    found: Sequence[Sequence[str]], expected: Sequence[Sequence[str]]
+) -> float:
+    """Mean fraction of the exact neighbours returned by the index."""
+    if not expected:
+        return 0.0
+    hits = [
+        len(set(approx) & set(exact)) / len(exact)
+        for approx, exact in zip(found, expected)
+        if exact
+    ]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def latency_percentiles(latencies_ms: Sequence[float]) -> tuple[float, float, float]:
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return float(p50), float(p95), float(p99)
+
+
+def without_self(found: Sequence[str], own_id: str, k: int) -> list[str]:
+    """The first k results of a k + 1 search that are not the query itself."""
+    return [found_id for found_id in found if found_id != own_id][:k]
+
+
+def _add_in_batches(
+    collection: Collection, ids: list[str], matrix: np.ndarray, batch_size: int
+) -> None:
+    for start in range(0, len(ids), batch_size):
+        collection.add(
+            ids=ids[start : start + batch_size],
+            embeddings=matrix[start : start + batch_size],
+        )
+
+
+class IndexBenchmark:
+    """Sweeps HNSW settings over a snapshot of a collection's vectors."""
+
+    def __init__(
+        self,
+        collection: Collection,
+        space: str,
+        k: int = 10,
+        num_queries: int = 100,
+        seed: int = 0,
+    ) -> None:
+        self.space = space
+        self.k = k
+        logger.info(f"Loading vectors from '{collection.name}'")
+        self.ids, self.matrix = load_vectors(collection)
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(
+            len(self.ids), size=min(num_queries, len(self.ids)), replace=False
+        )
+        self.queries = self.matrix[picks]
+        self.query_ids = [self.ids[idx] for idx in picks]
+        logger.info(
+            f"Computing exact top-{k} for {len(picks)} queries "
+            f"over {len(self.ids)} vectors"
+        )
+        self.expected = [
+            [self.ids[idx] for idx in row]
+            for row in exact_top_k(self.matrix, self.queries, k, space, picks)
+        ]
+
+    def run(
+        self,
+        m_values: Sequence[int],
+        ef_construction_values: Sequence[int],
+        ef_search_values: Sequence[int],
+    ) -> Iterator[SweepResult]:
+        with tempfile.TemporaryDirectory(prefix="index-bench-") as tmp_dir:
+            client = chromadb.PersistentClient(path=tmp_dir)
+            batch_size = client.get_max_batch_size()
+            for m, ef_construction in product(m_values, ef_construction_values):
+                logger.info(
+                    f"Building copy with M={m}, ef_construction={ef_construction}"
+                )
+                collection = client.create_collection(
+                    name=f"bench-m{m}-efc{ef_construction}",
+                    configuration={
+                        "hnsw": {
+                            "space": self.space,
+                            "max_neighbors": m,
+                            "ef_construction": ef_construction,
+                        }
+                    },
+                )
+                _add_in_batches(collection, self.ids, self.matrix, batch_size)
+                for ef_search in ef_search_values:
+                    collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+                    yield self._measure(collection, m, ef_construction, ef_search)
+                client.delete_collection(name=collection.name)
+
+    def _measure(
+        self, collection: Collection, m: int, ef_construction: int, ef_search: int
+    ) -> SweepResult:
+        found: list[list[str]] = []
+        latencies_ms: list[float] = []
+        # One query per call, as the RAG pipelines issue them
+        for query, query_id in zip(self.queries, self.query_ids):
+            started = time.perf_counter()
+            result = collection.query(
+                query_embeddings=[query], n_results=self.k + 1, include=[]
+            )
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+            found.append(without_self(result["ids"][0], query_id, self.k))
+        p50, p95, p99 = latency_percentiles(latencies_ms)
+        return SweepResult(
+            m=m,
+            ef_construction=ef_construction,
+            ef_search=ef_search,
+            recall=recall_at_k(found, self.expected),
+            p50_ms=p50,
+            p95_ms=p95,
+            p99_ms=p99,
+        )
+
+
+def benchmark_quantization(
+    ids: list[str],
+    matrix: np.ndarray,
+    config: VectorStoreConfig,
+    modes: Sequence[str] = ("none", "int8", "binary"),
+    k: int = 10,
+    num_queries: int = 100,
+    seed: int = 0,
+    batch_size: int = 10_000,
+) -> Iterator[QuantizationResult]:
+    """Compare flat NumpyStore search across quantization modes on the same data.
+
+    Each mode gets its own temporary store; the first-pass memory is what its
+    scan keeps resident (codes, or the whole float32 matrix without them).
+    """
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(ids), size=min(num_queries, len(ids)), replace=False)
+    queries = np.asarray(matrix[picks], dtype=np.float32)
+    expected = [
+        [ids[idx] for idx in row]
+        for row in exact_top_k(np.asarray(matrix), queries, k, config.distance, picks)
+    ]
+    # Search never looks at metadata, so every row gets the same placeholder
+    placeholder = {"source_doc_title": "benchmark", **page_fields((1, 1))}
+
+    with tempfile.TemporaryDirectory(prefix="quant-bench-") as tmp_dir:
+        for mode in modes:
+            logger.info(f"Building {mode} store over {len(ids)} vectors")
+            store = NumpyStore(
+                config.model_copy(
+                    update={
+                        "numpy_path": Path(tmp_dir) / mode,
+                        "numpy_index": "flat",
+                        "quantization": mode,
+                    }
+                )
+            )
+            for start in range(0, len(ids), batch_size):
+                batch_ids = ids[start : start + batch_size]
+                store.add(
+                    ids=batch_ids,
+                    vectors=matrix[start : start + batch_size],
+                    documents=[""] * len(batch_ids),
+                    metadatas=[placeholder] * len(batch_ids),
+                )
+
+            found: list[list[str]] = []
+            latencies_ms: list[float] = []
+            for query, pick in zip(queries, picks):
+                started = time.perf_counter()
+                rows, _ = store.search_vectors(query[None], k + 1)
+                latencies_ms.append((time.perf_counter() - started) * 1000)
+                found.append(without_self([ids[row] for row in rows[0]], ids[pick], k))
+            p50, p95, p99 = latency_percentiles(latencies_ms)
+            yield QuantizationResult(
+                mode=mode,
+                recall=recall_at_k(found, expected),
+                first_pass_mb=store.first_pass_bytes / 2**20,
+                p50_ms=p50,
+                p95_ms=p95,
+                p99_ms=p99,
+            )
@@ -0,0 +1,354 @@
+"""Retrieval quality and latency evaluation against labeled questions.
+
+A dataset line labels a question with where its answer is:
+``{"id": "q1", "query": "...", "book": "sicp.pdf", "pages": [12, 14]}``.
+A retrieved chunk is relevant when it comes from that book and overlaps that
+page range. Each question is run through the RAG pipelines themselves, up
+to the answer prompt or, with ``generate``, the answer. For every pipeline
+evaluated, each question reports whether the
+top k held a relevant chunk (recall@k), its reciprocal rank and nDCG@k, the
+time spent in each stage and the size of the answer prompt; the run is saved
+as JSON so later runs, after a chunking or embedding change, can be compared.
+"""
+
+import json
+import math
+import time
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from src.generation.answerer import BaseQueryAnswerer, QueryAnswerer
+from src.generation.pipeline import MultiQueryRAGPipeline, SimpleRAGPipeline
+from src.generation.query_constructor import QueryConstructor
+from src.ingestion.embedding.base_embed import TemplateEmbedder
+from src.ingestion.vector_store.base_store import BaseVectorStore
+from src.retrieval.filters import SearchFilter
+from src.shared.models import SearchResult
+from src.utils.logger import logger
+
+PipelineName = Literal["simple", "multi"]
+
+
+class EvalQuestion(BaseModel):
+    id: str
+    query: str = Field(min_length=1)
+    book: str = Field(description="Book filename or title holding the answer")
+    pages: tuple[int, int] = Field(description="Inclusive page range of the answer")
+
+    def search_filter(self) -> SearchFilter:
+        """Restricts a search to the chunks labeled relevant."""
+        return SearchFilter(
+            books=BaseVectorStore.source_titles(self.book), pages=self.pages
+        )
+
+    def is_relevant(self, result: SearchResult) -> bool:
+        meta = result.metadata
+        first, last = self.pages
+        return (
+            meta.source_doc_title in BaseVectorStore.source_titles(self.book)
+            and meta.page_range[0] <= last
+            and meta.page_range[1] >= first
+        )
+
+
+def load_dataset(path: Path) -> list[EvalQuestion]:
+    """Labeled questions from JSONL; lines without an id get their line number."""
+    questions = []
+    with path.open() as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                record = json.loads(line)
+                record.setdefault("id", str(number))
+                questions.append(EvalQuestion.model_validate(record))
+    return questions
+
+
+def reciprocal_rank(relevance: Sequence[bool]) -> float:
+    """1 / rank of the first relevant result, 0 when there is none."""
+    for rank, relevant in enumerate(relevance, 1):
+        if relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg(relevance: Sequence[bool], relevant_available: int) -> float:
+    """Binary-gain nDCG of a ranking, against the best one the store allows."""
+    ideal = sum(1 / math.log2(rank + 1) for rank in range(1, relevant_available + 1))
+    if not ideal:
+        return 0.0
+    dcg = sum(1 / math.log2(rank + 1) for rank, hit in enumerate(relevance, 1) if hit)
+    return dcg / ideal
+
+
+class StageTimer:
+    """Wall time per stage, exclusive of the stages nested inside it.
+
+    Searching a store includes embedding the query; with the embedder timed
+    as its own stage, "search" only counts the vector search.
+    """
+
+    def __init__(self) -> None:
+        self.totals: dict[str, float] = defaultdict(float)
+        self._nested: list[float] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.totals[name] += elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def take(self) -> dict[str, float]:
+        """Milliseconds per stage since the last call."""
+        totals = {name: seconds * 1000 for name, seconds in self.totals.items()}
+        self.totals.clear()
+        return totals
+
+
+class TimedEmbedder(TemplateEmbedder):
+    """Wraps an embedder so its calls count as the "embed" stage."""
+
+    def __init__(self, embedder: TemplateEmbedder, timer: StageTimer) -> None:
+        super().__init__(embedder.batch_size, normalize=embedder.normalize)
+        self.embedder = embedder
+        self.timer = timer
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        with self.timer.stage("embed"):
+            return self.embedder._embed_batch(texts)
+
+    def embed_text(self, text: str) -> list[float]:
+        with self.timer.stage("embed"):
+            return self.embedder.embed_text(text)
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        with self.timer.stage("embed"):
+            return self.embedder.embed_batch(texts)
+
+
+class TimedQueryConstructor(QueryConstructor):
+    """Wraps a query constructor so its calls count as the "expand" stage."""
+
+    def __init__(self, query_constructor: QueryConstructor, timer: StageTimer) -> None:
+        self.query_constructor = query_constructor
+        self.timer = timer
+
+    def refine_query(self, query: str) -> list[str]:
+        with self.timer.stage("expand"):
+            return self.query_constructor.refine_query(query)
+
+
+class TimedAnswerer(BaseQueryAnswerer):
+    """Wraps an answerer so its calls count as the "generate" stage."""
+
+    def __init__(self, answerer: BaseQueryAnswerer, timer: StageTimer) -> None:
+        self.answerer = answerer
+        self.timer = timer
+
+    def answer(self, result_search: list[SearchResult], query: str) -> str:
+        with self.timer.stage("generate"):
+            return self.answerer.answer(result_search, query)
+
+
+class QuestionResult(BaseModel):
+    id: str
+    pipeline: PipelineName
+    first_relevant_rank: int | None
+    reciprocal_rank: float
+    ndcg: float
+    relevant_available: int = Field(description="Relevant chunks in the store, <= k")
+    prompt_tokens: int = Field(
+        description="Estimated size of the answer prompt, instructions included"
+    )
+    stages_ms: dict[str, float]
+
+
+class StageLatency(BaseModel):
+    p50_ms: float
+    p95_ms: float
+    mean_ms: float
+
+
+class PipelineReport(BaseModel):
+    pipeline: PipelineName
+    k: int
+    questions: int
+    recall: float = Field(
+        description="Share of questions with a relevant chunk in the top k"
+    )
+    mrr: float
+    ndcg: float
+    prompt_tokens: float = Field(description="Mean estimated answer prompt size")
+    latency: dict[str, StageLatency]
+
+    @classmethod
+    def from_results(
+        cls, pipeline: PipelineName, k: int, results: list[QuestionResult]
+    ) -> "PipelineReport":
+        stages: dict[str, list[float]] = defaultdict(list)
+        for result in results:
+            for stage, ms in result.stages_ms.items():
+                stages[stage].append(ms)
+        latency = {}
+        for stage, values in stages.items():
+            p50, p95 = np.percentile(values, [50, 95])
+            latency[stage] = StageLatency(
+                p50_ms=p50, p95_ms=p95, mean_ms=float(np.mean(values))
+            )
+
+        return cls(
+            pipeline=pipeline,
+            k=k,
+            questions=len(results),
+            recall=float(
+                np.mean([result.first_relevant_rank is not None for result in results])
+            ),
+            mrr=float(np.mean([result.reciprocal_rank for result in results])),
+            ndcg=float(np.mean([result.ndcg for result in results])),
+            prompt_tokens=float(np.mean([result.prompt_tokens for result in results])),
+            latency=latency,
+        )
+
+
+class EvalRun(BaseModel):
+    run_id: str
+    created: datetime
+    dataset: str
+    settings: dict[str, Any] = Field(
+        description="Config sections the results depend on (chunking, embedding...)"
+    )
+    reports: list[PipelineReport]
+    questions: list[QuestionResult]
+
+    def save(self, runs_dir: Path) -> Path:
+        runs_dir.mkdir(parents=True, exist_ok=True)
+        path = runs_dir / f"{self.run_id}.json"
+        path.write_text(self.model_dump_json(indent=2))
+        return path
+
+    def report(self, pipeline: str, k: int) -> PipelineReport | None:
+        for report in self.reports:
+            if report.pipeline == pipeline and report.k == k:
+                return report
+        return None
+
+
+def load_runs(runs_dir: Path) -> list[EvalRun]:
+    """Saved runs, oldest first."""
+    runs = [
+        EvalRun.model_validate_json(path.read_text())
+        for path in runs_dir.glob("*.json")
+    ]
+    return sorted(runs, key=lambda run: run.created)
+
+
+class RetrievalEvaluator:
+    """Runs labeled questions through the RAG pipelines and scores them.
+
+    Time spent in the pipeline outside the embedder, the query constructor
+    and the answerer is counted as "search".
+    """
+
+    def __init__(
+        self,
+        store: BaseVectorStore,
+        answerer: QueryAnswerer,
+        timer: StageTimer,
+        query_constructor: QueryConstructor | None = None,
+        k: int = 5,
+        generate: bool = False,
+    ) -> None:
+        self.store = store
+        self.answerer = answerer
+        self.timer = timer
+        self.k = k
+        self.generate = generate
+        timed_answerer = TimedAnswerer(answerer, timer)
+        self.pipelines: dict[
+            PipelineName, SimpleRAGPipeline | MultiQueryRAGPipeline
+        ] = {"simple": SimpleRAGPipeline(store, timed_answerer)}
+        if query_constructor is not None:
+            self.pipelines["multi"] = MultiQueryRAGPipeline(
+                store,
+                timed_answerer,
+                TimedQueryConstructor(query_constructor, timer),
+            )
+
+    def run(
+        self,
+        questions: list[EvalQuestion],
+        pipelines: Sequence[PipelineName] = ("simple",),
+    ) -> tuple[list[PipelineReport], list[QuestionResult]]:
+        if "multi" in pipelines and "multi" not in self.pipelines:
+            raise ValueError("The multi pipeline needs a query constructor")
+
+        available = {}
+        for question in questions:
+            # How many relevant chunks the best possible top k would hold
+            available[question.id] = len(
+                self.store.query(
+                    [question.query], n_result=self.k, filters=question.search_filter()
+                )
+            )
+            if not available[question.id]:
+                logger.warning(
+                    "No chunk of {} overlaps pages {}-{} (question {})",
+                    question.book,
+                    *question.pages,
+                    question.id,
+                )
+        self.timer.take()
+
+        reports: list[PipelineReport] = []
+        results: list[QuestionResult] = []
+        for pipeline in pipelines:
+            pipeline_results = [
+                self._evaluate(question, pipeline, available[question.id])
+                for question in questions
+            ]
+            reports.append(
+                PipelineReport.from_results(pipeline, self.k, pipeline_results)
+            )
+            results += pipeline_results
+        return reports, results
+
+    def _evaluate(
+        self, question: EvalQuestion, pipeline: PipelineName, available: int
+    ) -> QuestionResult:
+        rag = self.pipelines[pipeline]
+        retrieved: list[SearchResult] = []
+
+        def capture(query: str, results: list[SearchResult]) -> None:
+            retrieved.extend(results)
+
+        with self.timer.stage("search"):
+            if self.generate:
+                rag.query(question.query, top_k=self.k, on_retrieved=capture)
+            else:
+                retrieved = rag.retrieve(question.query, top_k=self.k)
+        # What the answerer is given; it is scored on the k nearest
+        prompt = self.answerer.build_prompt(retrieved, question.query)
+
+        relevance = [question.is_relevant(result) for result in retrieved[: self.k]]
+        return QuestionResult(
+            id=question.id,
+            pipeline=pipeline,
+            first_relevant_rank=relevance.index(True) + 1 if any(relevance) else None,
+            reciprocal_rank=reciprocal_rank(relevance),
+            ndcg=ndcg(relevance, available),
+            relevant_available=available,
+            prompt_tokens=self.answerer.prompt_tokens(prompt),
+            stages_ms=self.timer.take(),
+        )
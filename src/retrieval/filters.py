@@ -0,0 +1,119 @@
+"""Retrieval scopes and their translation into Chroma `where` clauses."""
+
+from collections.abc import Callable, Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.shared.models import MAX_SECTION_DEPTH, SECTION_PATH_SEPARATOR
+
+
+def section_key(depth: int) -> str:
+    """Metadata key holding the heading title at a given depth (1 = chapter)."""
+    return f"section_{depth}"
+
+
+def page_fields(page_range: Tuple[int, int]) -> Dict[str, int]:
+    """Numeric page bounds, so page scopes are range comparisons."""
+    return {"page_start": page_range[0], "page_end": page_range[1]}
+
+
+def section_fields(section_path: List[str]) -> Dict[str, str]:
+    """Flatten a heading path into one equality-filterable field per depth."""
+    return {
+        section_key(depth): title
+        for depth, title in enumerate(section_path[:MAX_SECTION_DEPTH], start=1)
+    }
+
+
+class SearchFilter(BaseModel):
+    """Restricts a vector search to part of the library."""
+
+    books: List[str] = Field(
+        default_factory=list, description="source_doc_title values to search in"
+    )
+    pages: Optional[Tuple[int, int]] = Field(
+        default=None, description="Inclusive page range chunks must overlap"
+    )
+    chapter: Optional[str] = Field(default=None, description="Top-level heading")
+    section: Optional[str] = Field(
+        default=None,
+        description="A heading title at any depth, or a 'Chapter > Section' path",
+    )
+
+    def to_where(self) -> Optional[Dict[str, Any]]:
+        clauses: List[Dict[str, Any]] = []
+        if len(self.books) == 1:
+            clauses.append({"source_doc_title": self.books[0]})
+        elif self.books:
+            clauses.append({"source_doc_title": {"$in": self.books}})
+        if self.pages:
+            # Overlap test on the numeric page fields written at ingest
+            first, last = self.pages
+            clauses.append({"page_start": {"$lte": last}})
+            clauses.append({"page_end": {"$gte": first}})
+        if self.chapter:
+            clauses.append({"chapter_name": self.chapter})
+        if self.section:
+            path = [part.strip() for part in self.section.split(SECTION_PATH_SEPARATOR)]
+            if len(path) == 1:
+                # A bare title matches the heading wherever it sits in the tree,
+                # which also covers every subsection below it
+                clauses.append(
+                    {
+                        "$or": [
+                            {section_key(depth): path[0]}
+                            for depth in range(1, MAX_SECTION_DEPTH + 1)
+                        ]
+                    }
+                )
+            else:
+                clauses.extend(
+                    {key: title} for key, title in section_fields(path).items()
+                )
+
+        if not clauses:
+            return None
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$and": clauses}
+
+    def matches(self, metadata: Mapping[str, Any]) -> bool:
+        """Evaluate the filter against flat store metadata, for in-process stores."""
+        return self.matcher()(metadata)
+
+    def matcher(self) -> Callable[[Mapping[str, Any]], bool]:
+        """matches() with the where clause built once, for testing many rows."""
+        where = self.to_where()
+        if where is None:
+            return lambda metadata: True
+        return lambda metadata: _matches_where(where, metadata)
+
+
+def _matches_where(where: Mapping[str, Any], metadata: Mapping[str, Any]) -> bool:
+    """The subset of Chroma's `where` semantics that SearchFilter produces."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches_where(clause, metadata) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches_where(clause, metadata) for clause in condition):
+                return False
+        elif isinstance(condition, Mapping):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$in":
+                    ok = value in operand
+                elif value is None:
+                    ok = False
+                elif operator == "$lte":
+                    ok = value <= operand
+                elif operator == "$gte":
+                    ok = value >= operand
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+                if not ok:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
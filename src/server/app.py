@@ -0,0 +1,221 @@
+"""HTTP API over one warm, shared AppContext.
+
+Every request uses the same embedder, vector store and generator as the
+process's AppContext. Handlers are async; embedding, vector search and
+generation are blocking calls and run in worker threads so they never stall
+the event loop. A RequestLimiter bounds the /query and /search requests in
+flight, and the generation scheduler bounds the LLM calls beneath them.
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from src.retrieval.filters import SearchFilter
+from src.shared.context import WARMUP_STEPS, AppContext, get_app_context
+from src.shared.models import SearchResult
+from src.utils.config import ServerConfig
+from src.utils.logger import logger
+from src.utils.metrics import metrics
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(min_length=1)
+    top_k: int = Field(default=5, ge=1, le=100, description="Results per query")
+    filters: SearchFilter | None = Field(default=None)
+
+
+class QueryRequest(SearchRequest):
+    stream: bool = Field(
+        default=False, description="Send the answer as server-sent events"
+    )
+    expand: bool = Field(
+        default=False, description="Also search with LLM-written query variations"
+    )
+
+
+class SearchResponse(BaseModel):
+    results: list[SearchResult]
+
+
+class QueryResponse(BaseModel):
+    answer: str
+    sources: list[SearchResult]
+
+
+class RequestLimiter:
+    """Bounds the requests in flight; others wait up to a timeout, then get 503."""
+
+    def __init__(self, config: ServerConfig) -> None:
+        self.limit = config.max_concurrent_requests
+        self.timeout = config.queue_timeout
+        self._slots = asyncio.Semaphore(self.limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except TimeoutError:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, try again later",
+                headers={"Retry-After": "1"},
+            ) from None
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.served += 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "served": self.served,
+            "rejected": self.rejected,
+        }
+
+
+def sse(event: str, data: Any) -> str:
+    """One server-sent event; data is JSON so newlines in text survive."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def create_app(context: AppContext | None = None) -> FastAPI:
+    context = context or get_app_context()
+    warming = set(WARMUP_STEPS)
+    failed: dict[str, str] = {}
+    limiter = RequestLimiter(context.config.server)
+
+    async def warm_up(step: str) -> None:
+        try:
+            await asyncio.to_thread(context.warm_up, step)
+        except Exception as e:
+            logger.error("Could not load the {}: {}", step, e)
+            failed[step] = str(e)
+        warming.discard(step)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        # Liveness answers at once, readiness once every step is loaded
+        tasks = [asyncio.create_task(warm_up(step)) for step in WARMUP_STEPS]
+        yield
+        for task in tasks:
+            task.cancel()
+
+    app = FastAPI(title="open-books", lifespan=lifespan)
+
+    # Blocking helpers, run in worker threads. Even reading a component off
+    # the context may block: the first read builds it
+    def retrieve(request: SearchRequest) -> list[SearchResult]:
+        queries = [request.query]
+        if isinstance(request, QueryRequest) and request.expand:
+            queries += context.query_constructor.refine_query(request.query)
+        return context.vector_store.query(
+            queries, n_result=request.top_k, filters=request.filters
+        )
+
+    def collect_stats() -> dict[str, Any]:
+        return {
+            "library": context.library_manager.get_stats(),
+            "requests": limiter.stats(),
+            "generation": context.generator.stats().model_dump(),
+            "perf": metrics.snapshot().summary(),
+            "warming": sorted(warming),
+        }
+
+    async def answer_events(
+        request: QueryRequest, results: list[SearchResult]
+    ) -> AsyncIterator[str]:
+        # Holds the request's slot until the last event is sent
+        try:
+            yield sse("sources", [r.model_dump(mode="json") for r in results])
+            answerer = await run_in_threadpool(lambda: context.answerer)
+            tokens = answerer.stream(results, request.query)
+            async for token in iterate_in_threadpool(tokens):
+                yield sse("token", {"text": token})
+            yield sse("done", {})
+        except Exception as e:
+            logger.error("Streaming an answer failed: {}", e)
+            yield sse("error", {"detail": str(e)})
+        finally:
+            limiter.release()
+
+    @app.get("/health/live")
+    async def live() -> dict[str, str]:
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def ready() -> JSONResponse:
+        pending = [step for step in WARMUP_STEPS if step in warming]
+        if pending or failed:
+            status = "failed" if failed else "loading"
+            return JSONResponse(
+                {"status": status, "pending": pending, "failed": failed},
+                status_code=503,
+            )
+        return JSONResponse({"status": "ready"})
+
+    @app.post("/search")
+    async def search(request: SearchRequest) -> SearchResponse:
+        """Retrieval only: the chunks nearest to the query."""
+        async with limiter.slot():
+            return SearchResponse(results=await run_in_threadpool(retrieve, request))
+
+    @app.post("/query", response_model=None)
+    async def query(request: QueryRequest) -> QueryResponse | StreamingResponse:
+        """Answer a question from the library, streamed as SSE if asked."""
+        if not request.stream:
+            async with limiter.slot():
+                results = await run_in_threadpool(retrieve, request)
+                answer = await run_in_threadpool(
+                    lambda: context.answerer.answer(results, request.query)
+                )
+            return QueryResponse(answer=answer, sources=results)
+
+        await limiter.acquire()
+        try:
+            results = await run_in_threadpool(retrieve, request)
+        except BaseException:
+            limiter.release()
+            raise
+        return StreamingResponse(
+            answer_events(request, results), media_type="text/event-stream"
+        )
+
+    @app.get("/stats")
+    async def stats() -> dict[str, Any]:
+        return await run_in_threadpool(collect_stats)
+
+    if context.config.metrics.prometheus:
+
+        @app.get("/metrics", response_class=PlainTextResponse)
+        async def prometheus() -> str:
+            """Stage timings since startup, in the Prometheus text format."""
+            return metrics.snapshot().to_prometheus()
+
+    return app
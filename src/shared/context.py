@@ -0,0 +1,164 @@
+"""One shared set of long-lived components per process.
+
+The embedding model, the Chroma client and the LLM generator are expensive
+to build. Each one is built once, on first use, and handed to whatever needs
+it: the CLI commands, LibraryManager, the pipelines and the TUI all read
+from the same AppContext, so e.g. `chat` opens the vector store once and can
+run a sync without reopening the database.
+"""
+
+import threading
+from collections.abc import Callable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from src.utils.config import ConfigModel, get_config
+from src.utils.logger import logger
+
+if TYPE_CHECKING:
+    from chromadb.api import ClientAPI
+
+    from src.generation.answerer import BaseQueryAnswerer
+    from src.generation.query_constructor import QueryConstructor
+    from src.generation.scheduler import GenerationScheduler
+    from src.ingestion.embedding.base_embed import TemplateEmbedder
+    from src.ingestion.indexer.manager import LibraryManager
+    from src.ingestion.vector_store.base_store import BaseVectorStore
+    from src.ingestion.vector_store.stores import RedisCache
+
+T = TypeVar("T")
+# Components worth loading before the first question, in display order
+WARMUP_STEPS = ("library", "embedder", "model")
+
+
+class AppContext:
+    """Lazily built, shared components; safe to use from worker threads."""
+
+    def __init__(self, config: ConfigModel | None = None) -> None:
+        self.config = config or get_config()
+        self._components: dict[str, Any] = {}
+        # A lock per component, held only while it is built: reading a built
+        # component never waits, and unrelated builds run side by side
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._build_locks_lock = threading.Lock()
+
+    def _get(self, name: str, factory: Callable[[], T]) -> T:
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        with self._build_locks_lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        with build_lock:
+            if name not in self._components:
+                logger.debug("Building shared {}", name)
+                self._components[name] = factory()
+            return self._components[name]
+
+    def is_built(self, name: str) -> bool:
+        return name in self._components
+
+    def warm_up(self, step: str) -> None:
+        """Load one of WARMUP_STEPS so the first question does not wait for it."""
+        if step == "library":
+            _ = self.library_manager  # built, with its store, on first read
+        elif step == "embedder":
+            # Loading the model is not enough: the first encode initializes torch
+            self.embedder.embed_text("warm up")
+        elif step == "model":
+            self.generator.warm_up()
+        else:
+            raise ValueError(f"Unknown warm-up step: {step}")
+
+    @property
+    def chroma_client(self) -> "ClientAPI":
+        def build() -> "ClientAPI":
+            import chromadb
+
+            return chromadb.PersistentClient(path=self.config.vector_store.client_path)
+
+        return self._get("chroma_client", build)
+
+    @property
+    def embedder(self) -> "TemplateEmbedder":
+        def build() -> "TemplateEmbedder":
+            from src.ingestion.embedding.get_embbedder import build_embedder
+
+            return build_embedder(self.config.embedding)
+
+        return self._get("embedder", build)
+
+    @property
+    def vector_store(self) -> "BaseVectorStore":
+        def build() -> "BaseVectorStore":
+            from src.ingestion.vector_store.numpy_store import NumpyStore
+            from src.ingestion.vector_store.stores import ChromaStore
+
+            # The stores load this context's embedder on their first embedding
+            store_config = self.config.vector_store
+            if store_config.backend == "numpy":
+                return NumpyStore(store_config, load_embedder=lambda: self.embedder)
+            return ChromaStore(
+                store_config,
+                client=self.chroma_client,
+                load_embedder=lambda: self.embedder,
+            )
+
+        return self._get("vector_store", build)
+
+    @property
+    def library_manager(self) -> "LibraryManager":
+        def build() -> "LibraryManager":
+            from src.ingestion.indexer.manager import LibraryManager
+
+            return LibraryManager(self.config.librery, store=self.vector_store)
+
+        return self._get("library_manager", build)
+
+    @property
+    def generator(self) -> "GenerationScheduler":
+        # Every LLM call of the process queues in this one scheduler
+        def build() -> "GenerationScheduler":
+            from src.generation.get_generator import get_generator
+            from src.generation.scheduler import GenerationScheduler
+
+            return GenerationScheduler.from_config(
+                get_generator(self.config.llm), self.config.llm
+            )
+
+        return self._get("generator", build)
+
+    @property
+    def query_constructor(self) -> "QueryConstructor":
+        def build() -> "QueryConstructor":
+            from src.generation.query_constructor import MultiQueryConstructor
+            from src.generation.scheduler import Priority
+
+            # Expansions yield to answers waiting for the model
+            return MultiQueryConstructor(
+                self.generator.with_priority(Priority.EXPANSION)
+            )
+
+        return self._get("query_constructor", build)
+
+    @property
+    def answerer(self) -> "BaseQueryAnswerer":
+        def build() -> "BaseQueryAnswerer":
+            from src.generation.answerer import QueryAnswerer
+
+            return QueryAnswerer(self.generator)
+
+        return self._get("answerer", build)
+
+    @property
+    def cache(self) -> "RedisCache":
+        def build() -> "RedisCache":
+            from src.ingestion.vector_store.stores import RedisCache
+
+            return RedisCache(self.config.redis, embedder=self.embedder)
+
+        return self._get("cache", build)
+
+
+@lru_cache(maxsize=1)
+def get_app_context() -> AppContext:
+    return AppContext()
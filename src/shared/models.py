@@ -1,12 +1,17 @@
-from typing import Tuple, Union
+from bisect import bisect_right
+from typing import List, Optional, Tuple, Union
 from uuid import UUID
 
 from pydantic import BaseModel, Field, field_serializer, field_validator
 
+SECTION_PATH_SEPARATOR = " > "
+MAX_SECTION_DEPTH = 6
+
 
 class MetaData(BaseModel):
     title: str = Field(default="Unknown", description="The book's name")
     nbr_pages: int = Field(default=1, description="Da number of PAGES", ge=1)
+    parser: str = Field(default="docling", description="The parser that produced it")
 
     @field_validator("title")
     @classmethod
@@ -16,9 +21,21 @@ class MetaData(BaseModel):
         return value.strip()
 
 
+class Section(BaseModel):
+    level: int = Field(ge=1, le=MAX_SECTION_DEPTH, description="Markdown heading level")
+    title: str
+    parent: Optional[int] = Field(
+        default=None, description="Index of the parent section, None for roots"
+    )
+    char_start: int = Field(default=0, ge=0, description="Where its heading starts")
+
+
 class Chapter(BaseModel):
     number: int = Field(ge=1)
     title: str
+    section: Optional[int] = Field(
+        default=None, description="Index of the section whose heading opens it"
+    )
     page_range: Tuple[int, int] = Field(description="Start and end page numbers")
     char_span: Tuple[int, int] = Field(description="da span of char")
 
@@ -45,6 +62,23 @@ class Chapter(BaseModel):
 
 class DocumentStructure(BaseModel):
     chapters: list[Chapter] = Field(min_length=1)
+    sections: list[Section] = Field(
+        default_factory=list, description="Heading tree, flattened in text order"
+    )
+
+    def section_path(self, index: Optional[int]) -> List[str]:
+        """Titles from the root heading down to the section at index."""
+        path: List[str] = []
+        while index is not None:
+            section = self.sections[index]
+            path.append(section.title)
+            index = section.parent
+        return path[::-1]
+
+    def section_at(self, char_pos: int) -> Optional[int]:
+        """Index of the innermost section open at char_pos, None before any."""
+        index = bisect_right(self.sections, char_pos, key=lambda s: s.char_start)
+        return index - 1 if index else None
 
 
 class ParsedDoc(BaseModel):
@@ -65,6 +99,9 @@ class ParsedDoc(BaseModel):
 class ChunkMetadata(BaseModel):
     source_doc_title: str = Field(description="The source document title")
     chapter_name: str = Field(description="The chapter name")
+    section_path: List[str] = Field(
+        default_factory=list, description="Heading titles from chapter to section"
+    )
     page_range: Tuple[int, int] = Field(description="Start and end page numbers")
     char_span: Tuple[int, int] = Field(description="span of charactres ig")
     chunk_id: UUID = Field(description="its understadable ig")
@@ -77,10 +114,21 @@ class ChunkMetadata(BaseModel):
             return (int(start), int(end))
         return value
 
+    @field_validator("section_path", mode="before")
+    @classmethod
+    def deserialize_path(cls, value: Union[List[str], str]) -> List[str]:
+        if isinstance(value, str):
+            return value.split(SECTION_PATH_SEPARATOR) if value else []
+        return value
+
     @field_serializer("page_range", "char_span")
     def serialize_tuple(self, value: Tuple[int, int]) -> str:
         return f"{value[0]}-{value[1]}"
 
+    @field_serializer("section_path")
+    def serialize_path(self, value: List[str]) -> str:
+        return SECTION_PATH_SEPARATOR.join(value)
+
 
 class Chunk(BaseModel):
     content: str = Field(description="same same but differeeent")
@@ -1,16 +1,24 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 from textual import on, work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import Container, VerticalScroll
 from textual.widgets import Footer, Header, Input, Label, ListItem, ListView
 
-from src.generation.answerer import QueryAnswerer
-from src.generation.generator import OllamaGenerator
 from src.generation.pipeline import SimpleRAGPipeline
-from src.ingestion.indexer.manager import LibraryManager
-from src.ingestion.vector_store.stores import get_ChromaStore
+from src.retrieval.filters import SearchFilter
+from src.shared.context import WARMUP_STEPS, AppContext, get_app_context
 from src.ui.widgets import AssistantMessage, ThinkingIndicator, UserMessage
-from src.utils.config import get_config
+
+if TYPE_CHECKING:
+    from src.ingestion.indexer.manager import LibraryManager
+    from src.ingestion.vector_store.base_store import BaseVectorStore
+
+QueuedQuestion = tuple[str, ThinkingIndicator, SearchFilter | None]
+# Indexed filenames and the chunk count, read off the UI thread
+LibraryState = tuple[list[str], int]
 
 
 class RAGApp(App):
@@ -33,6 +41,11 @@ class RAGApp(App):
         display: none;
     }
 
+    #book-list ListItem.in-scope {
+        background: $accent 40%;
+        text-style: bold;
+    }
+
     #chat-view {
         width: 1fr;
         height: 100%;
@@ -49,6 +62,13 @@ class RAGApp(App):
         margin: 1 2;
     }
 
+    #warmup-status {
+        dock: bottom;
+        margin: 0 3;
+        color: $text-muted;
+        text-style: italic;
+    }
+
     /* Base message styling */
     UserMessage {
         width: 100%;
@@ -104,6 +124,8 @@ class RAGApp(App):
         Binding("d", "toggle_dark", "Dark Mode"),
         Binding("s", "toggle_sidebar", "Sidebar"),
         Binding("ctrl+l", "clear_chat", "Clear"),
+        Binding("ctrl+a", "clear_scope", "All Books"),
+        Binding("ctrl+r", "sync_library", "Sync"),
         Binding("escape", "clear_input", "Clear Input", show=False),
         Binding("pageup", "scroll_page_up", "Scroll Up", show=False),
         Binding("pagedown", "scroll_page_down", "Scroll Down", show=False),
@@ -111,24 +133,39 @@ class RAGApp(App):
         Binding("down", "scroll_down", show=False),
     ]
 
-    def __init__(self):
+    def __init__(self, context: AppContext | None = None):
         super().__init__()
-        self.config = get_config()
-        self.library_manager = LibraryManager(self.config.librery)
-
-        # Initialize pipeline components
-        self.vector_store = get_ChromaStore()
-        self.generator = OllamaGenerator(self.config.llm)
-        self.answerer = QueryAnswerer(self.generator)
-        self.pipeline = SimpleRAGPipeline(self.vector_store, self.answerer)
+        self.context = context or get_app_context()
+        self.config = self.context.config
+        # Models and the store load in background workers after the first
+        # frame; questions asked until they are done wait in the queue
+        self.warming: set[str] = set(WARMUP_STEPS)
+        self.library: LibraryState | None = None
+        self.queued: list[QueuedQuestion] = []
+        self._pipeline: SimpleRAGPipeline | None = None
+
+        # Books (manifest filenames) selected in the sidebar; empty = whole library
+        self.scope: set[str] = set()
+
+    @property
+    def library_manager(self) -> "LibraryManager":
+        # The manager and the pipeline share one vector store (and DB client)
+        return self.context.library_manager
+
+    @property
+    def vector_store(self) -> "BaseVectorStore":
+        return self.context.vector_store
+
+    @property
+    def pipeline(self) -> SimpleRAGPipeline:
+        if self._pipeline is None:
+            self._pipeline = SimpleRAGPipeline(
+                self.context.vector_store, self.context.answerer
+            )
+        return self._pipeline
 
     def compose(self) -> ComposeResult:
         """Create child widgets for the app."""
-        # Get stats for subtitle
-        stats = self.library_manager.get_stats()
-        model_name = self.config.llm.model_name
-        subtitle = f"Model: {model_name} | Chunks: {stats['total_chunks']}"
-
         yield Header()
 
         with Container(id="sidebar"):
@@ -140,31 +177,129 @@ class RAGApp(App):
                 yield AssistantMessage(
                     "Hello! I'm your technical book assistant. Ask me anything about your library."
                 )
+            yield Label("", id="warmup-status")
             yield Input(placeholder="Type your question here...")
 
         yield Footer()
 
     def on_mount(self) -> None:
-        """Load books into sidebar on startup and focus input."""
-        self.refresh_library()
+        """Focus input and start loading the library and models."""
+        self.query_one("#book-list", ListView).mount(
+            ListItem(Label("Loading library..."))
+        )
         # Auto-focus the input
         self.query_one(Input).focus()
-        # Update title with stats
-        stats = self.library_manager.get_stats()
-        model_name = self.config.llm.model_name
-        self.sub_title = f"Model: {model_name} | Chunks: {stats['total_chunks']}"
+        self._update_subtitle()
+        self._show_warmup_status()
+
+        for step in WARMUP_STEPS:
+            self.warm_up(step)
+
+    @work(thread=True, group="warmup")
+    def warm_up(self, step: str) -> None:
+        """Run one warm-up step in the background and report back to the UI."""
+        error: Exception | None = None
+        library: LibraryState | None = None
+        try:
+            self.context.warm_up(step)
+            if step == "library":
+                library = self._read_library()
+        except Exception as e:
+            error = e
+        self.call_from_thread(self._warmed, step, library, error)
+
+    def _read_library(self) -> LibraryState:
+        """Resolve the manager and read it; only call from a worker thread."""
+        manager = self.library_manager
+        return list(manager.manifest), manager.get_stats()["total_chunks"]
 
-    def refresh_library(self) -> None:
-        """Refresh the list of books in the sidebar."""
+    def _warmed(
+        self, step: str, library: LibraryState | None, error: Exception | None
+    ) -> None:
+        self.warming.discard(step)
+        if error is not None:
+            self.notify(f"Could not load the {step}: {error}", severity="error")
+        elif library is not None:
+            self.show_library(library)
+        self._show_warmup_status()
+
+        if not self.warming and self.queued:
+            self.process_queued(self.queued)
+            self.queued = []
+
+    def _show_warmup_status(self) -> None:
+        status = self.query_one("#warmup-status", Label)
+        status.display = bool(self.warming)
+        pending = [step for step in WARMUP_STEPS if step in self.warming]
+        status.update(f"Loading {', '.join(pending)}...")
+
+    def _update_subtitle(self) -> None:
+        model_name = self.config.llm.model_name
+        chunks = self.library[1] if self.library is not None else "-"
+        scope = f"{len(self.scope)} book(s)" if self.scope else "all books"
+        self.sub_title = f"Model: {model_name} | Chunks: {chunks} | Scope: {scope}"
+
+    def _scope_filter(self) -> SearchFilter | None:
+        """Search filter for the books selected in the sidebar."""
+        if not self.scope:
+            return None
+        # Chunks are titled after the PDF's stem, the manifest keeps filenames
+        return SearchFilter(books=sorted(Path(name).stem for name in self.scope))
+
+    def show_library(self, library: LibraryState) -> None:
+        """Refresh the list of books in the sidebar and the chunk count."""
+        self.library = library
         book_list = self.query_one("#book-list", ListView)
         book_list.clear()
 
-        manifest = self.library_manager.manifest
-        if not manifest:
+        filenames, _ = library
+        if not filenames:
             book_list.mount(ListItem(Label("No books indexed")))
         else:
-            for filename in manifest.keys():
-                book_list.mount(ListItem(Label(filename)))
+            for filename in filenames:
+                item = ListItem(Label(filename), name=filename)
+                item.set_class(filename in self.scope, "in-scope")
+                book_list.mount(item)
+        self._update_subtitle()
+
+    @on(ListView.Selected, "#book-list")
+    def toggle_scope(self, event: ListView.Selected) -> None:
+        """Add or remove the selected book from the search scope."""
+        filename = event.item.name
+        if filename is None:
+            return
+        if filename in self.scope:
+            self.scope.discard(filename)
+        else:
+            self.scope.add(filename)
+        event.item.set_class(filename in self.scope, "in-scope")
+        self._update_subtitle()
+
+    def action_clear_scope(self) -> None:
+        """Search the whole library again."""
+        self.scope.clear()
+        for item in self.query("#book-list ListItem"):
+            item.remove_class("in-scope")
+        self._update_subtitle()
+
+    def action_sync_library(self) -> None:
+        """Sync the books folder into the already open vector store."""
+        self.notify("Syncing library...")
+        self.sync_library()
+
+    @work(exclusive=True, thread=True, group="sync")
+    def sync_library(self) -> None:
+        try:
+            self.library_manager.sync()
+            library = self._read_library()
+        except Exception as e:
+            self.call_from_thread(self.notify, f"Sync failed: {e}", severity="error")
+            return
+        self.call_from_thread(self._after_sync, library)
+
+    def _after_sync(self, library: LibraryState) -> None:
+        self.show_library(library)
+        self.notify("Library synced")
 
     def action_toggle_sidebar(self) -> None:
         """Toggle sidebar visibility."""
@@ -196,13 +331,20 @@ class RAGApp(App):
         container = self.query_one("#message-container", VerticalScroll)
         container.mount(UserMessage(query))
 
+        if self.warming:
+            thinking = ThinkingIndicator("Waiting for the models to load...")
+            container.mount(thinking)
+            container.scroll_end()
+            self.queued.append((query, thinking, self._scope_filter()))
+            return
+
         # Show thinking indicator
         thinking = ThinkingIndicator()
         container.mount(thinking)
         container.scroll_end()
 
         # Run pipeline in a worker
-        self.process_query(query, thinking)
+        self.process_query(query, thinking, self._scope_filter())
 
     def action_scroll_page_up(self) -> None:
         """Scroll page up."""
@@ -221,12 +363,29 @@ class RAGApp(App):
         self.query_one("#message-container", VerticalScroll).scroll_down()
 
     @work(exclusive=True, thread=True)
-    def process_query(self, query: str, thinking: ThinkingIndicator) -> None:
+    def process_query(
+        self,
+        query: str,
+        thinking: ThinkingIndicator,
+        filters: SearchFilter | None = None,
+    ) -> None:
         """Process the query using RAG pipeline in background."""
+        self._answer(query, thinking, filters)
+
+    @work(thread=True, group="queued")
+    def process_queued(self, questions: list[QueuedQuestion]) -> None:
+        """Answer the questions asked during warm-up, in order."""
+        for query, thinking, filters in questions:
+            self.call_from_thread(thinking.set_text, "Thinking...")
+            self._answer(query, thinking, filters)
+
+    def _answer(
+        self, query: str, thinking: ThinkingIndicator, filters: SearchFilter | None
+    ) -> None:
         container = self.query_one("#message-container", VerticalScroll)
 
         try:
-            answer = self.pipeline.query(query)
+            answer = self.pipeline.query(query, filters=filters)
             self.call_from_thread(
                 lambda: self._display_answer(container, answer, thinking)
             )
@@ -28,6 +28,14 @@ class AssistantMessage(Container):
 class ThinkingIndicator(Container):
     """A widget to show that the assistant is thinking."""
 
+    def __init__(self, text: str = "Thinking...") -> None:
+        super().__init__()
+        self.text = text
+
     def compose(self) -> ComposeResult:
         yield LoadingIndicator()
-        yield Static("Thinking...", classes="thinking-text")
+        yield Static(self.text, classes="thinking-text")
+
+    def set_text(self, text: str) -> None:
+        self.text = text
+        self.query_one(".thinking-text", Static).update(text)
@@ -1,7 +1,7 @@
 import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Any, Literal, Optional, cast
 
 import yaml
 from pydantic import BaseModel, Field
@@ -53,9 +53,10 @@ class LibreryConfig(BaseModel):
 
 
 class EmbeddingConfig(BaseModel):
-    provider: Literal["sentence_transformers"] = Field(
+    provider: Literal["sentence_transformers", "onnx"] = Field(
         default="sentence_transformers",
-        description="the basis to build our embedder on",
+        description="the basis to build our embedder on; 'onnx' runs the model "
+        "with ONNX Runtime on CPU",
     )
     model_name: str = Field(
         default="all-MiniLM-L6-v2",
@@ -69,19 +70,51 @@ class EmbeddingConfig(BaseModel):
         default="cpu", description="Hardware to run the model on"
     )
     batch_size: int = Field(default=32)
+    normalize: bool = Field(
+        default=True,
+        description="Unit-normalize embeddings so cosine and inner product agree",
+    )
+    onnx_quantization: Literal["none", "avx2", "avx512", "avx512_vnni", "arm64"] = (
+        Field(
+            default="none",
+            description="int8-quantize the ONNX export, tuned for this instruction set",
+        )
+    )
+    onnx_threads: Optional[int] = Field(
+        default=None,
+        description="ONNX Runtime intra-op threads (default: the CPUs this process may use)",
+    )
+    onnx_dir: Path = Field(
+        default=ROOT_Path / "models" / "onnx",
+        description="Where exported ONNX models are kept",
+    )
+    onnx_min_cosine: float = Field(
+        default=0.99,
+        description="An export is rejected if any check embedding's cosine to "
+        "PyTorch's falls below this",
+    )
 
 
 class LoggingConfig(BaseModel):
     log_dir: Path = Field(default=ROOT_Path / "logs")
-    # level: str = "INFO"
+    console_level: str = Field(default="WARNING", description="stderr sink level")
+    file_level: str = Field(default="DEBUG", description="Log file sinks level")
+    json_file: bool = Field(
+        default=True, description="Also write serialized records to app.json"
+    )
+    enqueue: bool = Field(
+        default=True,
+        description="Write file sinks from a background thread instead of the caller",
+    )
 
     def setup(self):
         self.log_dir.mkdir(parents=True, exist_ok=True)
 
 
 class ParsingConfig(BaseModel):
-    parser: Literal["marker", "docling"] = Field(
-        default="docling", description="PDF parser to use"
+    parser: Literal["marker", "docling", "pymupdf", "auto"] = Field(
+        default="docling",
+        description="PDF parser to use ('auto' picks pymupdf or docling per book)",
     )
     extract_images: bool = Field(
         default=True, description="Extract and store diagrams/figures"
@@ -93,11 +126,40 @@ class ParsingConfig(BaseModel):
         default=False, description="Use OCR for scanned PDFs (slow)"
     )
 
-    # # Font-based structure detection (for PyMuPDF)
-    # heading_font_threshold: float = Field(
-    #     default=1.2,
-    #     description="Font size multiplier to detect headings (e.g., 1.2x normal = heading)",
-    # )
+    # Page-parallel conversion of large books (docling)
+    parallel_min_pages: int = Field(
+        default=300,
+        ge=1,
+        description="Books with at least this many pages are converted in parallel",
+    )
+    parallel_workers: int = Field(
+        default=4,
+        ge=1,
+        description=(
+            "Worker processes for page-parallel conversion; each worker loads its "
+            "own Docling layout/table/formula models (roughly 1-2 GB RAM apiece)"
+        ),
+    )
+    parallel_range_pages: int = Field(
+        default=50, ge=1, description="Pages per range handed to a worker"
+    )
+
+    # Complexity sampling (for parser == "auto")
+    auto_sample_pages: int = Field(
+        default=8, ge=1, description="Pages sampled to estimate a book's complexity"
+    )
+    auto_complex_ratio: float = Field(
+        default=0.25,
+        ge=0,
+        le=1,
+        description="Fraction of complex sampled pages that sends a book to docling",
+    )
+
+    # Font-based structure detection (for PyMuPDF)
+    heading_font_threshold: float = Field(
+        default=1.2,
+        description="Font size multiplier to detect headings (e.g., 1.2x normal = heading)",
+    )
     # code_block_fonts: list[str] = Field(
     #     default=["Courier", "Consolas", "Monaco", "Monospace"],
     #     description="Font families that indicate code blocks",
@@ -131,8 +193,45 @@ class ChunkingConfig(BaseModel):
 
 
 class VectorStoreConfig(BaseModel):
+    backend: Literal["chroma", "numpy"] = Field(
+        default="chroma", description="Vector store implementation to use"
+    )
     client_path: Path = Field(default=ROOT_Path / "data" / "chroma_db")
     collection_name: str = Field(default="technical_books")
+    distance: Literal["cosine", "ip", "l2"] = Field(
+        default="cosine",
+        description="HNSW space; changing it needs the migrate-store command",
+    )
+    hnsw_m: int = Field(
+        default=16, ge=2, description="Graph links per node (fixed at creation)"
+    )
+    hnsw_ef_construction: int = Field(
+        default=100, ge=1, description="Build-time candidate list (fixed at creation)"
+    )
+    hnsw_ef_search: int = Field(
+        default=100, ge=1, description="Query-time candidate list; recall vs latency"
+    )
+    numpy_path: Path = Field(
+        default=ROOT_Path / "data" / "numpy_store",
+        description="Directory of the memory-mapped NumPy backend",
+    )
+    numpy_index: Literal["flat", "hnsw", "ivf"] = Field(
+        default="flat",
+        description="Exact search, or a FAISS index (needs faiss-cpu installed)",
+    )
+    ivf_nlist: int = Field(default=1024, ge=1, description="FAISS IVF cell count")
+    ivf_nprobe: int = Field(default=16, ge=1, description="FAISS IVF cells searched")
+    quantization: Literal["none", "int8", "binary"] = Field(
+        default="none",
+        description="Codes kept in memory for the flat scan; results are rescored",
+    )
+    rescore_factor: int = Field(
+        default=10, ge=1, description="Shortlist size per result rescored in float32"
+    )
+    validate_results: bool = Field(
+        default=False,
+        description="Fully validate query results with pydantic (debugging aid)",
+    )
 
 
 class RedisConfig(BaseModel):
@@ -147,6 +246,80 @@ class LLMConfig(BaseModel):
     api_key: Optional[str] = Field(default=None)
     base_url: Optional[str] = Field(default=None)
     temperature: float = Field(default=0.1, ge=0, le=1)
+    keep_alive: str = Field(
+        default="30m",
+        description="How long Ollama keeps the model loaded after a request",
+    )
+    num_ctx: int = Field(default=4096, ge=512, description="Context window (tokens)")
+    num_predict: int = Field(
+        default=512, description="Max tokens generated per answer (-1: no limit)"
+    )
+    num_thread: Optional[int] = Field(
+        default=None, ge=1, description="CPU threads for generation (None: Ollama's)"
+    )
+    cache_system_prompt: bool = Field(
+        default=True,
+        description="Send fixed instructions as a system message ahead of the "
+        "per-question text, so the server reuses their cached prefix",
+    )
+    request_timeout: float = Field(
+        default=120.0,
+        gt=0,
+        description="openai: seconds to wait for the server (per connect/read)",
+    )
+    max_retries: int = Field(
+        default=2, ge=0, description="openai: retries on connection errors, 429, 5xx"
+    )
+    max_connections: int = Field(
+        default=8, ge=1, description="openai: pooled keep-alive connections"
+    )
+    max_concurrency: int = Field(
+        default=1, ge=1, description="LLM calls (or batches) running at once"
+    )
+    max_batch_size: int = Field(
+        default=8,
+        ge=1,
+        description="Prompts handed over together to backends that batch (openai)",
+    )
+    batch_window_ms: float = Field(
+        default=10.0, ge=0, description="How long a batch waits to fill up"
+    )
+
+
+class ServerConfig(BaseModel):
+    host: str = Field(default="127.0.0.1", description="Interface `serve` binds")
+    port: int = Field(default=8000, ge=1, le=65535)
+    max_concurrent_requests: int = Field(
+        default=4, ge=1, description="/query and /search requests handled at once"
+    )
+    queue_timeout: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds a request waits for a free slot before a 503",
+    )
+
+
+class MetricsConfig(BaseModel):
+    enabled: bool = Field(
+        default=True, description="Time the pipeline stages (see `stats --perf`)"
+    )
+    prometheus: bool = Field(
+        default=False, description="Expose /metrics in Prometheus format on `serve`"
+    )
+
+
+class TracingConfig(BaseModel):
+    exporter: Literal["none", "console", "file", "opik", "otel"] = Field(
+        default="none", description="Where traces of answered questions go"
+    )
+    sample_rate: float = Field(
+        default=1.0, ge=0, le=1, description="Share of questions traced"
+    )
+    file_path: Path = Field(
+        default=ROOT_Path / "logs" / "traces.jsonl",
+        description="JSONL of spans for the file exporter",
+    )
+    opik_project: str = Field(default="open-books")
 
 
 class ConfigModel(BaseModel):
@@ -157,6 +330,9 @@ class ConfigModel(BaseModel):
     vector_store: VectorStoreConfig = Field(default_factory=VectorStoreConfig)
     redis: RedisConfig = Field(default_factory=RedisConfig)
     llm: LLMConfig = Field(default_factory=LLMConfig)
+    server: ServerConfig = Field(default_factory=ServerConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+    tracing: TracingConfig = Field(default_factory=TracingConfig)
     librery: LibreryConfig = Field(default_factory=LibreryConfig)
 
 
@@ -200,4 +376,14 @@ def get_config() -> ConfigModel:
     return Config().load()
 
 
-settings = get_config()
+class _LazySettings:
+    """Loads the config file on first attribute access instead of at import."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_config(), name)
+
+    def __repr__(self) -> str:
+        return repr(get_config())
+
+
+settings = cast(ConfigModel, _LazySettings())
@@ -1,36 +1,46 @@
+"""Application logging.
+
+Importing this module only re-exports loguru's logger; sinks are configured
+by an explicit setup_logger() call from the entry points (the CLI), so
+importing code never reads the config or opens log files.
+
+Log calls in loops should pass their arguments to loguru instead of using an
+f-string, e.g. ``logger.debug("Embedded {} chunks", n)``: the message is then
+only formatted when a sink accepts the level. Arguments that are expensive to
+compute can be deferred too, with ``logger.opt(lazy=True)`` and callables.
+"""
+
 import sys
-from functools import lru_cache
 
 from loguru import logger
 
-from src.utils.config import settings
+from src.utils.config import LoggingConfig, settings
 
+CONSOLE_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 
-@lru_cache()
-def setup_logger():
-    logging_dir = settings.logging.log_dir
+
+def setup_logger(config: LoggingConfig | None = None):
+    """(Re)configure the sinks; replaces every handler added before."""
+    config = config or settings.logging
+    config.setup()
     logger.remove()
-    logger.add(
-        sys.stderr,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="WARNING",
-    )
+    logger.add(sys.stderr, format=CONSOLE_FORMAT, level=config.console_level)
 
     logger.add(
-        logging_dir / "app.log",
+        config.log_dir / "app.log",
         rotation="500 MB",
         retention="10 days",
-        level="DEBUG",
+        level=config.file_level,
+        enqueue=config.enqueue,
     )
 
-    logger.add(
-        logging_dir / "app.json",
-        rotation="500 MB",
-        retention="10 days",
-        level="DEBUG",
-        serialize=True,
-    )
+    if config.json_file:
+        logger.add(
+            config.log_dir / "app.json",
+            rotation="500 MB",
+            retention="10 days",
+            level=config.file_level,
+            serialize=True,
+            enqueue=config.enqueue,
+        )
     return logger
-
-
-logger = setup_logger()
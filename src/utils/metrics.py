@@ -0,0 +1,213 @@
+"""In-process timers and counters for the ingestion and query hot paths.
+
+Instrumented code records into the process-wide ``metrics`` registry::
+
+    with metrics.timer("embed_batch"):
+        vectors = self._embed_batch(texts)
+    metrics.inc("texts_embedded", len(texts))
+
+Timings go into fixed-bucket histograms (the Prometheus layout), so memory
+stays constant however long the process runs and snapshots from several runs
+can be added up; percentiles are estimated from the buckets. A snapshot can
+be shown as a table, saved as JSON for `stats --perf`, or rendered in the
+Prometheus text exposition format.
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+# Upper bounds in seconds; a last, implicit bucket catches everything slower.
+# Wide on purpose: an embedding batch takes milliseconds, parsing a book minutes
+BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)  # fmt: skip
+PROMETHEUS_PREFIX = "openbooks"
+
+
+class TimerStats(BaseModel):
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    buckets: list[int] = Field(
+        default_factory=lambda: [0] * (len(BUCKETS) + 1),
+        description="Observations per bucket of BUCKETS, then the overflow",
+    )
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def merge(self, other: "TimerStats") -> None:
+        self.count += other.count
+        self.total_s += other.total_s
+        self.max_s = max(self.max_s, other.max_s)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Interpolated within the bucket holding it, as Prometheus does."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else self.max_s
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(value, self.max_s)
+            seen += count
+        return self.max_s
+
+
+class MetricsSnapshot(BaseModel):
+    since: datetime = Field(description="When the first merged recording started")
+    timers: dict[str, TimerStats] = Field(default_factory=dict)
+    counters: dict[str, float] = Field(default_factory=dict)
+
+    def merge(self, other: "MetricsSnapshot") -> "MetricsSnapshot":
+        """Both recordings added up, e.g. a saved snapshot and this run's."""
+        merged = self.model_copy(deep=True)
+        merged.since = min(self.since, other.since)
+        for name, stats in other.timers.items():
+            merged.timers.setdefault(name, TimerStats()).merge(stats)
+        for name, value in other.counters.items():
+            merged.counters[name] = merged.counters.get(name, 0.0) + value
+        return merged
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Count, total and latency percentiles per timer, in milliseconds."""
+        return {
+            name: {
+                "count": stats.count,
+                "total_s": stats.total_s,
+                "mean_ms": stats.mean_s * 1000,
+                "p50_ms": stats.quantile(0.5) * 1000,
+                "p95_ms": stats.quantile(0.95) * 1000,
+                "max_ms": stats.max_s * 1000,
+            }
+            for name, stats in self.timers.items()
+        }
+
+    def to_prometheus(self) -> str:
+        """Text exposition format: one histogram by stage, one counter each."""
+        name = f"{PROMETHEUS_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each instrumented stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, stats in sorted(self.timers.items()):
+            cumulative = 0
+            for bound, count in zip([*BUCKETS, "+Inf"], stats.buckets):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total_s}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats.count}')
+        for counter, value in sorted(self.counters.items()):
+            counter_name = f"{PROMETHEUS_PREFIX}_{counter}_total"
+            lines.append(f"# TYPE {counter_name} counter")
+            lines.append(f"{counter_name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so a reader never sees half a file
+        staging = path.with_suffix(".tmp")
+        staging.write_text(self.model_dump_json())
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "MetricsSnapshot | None":
+        if not path.exists():
+            return None
+        return cls.model_validate_json(path.read_text())
+
+
+class MetricsRegistry:
+    """Thread-safe timers and counters; recording costs a lock and a bisect."""
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._since = datetime.now()
+        self._timers: dict[str, TimerStats] = {}
+        self._counters: dict[str, float] = {}
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Time the block into the named histogram, failed runs included."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self._timers:
+                self._timers[name] = TimerStats()
+            self._timers[name].observe(seconds)
+
+    def inc(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def snapshot(self) -> MetricsSnapshot:
+        with self._lock:
+            return self._snapshot()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def flush(self, path: Path) -> MetricsSnapshot:
+        """Add the recordings to the snapshot saved at path and start afresh."""
+        with self._lock:
+            snapshot = self._snapshot()
+            self._reset()
+        saved = MetricsSnapshot.load(path)
+        if saved is not None:
+            snapshot = saved.merge(snapshot)
+        snapshot.save(path)
+        return snapshot
+
+    def _snapshot(self) -> MetricsSnapshot:
+        return MetricsSnapshot(
+            since=self._since,
+            timers={
+                name: stats.model_copy(deep=True)
+                for name, stats in self._timers.items()
+            },
+            counters=dict(self._counters),
+        )
+
+    def _reset(self) -> None:
+        self._since = datetime.now()
+        self._timers.clear()
+        self._counters.clear()
+
+
+metrics = MetricsRegistry()
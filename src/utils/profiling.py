@@ -0,0 +1,218 @@
+"""Opt-in cProfile and tracemalloc profiling of books and questions.
+
+Commands run with ``--profile`` start the process-wide ``profiler``; indexing
+a book and answering a question are then each profiled on their own::
+
+    with profiler.profile(name):
+        parsed_doc = self.parser.parse(file_path)
+        ...
+
+Each unit leaves a cProfile stats file under logs/profiles/ (a call tree for
+snakeviz, gprof2dot or ``python -m pstats``) and a text summary of its
+hottest functions and the lines whose allocations grew the most. When the
+profiler is not started, profile() costs one attribute check.
+
+cProfile only sees the thread that opens the unit: generation handed to the
+scheduler's workers shows up as time waiting on its result.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from src.utils.logger import logger
+
+TOP_N = 20
+# Traceback depth kept by tracemalloc; deeper costs more memory and time
+TRACEMALLOC_FRAMES = 10
+
+
+class FunctionStats(BaseModel):
+    function: str
+    calls: int
+    own_s: float
+    cumulative_s: float
+
+
+class AllocationStats(BaseModel):
+    location: str
+    grown_mb: float
+    blocks: int
+
+
+class ProfileReport(BaseModel):
+    label: str
+    seconds: float
+    peak_mb: float | None
+    profile_path: Path
+    summary_path: Path
+    functions: list[FunctionStats]
+    allocations: list[AllocationStats]
+
+
+def _location(file: str, line: int, function: str) -> str:
+    # Paths from site-packages start at the package, which names the culprit
+    file = re.sub(r".*[/\\]site-packages[/\\]", "", file)
+    return f"{file}:{line}({function})"
+
+
+def hot_functions(stats: pstats.Stats, top_n: int = TOP_N) -> list[FunctionStats]:
+    """The functions that spent the most time in their own code."""
+    rows = sorted(
+        stats.stats.items(),  # type: ignore[attr-defined]
+        key=lambda item: item[1][2],
+        reverse=True,
+    )
+    return [
+        FunctionStats(
+            function=_location(*key),
+            calls=calls,
+            own_s=own,
+            cumulative_s=cumulative,
+        )
+        for key, (_, calls, own, cumulative, _) in rows[:top_n]
+    ]
+
+
+class Profiler:
+    """Profiles one unit of work at a time; idle until start() is called."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.output_dir = Path("profiles")
+        self.top_n = TOP_N
+        self.reports: list[ProfileReport] = []
+        # cProfile cannot run twice at once; nested or concurrent units
+        # are left to the one already being profiled
+        self._busy = threading.Lock()
+        self._started_tracemalloc = False
+
+    def start(self, output_dir: Path, top_n: int = TOP_N) -> None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = output_dir
+        self.top_n = top_n
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[None]:
+        if not self.enabled or not self._busy.acquire(blocking=False):
+            yield
+            return
+        try:
+            yield from self._profile(label)
+        finally:
+            self._busy.release()
+
+    def _profile(self, label: str) -> Iterator[None]:
+        memory = tracemalloc.is_tracing()
+        if memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            seconds = time.perf_counter() - started
+            allocations: list[AllocationStats] = []
+            peak_mb = None
+            if memory:
+                peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                allocations = self._grown(before, tracemalloc.take_snapshot())
+            self._save(label, profile, seconds, peak_mb, allocations)
+
+    def _grown(
+        self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+    ) -> list[AllocationStats]:
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        differences = after.filter_traces(ignore).compare_to(
+            before.filter_traces(ignore), "lineno"
+        )
+        return [
+            AllocationStats(
+                location=_location(
+                    difference.traceback[0].filename,
+                    difference.traceback[0].lineno,
+                    "",
+                ).removesuffix("()"),
+                grown_mb=difference.size_diff / 2**20,
+                blocks=difference.count_diff,
+            )
+            for difference in differences[: self.top_n]
+            if difference.size_diff > 0
+        ]
+
+    def _save(
+        self,
+        label: str,
+        profile: cProfile.Profile,
+        seconds: float,
+        peak_mb: float | None,
+        allocations: list[AllocationStats],
+    ) -> None:
+        slug = re.sub(r"[^\w.-]+", "_", label).strip("_")[:60]
+        stem = f"{datetime.now():%Y%m%d-%H%M%S}-{len(self.reports):03d}-{slug}"
+        profile_path = self.output_dir / f"{stem}.prof"
+        summary_path = self.output_dir / f"{stem}.txt"
+        profile.dump_stats(profile_path)
+
+        text = io.StringIO()
+        stats = pstats.Stats(profile, stream=text)
+        text.write(f"{label}: {seconds:.2f}s")
+        if peak_mb is not None:
+            text.write(f", peak traced memory {peak_mb:.1f} MB")
+        text.write("\n")
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        stats.sort_stats("tottime").print_stats(self.top_n)
+        if allocations:
+            text.write("Allocations grown the most:\n")
+            for allocation in allocations:
+                text.write(
+                    f"  {allocation.grown_mb:10.2f} MB {allocation.blocks:8d} blocks"
+                    f"  {allocation.location}\n"
+                )
+        summary_path.write_text(text.getvalue())
+
+        self.reports.append(
+            ProfileReport(
+                label=label,
+                seconds=seconds,
+                peak_mb=peak_mb,
+                profile_path=profile_path,
+                summary_path=summary_path,
+                functions=hot_functions(stats, self.top_n),
+                allocations=allocations,
+            )
+        )
+        logger.info("Profiled {} in {:.2f}s: {}", label, seconds, profile_path)
+
+    def hot_functions(self) -> list[FunctionStats]:
+        """Hottest functions over every unit profiled so far."""
+        if not self.reports:
+            return []
+        stats = pstats.Stats(*(str(report.profile_path) for report in self.reports))
+        return hot_functions(stats, self.top_n)
+
+
+profiler = Profiler()
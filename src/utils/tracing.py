@@ -0,0 +1,326 @@
+"""Request tracing with pluggable exporters.
+
+A question answered by a RAG pipeline is one trace: a root span with a child
+span per stage (query expansion, embedding, vector search, generation).
+Stages open spans with ``tracer.span(...)``; outside a trace that is a no-op,
+so the same embedder and store code runs untraced during a sync::
+
+    with tracer.trace("rag.query", query=query) as root:
+        with tracer.span("retrieve") as span:
+            results = store.query([query], n_result=5)
+            span.set(results=len(results))
+
+Whether a trace is recorded is decided once, at its root, by the configured
+sample rate. A finished trace is handed to the exporter as a whole: the
+console, a JSONL file, Opik or OpenTelemetry. Spans follow the caller's
+context, so work handed to another thread (the generation scheduler's
+workers) is timed by the span that waits for it.
+"""
+
+import atexit
+import random
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Literal
+from uuid import uuid4
+
+from pydantic import BaseModel, Field
+
+from src.utils.config import TracingConfig, settings
+from src.utils.logger import logger
+
+SpanKind = Literal["general", "llm", "retrieval"]
+
+
+class Span(BaseModel):
+    name: str
+    kind: SpanKind = "general"
+    trace_id: str
+    span_id: str = Field(default_factory=lambda: uuid4().hex[:16])
+    parent_id: str | None = None
+    start: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    end: datetime | None = None
+    attributes: dict[str, Any] = Field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end or datetime.now(UTC)
+        return (end - self.start).total_seconds() * 1000
+
+
+class _NoopSpan:
+    """Stands in for a span when nothing is being recorded."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+# The innermost open span of the running request, and its trace's spans
+_current: ContextVar[tuple[Span, list[Span]] | None] = ContextVar(
+    "current_span", default=None
+)
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """Send one finished trace, root span first."""
+
+    def shutdown(self) -> None:
+        """Flush anything still buffered; called once at exit."""
+
+
+class ConsoleExporter(SpanExporter):
+    """Prints each trace as an indented tree on stderr."""
+
+    def export(self, spans: list[Span]) -> None:
+        depth = {None: -1}
+        lines = []
+        for span in spans:
+            depth[span.span_id] = depth.get(span.parent_id, 0) + 1
+            attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            lines.append(
+                f"{'  ' * depth[span.span_id]}{span.name} {span.duration_ms:.1f} ms"
+                + (f" {attributes}" if attributes else "")
+                + (f" ERROR {span.error}" if span.error else "")
+            )
+        print(f"trace {spans[0].trace_id}\n" + "\n".join(lines), file=sys.stderr)
+
+
+class FileExporter(SpanExporter):
+    """Appends one JSON line per span."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(span.model_dump_json() + "\n" for span in spans)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(lines)
+
+
+class OpikExporter(SpanExporter):
+    """Logs traces to an Opik project; the client uploads in the background."""
+
+    def __init__(self, project_name: str) -> None:
+        import opik
+
+        self.client = opik.Opik(project_name=project_name)
+
+    def export(self, spans: list[Span]) -> None:
+        root = spans[0]
+        created = {
+            root.span_id: self.client.trace(
+                name=root.name,
+                start_time=root.start,
+                end_time=root.end,
+                input={"query": root.attributes.get("query")},
+                output={"answer": root.attributes.get("answer")},
+                metadata=root.attributes,
+            )
+        }
+        for span in spans[1:]:
+            # Spans are recorded as they open, so a parent precedes its children
+            created[span.span_id] = created[span.parent_id].span(
+                name=span.name,
+                type="llm" if span.kind == "llm" else "general",
+                start_time=span.start,
+                end_time=span.end,
+                metadata=span.attributes,
+                usage=_usage(span.attributes),
+            )
+
+    def shutdown(self) -> None:
+        self.client.flush()
+
+
+class OTelExporter(SpanExporter):
+    """Replays traces into the OpenTelemetry tracer provider set up by the host.
+
+    Exporting them on (OTLP, Jaeger...) is the provider's business, e.g. via
+    the opentelemetry-instrument launcher and its OTEL_* variables.
+    """
+
+    def __init__(self) -> None:
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "tracing.exporter 'otel' needs OpenTelemetry: "
+                "uv sync --extra otel (or pip install opentelemetry-sdk)"
+            ) from e
+
+        self.trace = trace
+        self.tracer = trace.get_tracer("open-books")
+
+    def export(self, spans: list[Span]) -> None:
+        created: dict[str, Any] = {}
+        for span in spans:
+            parent = created.get(span.parent_id)
+            otel_span = self.tracer.start_span(
+                span.name,
+                context=self.trace.set_span_in_context(parent) if parent else None,
+                start_time=_ns(span.start),
+                attributes={
+                    key: _otel_value(value) for key, value in span.attributes.items()
+                },
+            )
+            if span.error:
+                otel_span.set_status(self.trace.StatusCode.ERROR, span.error)
+            created[span.span_id] = otel_span
+        # Children end before their parents
+        for span in reversed(spans):
+            created[span.span_id].end(end_time=_ns(span.end or span.start))
+
+
+def _otel_value(value: Any) -> Any:
+    """OpenTelemetry takes primitives and lists of them; anything else as text."""
+    primitives = (str, bool, int, float)
+    if isinstance(value, primitives):
+        return value
+    if isinstance(value, list) and all(isinstance(v, primitives) for v in value):
+        return value
+    return str(value)
+
+
+def _ns(moment: datetime) -> int:
+    return int(moment.timestamp() * 1e9)
+
+
+def _usage(attributes: dict[str, Any]) -> dict[str, int] | None:
+    if "prompt_tokens" not in attributes:
+        return None
+    usage = {
+        "prompt_tokens": attributes["prompt_tokens"],
+        "completion_tokens": attributes.get("completion_tokens", 0),
+    }
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    return usage
+
+
+class Tracer:
+    """Opens spans and hands sampled, finished traces to an exporter."""
+
+    def __init__(
+        self, exporter: SpanExporter | None = None, sample_rate: float = 1.0
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+        """A new trace, or a span when one is already running."""
+        if _current.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+        if self.exporter is None or random.random() >= self.sample_rate:
+            yield NOOP_SPAN
+            return
+
+        root = Span(name=name, trace_id=uuid4().hex, attributes=attributes)
+        spans = [root]
+        try:
+            with self._open(root, spans):
+                yield root
+        finally:
+            # Failed requests are exported too, with the error on their spans
+            self._export(spans)
+
+    @contextmanager
+    def span(
+        self, name: str, kind: SpanKind = "general", **attributes: Any
+    ) -> Iterator[Span | _NoopSpan]:
+        """A child of the current span; a no-op outside a sampled trace."""
+        current = _current.get()
+        if current is None:
+            yield NOOP_SPAN
+            return
+
+        parent, spans = current
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id,
+            parent_id=parent.span_id,
+            attributes=attributes,
+        )
+        spans.append(span)
+        with self._open(span, spans):
+            yield span
+
+    @contextmanager
+    def _open(self, span: Span, spans: list[Span]) -> Iterator[None]:
+        token = _current.set((span, spans))
+        try:
+            yield
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = datetime.now(UTC)
+            _current.reset(token)
+
+    def _export(self, spans: list[Span]) -> None:
+        assert self.exporter is not None
+        started = time.perf_counter()
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            # Tracing must never fail the request it observes
+            logger.warning("Exporting trace {} failed: {}", spans[0].trace_id, e)
+            return
+        logger.debug(
+            "Exported {} spans in {:.1f} ms",
+            len(spans),
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def get_span_exporter(config: TracingConfig) -> SpanExporter | None:
+    if config.exporter == "none":
+        return None
+    elif config.exporter == "console":
+        return ConsoleExporter()
+    elif config.exporter == "file":
+        return FileExporter(config.file_path)
+    elif config.exporter == "opik":
+        return OpikExporter(config.opik_project)
+    elif config.exporter == "otel":
+        return OTelExporter()
+    raise ValueError(f"Unknown trace exporter: {config.exporter}")
+
+
+tracer = Tracer()
+_shutdown_registered = False
+
+
+def setup_tracing(config: TracingConfig | None = None) -> Tracer:
+    """(Re)configure the process tracer's exporter and sample rate."""
+    global _shutdown_registered
+    config = config or settings.tracing
+    tracer.exporter = get_span_exporter(config)
+    tracer.sample_rate = config.sample_rate
+    if not _shutdown_registered:
+        atexit.register(tracer.shutdown)
+        _shutdown_registered = True
+    return tracer
@@ -0,0 +1,174 @@
+"""Unit tests for batch question answering."""
+
+import json
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from src.generation.answerer import BaseQueryAnswerer
+from src.generation.batch import BatchAnswerer, load_answered, read_questions
+from src.shared.models import SearchResult
+from src.utils.profiling import Profiler
+
+
+class CountingAnswerer(BaseQueryAnswerer):
+    """Answers after a short delay, tracking how many run at once."""
+
+    def __init__(self, fail: set[str] | None = None) -> None:
+        self.fail = fail or set()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.asked: list[str] = []
+
+    def answer(self, result_search: list[SearchResult], query: str) -> str:
+        with self.lock:
+            self.asked.append(query)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        if query in self.fail:
+            return "Error: model not found"
+        return f"answer to {query}"
+
+
+def write_questions(path: Path, queries: list[str]) -> Path:
+    path.write_text(
+        "".join(
+            json.dumps({"id": f"q{i}", "query": query}) + "\n"
+            for i, query in enumerate(queries)
+        )
+    )
+    return path
+
+
+def read_output(path: Path) -> dict[str, dict]:
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    return {record["id"]: record for record in records}
+
+
+def vector_store() -> MagicMock:
+    store = MagicMock()
+    store.query_batch.side_effect = lambda sentences, n_result, filters: [
+        [] for _ in sentences
+    ]
+    return store
+
+
+class TestBatchAnswerer:
+    """Bulk retrieval, bounded generation and resumable output."""
+
+    def test_answers_every_question(self, tmp_path: Path) -> None:
+        questions = write_questions(tmp_path / "q.jsonl", ["a", "b", "c", "d", "e"])
+        store = vector_store()
+        runner = BatchAnswerer(store, CountingAnswerer(), top_k=3, chunk_size=2)
+
+        summary = runner.run(questions, tmp_path / "out.jsonl")
+
+        output = read_output(tmp_path / "out.jsonl")
+        assert {key: record["answer"] for key, record in output.items()} == {
+            f"q{i}": f"answer to {query}" for i, query in enumerate("abcde")
+        }
+        assert summary.answered == 5
+        # One retrieval call per chunk of questions
+        assert [call.args[0] for call in store.query_batch.call_args_list] == [
+            ["a", "b"],
+            ["c", "d"],
+            ["e"],
+        ]
+        assert store.query_batch.call_args.args[1] == 3
+
+    def test_bounds_parallel_generation(self, tmp_path: Path) -> None:
+        questions = write_questions(tmp_path / "q.jsonl", [str(i) for i in range(12)])
+        answerer = CountingAnswerer()
+
+        BatchAnswerer(vector_store(), answerer, parallel=3).run(
+            questions, tmp_path / "out.jsonl"
+        )
+
+        assert answerer.max_running <= 3
+        assert len(answerer.asked) == 12
+
+    def test_records_failures(self, tmp_path: Path) -> None:
+        questions = write_questions(tmp_path / "q.jsonl", ["ok", "broken"])
+        runner = BatchAnswerer(vector_store(), CountingAnswerer(fail={"broken"}))
+
+        summary = runner.run(questions, tmp_path / "out.jsonl")
+
+        output = read_output(tmp_path / "out.jsonl")
+        assert output["q1"]["answer"] is None
+        assert output["q1"]["error"] == "model not found"
+        assert (summary.answered, summary.failed) == (1, 1)
+
+    def test_resumes_where_it_stopped(self, tmp_path: Path) -> None:
+        questions = write_questions(tmp_path / "q.jsonl", ["a", "b", "c"])
+        output = tmp_path / "out.jsonl"
+        output.write_text(
+            json.dumps({"id": "q0", "query": "a", "answer": "old", "error": None})
+            + "\n"
+            + json.dumps({"id": "q1", "query": "b", "answer": None, "error": "x"})
+            + "\n"
+            + '{"id": "q2", "query": "c", "ans'
+        )
+        answerer = CountingAnswerer()
+
+        summary = BatchAnswerer(vector_store(), answerer).run(questions, output)
+
+        assert sorted(answerer.asked) == ["b", "c"]
+        assert summary.skipped == 1
+        records = read_output(output)
+        assert records["q0"]["answer"] == "old"
+        assert records["q1"]["answer"] == "answer to b"
+        assert len(output.read_text().splitlines()) == 3
+
+    def test_restart_discards_previous_output(self, tmp_path: Path) -> None:
+        questions = write_questions(tmp_path / "q.jsonl", ["a"])
+        output = tmp_path / "out.jsonl"
+        output.write_text(json.dumps({"id": "q0", "answer": "old"}) + "\n")
+
+        BatchAnswerer(vector_store(), CountingAnswerer()).run(
+            questions, output, resume=False
+        )
+
+        assert read_output(output)["q0"]["answer"] == "answer to a"
+
+    def test_each_question_is_profiled(self, tmp_path: Path, monkeypatch) -> None:
+        profiler = Profiler()
+        profiler.start(tmp_path / "profiles")
+        monkeypatch.setattr("src.generation.batch.profiler", profiler)
+        questions = write_questions(tmp_path / "q.jsonl", ["a", "b", "c"])
+        runner = BatchAnswerer(
+            vector_store(), CountingAnswerer(), parallel=1, chunk_size=2
+        )
+
+        try:
+            runner.run(questions, tmp_path / "out.jsonl")
+        finally:
+            profiler.stop()
+
+        assert [report.label for report in profiler.reports] == [
+            "retrieve q0-q1",
+            "q0 a",
+            "q1 b",
+            "retrieve q2-q2",
+            "q2 c",
+        ]
+
+
+class TestQuestionFiles:
+    """Reading questions and earlier output."""
+
+    def test_missing_ids_default_to_line_numbers(self, tmp_path: Path) -> None:
+        path = tmp_path / "q.jsonl"
+        path.write_text('{"query": "a"}\n\n{"id": "x", "query": "b"}\n')
+
+        assert [(q.id, q.query) for q in read_questions(path)] == [
+            ("1", "a"),
+            ("x", "b"),
+        ]
+
+    def test_nothing_answered_without_output(self, tmp_path: Path) -> None:
+        assert load_answered(tmp_path / "missing.jsonl") == set()
@@ -0,0 +1,132 @@
+"""Unit tests for OllamaGenerator request options and streaming."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from ollama import ChatResponse
+
+from src.generation.answerer import QueryAnswerer
+from src.generation.generator import OllamaGenerator, OpenAIGenerator
+from src.generation.get_generator import get_generator
+from src.shared.models import SearchResult
+from src.utils.config import LLMConfig
+
+
+def stream(*parts: str) -> list[ChatResponse]:
+    chunks = [
+        ChatResponse(message={"role": "assistant", "content": part}) for part in parts
+    ]
+    chunks.append(
+        ChatResponse(
+            message={"role": "assistant", "content": ""},
+            done=True,
+            load_duration=2_000_000,
+            prompt_eval_count=12,
+            eval_count=len(parts),
+        )
+    )
+    return chunks
+
+
+@pytest.fixture
+def mock_ollama(mocker) -> MagicMock:
+    ollama = mocker.patch("src.generation.generator.ollama")
+    ollama.chat.return_value = iter(stream("Hello", ", world"))
+    return ollama
+
+
+class TestOllamaGenerator:
+    """Tests for options, keep-alive and message layout."""
+
+    def test_streams_and_joins_the_answer(self, mock_ollama: MagicMock) -> None:
+        generator = OllamaGenerator(LLMConfig(), auto_setup=False)
+
+        assert generator.generate("Hi?") == "Hello, world"
+        assert mock_ollama.chat.call_args.kwargs["stream"] is True
+
+    def test_passes_options_on_every_call(self, mock_ollama: MagicMock) -> None:
+        config = LLMConfig(keep_alive="1h", num_ctx=8192, num_predict=256, num_thread=6)
+        generator = OllamaGenerator(config, auto_setup=False)
+
+        generator.generate("Hi?")
+        generator.warm_up()
+
+        for call in (mock_ollama.chat.call_args, mock_ollama.generate.call_args):
+            assert call.kwargs["keep_alive"] == "1h"
+            assert call.kwargs["options"] == {
+                "temperature": config.temperature,
+                "num_ctx": 8192,
+                "num_predict": 256,
+                "num_thread": 6,
+            }
+
+    def test_thread_count_defaults_to_ollama(self) -> None:
+        generator = OllamaGenerator(LLMConfig(), auto_setup=False)
+
+        assert "num_thread" not in generator.options
+
+    def test_system_prompt_leads_the_messages(self, mock_ollama: MagicMock) -> None:
+        generator = OllamaGenerator(LLMConfig(), auto_setup=False)
+
+        generator.generate("Question", system="Rules")
+
+        assert mock_ollama.chat.call_args.kwargs["messages"] == [
+            {"role": "system", "content": "Rules"},
+            {"role": "user", "content": "Question"},
+        ]
+
+    def test_system_prompt_inlined_without_prefix_cache(
+        self, mock_ollama: MagicMock
+    ) -> None:
+        generator = OllamaGenerator(
+            LLMConfig(cache_system_prompt=False), auto_setup=False
+        )
+
+        generator.generate("Question", system="Rules")
+
+        assert mock_ollama.chat.call_args.kwargs["messages"] == [
+            {"role": "user", "content": "Rules\n\nQuestion"}
+        ]
+
+    def test_empty_stream_is_an_empty_answer(self, mock_ollama: MagicMock) -> None:
+        mock_ollama.chat.return_value = iter([])
+        generator = OllamaGenerator(LLMConfig(), auto_setup=False)
+
+        assert list(generator.stream("Hi?")) == []
+
+    def test_errors_are_returned_as_text(self, mock_ollama: MagicMock) -> None:
+        mock_ollama.chat.side_effect = ConnectionError("refused")
+        generator = OllamaGenerator(LLMConfig(), auto_setup=False)
+
+        assert generator.generate("Hi?") == "Error: refused"
+
+
+class TestQueryAnswerer:
+    """Tests for the prompt layout sent to the generator."""
+
+    def test_instructions_are_sent_as_system_prompt(self) -> None:
+        generator = MagicMock()
+        generator.generate.return_value = " An answer "
+        answerer = QueryAnswerer(generator)
+        results = [SearchResult.model_construct(content="Monads wrap values")]
+
+        assert answerer.answer(results, "What?") == "An answer"
+        prompt = generator.generate.call_args.args[0]
+        assert generator.generate.call_args.kwargs["system"] == answerer.instructions
+        assert answerer.instructions not in prompt
+        assert "What?" in prompt
+
+
+class TestGetGenerator:
+    """Tests for provider selection."""
+
+    def test_selects_ollama(self, mock_ollama: MagicMock) -> None:
+        assert isinstance(get_generator(LLMConfig(provider="ollama")), OllamaGenerator)
+
+    def test_selects_openai_compatible(self) -> None:
+        config = LLMConfig(provider="openai", base_url="http://127.0.0.1:9/v1")
+
+        generator = get_generator(config)
+
+        assert isinstance(generator, OpenAIGenerator)
+        assert str(generator.client.base_url) == "http://127.0.0.1:9/v1/"
@@ -0,0 +1,134 @@
+"""Integration tests for OpenAIGenerator against a local stub server."""
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.generation.generator import OpenAIGenerator
+from src.utils.config import LLMConfig
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.requests: list[dict] = []
+        self.peers: set[tuple[str, int]] = set()
+        self.failures = 0
+        self.delay = 0.0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal /v1/models and streaming /v1/chat/completions."""
+
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def do_GET(self) -> None:
+        self.server.peers.add(self.client_address)
+        model = {"id": "stub", "object": "model", "created": 0, "owned_by": "test"}
+        self._send(
+            200, "application/json", json.dumps({"object": "list", "data": [model]})
+        )
+
+    def do_POST(self) -> None:
+        self.server.peers.add(self.client_address)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        if self.server.failures:
+            self.server.failures -= 1
+            self._send(503, "application/json", json.dumps({"error": "busy"}))
+            return
+        time.sleep(self.server.delay)
+        events = [self._chunk({"role": "assistant"})]
+        events += [self._chunk({"content": part}) for part in ("Hel", "lo")]
+        stream = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+        self._send(200, "text/event-stream", stream + "data: [DONE]\n\n")
+
+    @staticmethod
+    def _chunk(delta: dict) -> dict:
+        return {
+            "id": "chunk",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "stub",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+
+    def _send(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_server() -> Iterator[StubServer]:
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_generator(server: StubServer, **overrides) -> OpenAIGenerator:
+    config = LLMConfig(
+        provider="openai", model_name="stub", base_url=server.base_url, **overrides
+    )
+    return OpenAIGenerator(config)
+
+
+@pytest.mark.integration
+class TestOpenAIGenerator:
+    """Streaming, pooling, retry and timeout behaviour."""
+
+    def test_streams_the_answer(self, stub_server: StubServer) -> None:
+        generator = make_generator(stub_server, num_predict=64)
+
+        assert generator.generate("Question", system="Rules") == "Hello"
+        request = stub_server.requests[0]
+        assert request["stream"] is True
+        assert request["max_tokens"] == 64
+        assert request["messages"][0] == {"role": "system", "content": "Rules"}
+
+    def test_reuses_one_connection(self, stub_server: StubServer) -> None:
+        generator = make_generator(stub_server)
+
+        generator.warm_up()
+        for _ in range(3):
+            generator.generate("Question")
+
+        assert len(stub_server.requests) == 3
+        assert len(stub_server.peers) == 1
+
+    def test_retries_server_errors(self, stub_server: StubServer) -> None:
+        stub_server.failures = 1
+        generator = make_generator(stub_server, max_retries=1)
+
+        assert generator.generate("Question") == "Hello"
+        assert len(stub_server.requests) == 2
+
+    def test_times_out(self, stub_server: StubServer) -> None:
+        stub_server.delay = 2.0
+        generator = make_generator(stub_server, request_timeout=0.2, max_retries=0)
+
+        started = time.perf_counter()
+        answer = generator.generate("Question")
+
+        assert answer.startswith("Error:")
+        assert time.perf_counter() - started < 1.5
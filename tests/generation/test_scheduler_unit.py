@@ -0,0 +1,157 @@
+"""Unit tests for the generation scheduler."""
+
+import threading
+import time
+
+import pytest
+
+from src.generation.generator import BaseGenerator
+from src.generation.scheduler import GenerationScheduler, Priority
+
+
+class RecordingGenerator(BaseGenerator):
+    """Echoes prompts; the first call can be held until released."""
+
+    def __init__(self, supports_batching: bool = False) -> None:
+        self.supports_batching = supports_batching
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+        self.calls: list[list[str]] = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt: str, system: str | None = None) -> str:
+        return self.generate_batch([prompt], system)[0]
+
+    def generate_batch(
+        self, prompts: list[str], system: str | None = None
+    ) -> list[str]:
+        with self.lock:
+            self.calls.append(prompts)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.started.set()
+        self.release.wait(timeout=5)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        return [f"answer to {prompt}" for prompt in prompts]
+
+
+def hold(generator: RecordingGenerator, scheduler: GenerationScheduler):
+    """Occupy the single worker so later submissions queue up."""
+    generator.release.clear()
+    future = scheduler.submit("blocker")
+    assert generator.started.wait(timeout=5)
+    return future
+
+
+class TestGenerationScheduler:
+    """Concurrency limit, priorities, batching and stats."""
+
+    def test_answers_come_back_to_their_caller(self) -> None:
+        scheduler = GenerationScheduler(RecordingGenerator())
+
+        assert scheduler.generate("q1") == "answer to q1"
+        scheduler.shutdown()
+
+    def test_limits_concurrency(self) -> None:
+        generator = RecordingGenerator()
+        scheduler = GenerationScheduler(generator, max_concurrency=2)
+
+        futures = [scheduler.submit(f"q{i}") for i in range(8)]
+        results = [future.result(timeout=5) for future in futures]
+        scheduler.shutdown()
+
+        assert results == [f"answer to q{i}" for i in range(8)]
+        assert generator.max_running == 2
+
+    def test_answers_overtake_expansions(self) -> None:
+        generator = RecordingGenerator()
+        scheduler = GenerationScheduler(generator)
+        blocker = hold(generator, scheduler)
+
+        expansion = scheduler.with_priority(Priority.EXPANSION)
+        expanded = threading.Thread(target=expansion.generate, args=("expand",))
+        expanded.start()
+        while scheduler.stats().waiting < 1:
+            time.sleep(0.001)
+        answer = scheduler.submit("answer")
+        generator.release.set()
+
+        blocker.result(timeout=5)
+        answer.result(timeout=5)
+        expanded.join(timeout=5)
+        scheduler.shutdown()
+
+        assert generator.calls == [["blocker"], ["answer"], ["expand"]]
+
+    def test_batches_queued_prompts_for_batching_backends(self) -> None:
+        generator = RecordingGenerator(supports_batching=True)
+        scheduler = GenerationScheduler(generator, max_batch_size=2)
+        blocker = hold(generator, scheduler)
+
+        futures = [scheduler.submit(f"q{i}") for i in range(3)]
+        generator.release.set()
+        results = [future.result(timeout=5) for future in [blocker, *futures]]
+        scheduler.shutdown()
+
+        assert results[1:] == ["answer to q0", "answer to q1", "answer to q2"]
+        assert generator.calls == [["blocker"], ["q0", "q1"], ["q2"]]
+        assert scheduler.stats().mean_batch_size == pytest.approx(4 / 3)
+
+    def test_no_batches_without_backend_support(self) -> None:
+        generator = RecordingGenerator()
+        scheduler = GenerationScheduler(generator, max_batch_size=8)
+        blocker = hold(generator, scheduler)
+
+        futures = [scheduler.submit(f"q{i}") for i in range(2)]
+        generator.release.set()
+        for future in [blocker, *futures]:
+            future.result(timeout=5)
+        scheduler.shutdown()
+
+        assert generator.calls == [["blocker"], ["q0"], ["q1"]]
+
+    def test_errors_reach_the_caller(self) -> None:
+        generator = RecordingGenerator()
+        generator.generate_batch = lambda prompts, system=None: 1 / 0
+        scheduler = GenerationScheduler(generator)
+
+        with pytest.raises(ZeroDivisionError):
+            scheduler.generate("q")
+        scheduler.shutdown()
+
+        assert scheduler.stats().failed == 1
+
+    def test_records_queue_waits_per_priority(self) -> None:
+        generator = RecordingGenerator()
+        scheduler = GenerationScheduler(generator)
+        blocker = hold(generator, scheduler)
+
+        queued = scheduler.submit("q", priority=Priority.EXPANSION)
+        time.sleep(0.05)
+        generator.release.set()
+        blocker.result(timeout=5)
+        queued.result(timeout=5)
+        scheduler.shutdown()
+
+        stats = scheduler.stats()
+        assert stats.priorities["answer"].completed == 1
+        assert stats.priorities["expansion"].completed == 1
+        assert stats.priorities["expansion"].wait_p50_ms >= 40
+        assert stats.waiting == 0
+        assert stats.running == 0
+
+    def test_streams_tokens_without_batching(self) -> None:
+        generator = RecordingGenerator(supports_batching=True)
+        generator.stream = lambda prompt, system=None: iter(["a", "b"])
+        scheduler = GenerationScheduler(generator, max_batch_size=4)
+
+        assert list(scheduler.stream("q")) == ["a", "b"]
+        scheduler.shutdown()
+
+        assert generator.calls == []
+        assert scheduler.stats().batches == 1
@@ -3,7 +3,14 @@
 import pytest
 from uuid import UUID
 from src.ingestion.chunking.chunker import MarkdownChunker
-from src.shared.models import Chapter, Chunk
+from src.shared.models import (
+    Chapter,
+    Chunk,
+    DocumentStructure,
+    MetaData,
+    ParsedDoc,
+    Section,
+)
 
 
 class TestMarkdownChunkerUnit:
@@ -118,3 +125,78 @@ class TestMarkdownChunkerUnit:
 
         # 3. Valid UUIDs
         assert isinstance(chunks[0].metadata.chunk_id, UUID)
+
+    def test_chunk_records_section_path(self):
+        """Chunks carry the heading path; chapter_name is the root heading."""
+        text = "A" * 60 + "B" * 60
+        structure = DocumentStructure(
+            sections=[
+                Section(level=1, title="Part I"),
+                Section(level=2, title="Intro", parent=0),
+            ],
+            chapters=[
+                Chapter(
+                    number=1,
+                    title="Part I",
+                    section=0,
+                    page_range=(1, 1),
+                    char_span=(0, 60),
+                ),
+                Chapter(
+                    number=2,
+                    title="Intro",
+                    section=1,
+                    page_range=(2, 2),
+                    char_span=(60, 120),
+                ),
+            ],
+        )
+        doc = ParsedDoc(
+            text=text,
+            metadata=MetaData(title="Book", nbr_pages=2),
+            structure=structure,
+            page_map={1: (0, 60), 2: (60, 120)},
+        )
+
+        chunks = MarkdownChunker(chunk_size=100, chunk_overlap=0).chunk(doc)
+
+        assert [c.metadata.section_path for c in chunks] == [
+            ["Part I"],
+            ["Part I", "Intro"],
+        ]
+        assert {c.metadata.chapter_name for c in chunks} == {"Part I"}
+
+    def test_split_chunks_follow_deeper_sections(self):
+        """A chapter split into chunks records the subsection each starts in."""
+        text = "A" * 40 + "B" * 40 + "C" * 40
+        structure = DocumentStructure(
+            sections=[
+                Section(level=1, title="Part I", char_start=0),
+                Section(level=3, title="Lemma", parent=0, char_start=40),
+                Section(level=4, title="Proof", parent=1, char_start=80),
+            ],
+            chapters=[
+                Chapter(
+                    number=1,
+                    title="Part I",
+                    section=0,
+                    page_range=(1, 1),
+                    char_span=(0, 120),
+                ),
+            ],
+        )
+        doc = ParsedDoc(
+            text=text,
+            metadata=MetaData(title="Book", nbr_pages=1),
+            structure=structure,
+            page_map={1: (0, 120)},
+        )
+
+        chunks = MarkdownChunker(chunk_size=10, chunk_overlap=0).chunk(doc)
+
+        assert [c.metadata.section_path for c in chunks] == [
+            ["Part I"],
+            ["Part I", "Lemma"],
+            ["Part I", "Lemma", "Proof"],
+        ]
+        assert {c.metadata.chapter_name for c in chunks} == {"Part I"}
@@ -34,7 +34,7 @@ def sample_page_map() -> dict[int, tuple[int, int]]:
 
 @pytest.fixture
 def sample_text_with_breaks(parser: DoclingParser) -> str:
-    """Sample markdown text with page breaks for testing _build_page_map."""
+    """Sample markdown text with page breaks for page map tests."""
     page_break = parser.PAGE_BREAK
     return (
         f"Page 1 content here{page_break}Page 2 has more text{page_break}Final page 3"
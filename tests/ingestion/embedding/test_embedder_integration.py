@@ -1,7 +1,8 @@
 import pytest
 from src.ingestion.embedding.embedder import SentenceTransformerEmbedder
-from src.ingestion.embedding.get_embbedder import get_embedder
+from src.ingestion.embedding.get_embbedder import build_embedder
 from src.shared.models import Chunk, ChunkMetadata, EmbeddedChunk
+from src.utils.config import EmbeddingConfig
 from uuid import uuid4
 from unittest.mock import MagicMock
 
@@ -42,12 +43,13 @@ class TestEmbedderIntegration:
         assert results[0].vector_id == chunk.metadata.chunk_id
 
     def test_factory_test(self, mocker):
-        mock_settings = mocker.patch("src.ingestion.embedding.get_embbedder.settings")
-        mock_settings.embedding.provider = "sentence_transformers"
-        mock_settings.embedding.dimensions = 384
-        mock_settings.embedding.model_name = "test-factory-model"
-        mock_settings.embedding.batch_size = 16
-        mock_settings.embedding.device = "cpu"
+        config = EmbeddingConfig(
+            provider="sentence_transformers",
+            dimensions=384,
+            model_name="test-factory-model",
+            batch_size=16,
+            device="cpu",
+        )
 
         # We need to mock SentenceTransformer constructor inside the factory call to avoid real load
         mocker.patch("src.ingestion.embedding.embedder.SentenceTransformer")
@@ -59,7 +61,7 @@ class TestEmbedderIntegration:
         mock_st_instance.get_sentence_embedding_dimension.return_value = 384
         mock_st_class.return_value = mock_st_instance
 
-        embedder = get_embedder()
+        embedder = build_embedder(config)
         assert isinstance(embedder, SentenceTransformerEmbedder)
         assert embedder.batch_size == 16
         assert embedder.model_name == "test-factory-model"
@@ -52,6 +52,20 @@ class TestTemplateEmbedder:
         assert len(result) == 0
         mock_logger.warning.assert_called_with("Skipping 1 empty chunks")
 
+    def test_embed_batch_normalizes_when_enabled(self, mock_template_embedder):
+        mock_template_embedder.normalize = True
+        mock_template_embedder._embed_batch = MagicMock(
+            return_value=[[3.0, 4.0], [0.0, 0.0]]
+        )
+
+        result = mock_template_embedder.embed_batch(["a", "b"])
+
+        assert result[0] == pytest.approx([0.6, 0.8])
+        assert result[1] == [0.0, 0.0]
+
+    def test_embed_batch_passes_through_by_default(self, mock_template_embedder):
+        assert mock_template_embedder.embed_batch(["abc"]) == [[3.0]]
+
 
 class TestSentenceTransformerEmbedder:
     def test_init_dimension_mismatch(self, mocker):
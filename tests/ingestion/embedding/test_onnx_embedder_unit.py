@@ -0,0 +1,121 @@
+"""Unit tests for the ONNX Runtime embedder."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from src.ingestion.embedding import onnx_embedder
+from src.ingestion.embedding.get_embbedder import build_embedder
+from src.ingestion.embedding.onnx_embedder import (
+    CHECK_TEXTS,
+    VERIFIED_FILE,
+    OnnxEmbedder,
+    cosine_agreement,
+)
+from src.utils.config import EmbeddingConfig
+
+DIM = 8
+
+
+class FakeSentenceTransformers:
+    """Stands in for the PyTorch and ONNX models; the ONNX one drifts by noise."""
+
+    def __init__(self, noise: float = 0.0) -> None:
+        self.noise = noise
+        self.loaded: list[tuple[str, str | None]] = []
+        rng = np.random.default_rng(0)
+        self.reference = rng.normal(size=(len(CHECK_TEXTS), DIM)).astype(np.float32)
+        self.drift = rng.normal(size=self.reference.shape).astype(np.float32)
+
+    def __call__(self, path, device="cpu", backend=None, model_kwargs=None):
+        self.loaded.append((str(path), backend))
+        model = MagicMock()
+        model.get_sentence_embedding_dimension.return_value = DIM
+        model.save_pretrained.side_effect = self.save
+        vectors = self.reference
+        if backend == "onnx":
+            vectors = self.reference + self.noise * self.drift
+        model.encode.return_value = vectors
+        return model
+
+    @staticmethod
+    def save(path: str) -> None:
+        (Path(path) / "onnx").mkdir(parents=True)
+        (Path(path) / "onnx" / "model.onnx").write_bytes(b"onnx")
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    """ONNX Runtime without the optimum backend, which is not needed here."""
+    monkeypatch.setattr(onnx_embedder, "_import_onnxruntime", MagicMock())
+
+
+def make_embedder(tmp_path: Path, **kwargs) -> OnnxEmbedder:
+    return OnnxEmbedder(
+        expected_dim=DIM, model_name="org/mini-lm", onnx_dir=tmp_path, **kwargs
+    )
+
+
+class TestOnnxEmbedder:
+    def test_export_is_verified_and_reused(self, tmp_path, runtime, mocker):
+        models = FakeSentenceTransformers(noise=0.001)
+        mocker.patch.object(onnx_embedder, "SentenceTransformer", models)
+
+        make_embedder(tmp_path)
+
+        export_dir = tmp_path / "org--mini-lm-none"
+        verified = json.loads((export_dir / VERIFIED_FILE).read_text())
+        assert verified["file_name"] == "onnx/model.onnx"
+        assert verified["worst_cosine"] > 0.99
+        assert not export_dir.with_name("org--mini-lm-none.tmp").exists()
+
+        # A second start loads the export alone
+        models.loaded.clear()
+        make_embedder(tmp_path)
+        assert models.loaded == [(str(export_dir), "onnx")]
+
+    def test_drifting_export_is_rejected(self, tmp_path, runtime, mocker):
+        mocker.patch.object(
+            onnx_embedder, "SentenceTransformer", FakeSentenceTransformers(noise=1.0)
+        )
+
+        with pytest.raises(ValueError, match="drifts from PyTorch"):
+            make_embedder(tmp_path, min_cosine=0.99)
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_missing_runtime_names_the_install(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "optimum.onnxruntime", None)
+
+        with pytest.raises(ImportError, match="--extra onnx"):
+            onnx_embedder._import_onnxruntime()
+
+    def test_session_uses_the_configured_threads(self, monkeypatch):
+        ort = pytest.importorskip("onnxruntime")
+        monkeypatch.setattr(onnx_embedder, "_import_onnxruntime", lambda: ort)
+
+        options = onnx_embedder.session_options(threads=3)
+
+        assert options.intra_op_num_threads == 3
+        assert options.inter_op_num_threads == 1
+        assert onnx_embedder.session_options().intra_op_num_threads >= 1
+
+    def test_cosine_agreement_per_row(self):
+        a = np.array([[1.0, 0.0], [0.0, 2.0]])
+        b = np.array([[3.0, 0.0], [1.0, 0.0]])
+
+        assert cosine_agreement(a, b) == pytest.approx([1.0, 0.0])
+
+
+def test_factory_builds_onnx_embedder(tmp_path, mocker):
+    embedder_class = mocker.patch.object(onnx_embedder, "OnnxEmbedder")
+    config = EmbeddingConfig(provider="onnx", onnx_dir=tmp_path)
+
+    assert build_embedder(config) is embedder_class.return_value
+    kwargs = embedder_class.call_args.kwargs
+    assert kwargs["onnx_dir"] == tmp_path
+    assert kwargs["quantization"] == "none"
@@ -4,17 +4,25 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from src.ingestion.parsers import parsers
 from src.ingestion.parsers.parsers import DoclingParser
 from src.shared.models import DocumentStructure
 
 
+def _extract_structure(
+    parser: DoclingParser, text: str, page_map: dict[int, tuple[int, int]]
+) -> DocumentStructure:
+    headers = parser._scan_markdown(text).headers
+    return parser._build_structure(headers, len(text), page_map)
+
+
 class TestBuildPageMap:
-    """Tests for the _build_page_map method."""
+    """Tests for the page map produced by _scan_markdown."""
 
     def test_build_page_map_single_page(self, parser: DoclingParser) -> None:
         """Verify page map with single page content (no page breaks)."""
         text = "Single page content only"
-        result = parser._build_page_map(text)
+        result = parser._scan_markdown(text).page_map
 
         assert len(result) == 1
         assert result[1] == (0, len(text))
@@ -23,7 +31,7 @@ class TestBuildPageMap:
         self, parser: DoclingParser, sample_text_with_breaks: str
     ) -> None:
         """Verify character ranges across multiple pages."""
-        result = parser._build_page_map(sample_text_with_breaks)
+        result = parser._scan_markdown(sample_text_with_breaks).page_map
 
         assert len(result) == 3
         # Verify page 1 starts at 0
@@ -36,7 +44,7 @@ class TestBuildPageMap:
         """Edge case: empty page content between breaks."""
         page_break = parser.PAGE_BREAK
         text = f"Content{page_break}{page_break}More content"
-        result = parser._build_page_map(text)
+        result = parser._scan_markdown(text).page_map
 
         assert len(result) == 3
         # Second page should have zero length
@@ -50,7 +58,7 @@ class TestBuildPageMap:
         page3 = "CC"  # 2 chars
         text = f"{page1}{page_break}{page2}{page_break}{page3}"
 
-        result = parser._build_page_map(text)
+        result = parser._scan_markdown(text).page_map
 
         assert result[1] == (0, 4)
         assert result[2] == (4, 10)
@@ -58,13 +66,13 @@ class TestBuildPageMap:
 
 
 class TestFindPageForChar:
-    """Tests for the _find_page_for_char method."""
+    """Tests for the _page_lookup binary search."""
 
     def test_find_page_for_char_first_page(
         self, parser: DoclingParser, sample_page_map: dict[int, tuple[int, int]]
     ) -> None:
         """Character at start of document should be page 1."""
-        result = parser._find_page_for_char(0, sample_page_map)
+        result = parser._page_lookup(sample_page_map)(0)
         assert result == 1
 
     def test_find_page_for_char_middle_page(
@@ -72,7 +80,7 @@ class TestFindPageForChar:
     ) -> None:
         """Character in middle of document."""
         # Character at position 150 should be on page 2 (100-250)
-        result = parser._find_page_for_char(150, sample_page_map)
+        result = parser._page_lookup(sample_page_map)(150)
         assert result == 2
 
     def test_find_page_for_char_last_page(
@@ -80,7 +88,7 @@ class TestFindPageForChar:
     ) -> None:
         """Character at end of document."""
         # Character at position 350 should be on page 3 (250-400)
-        result = parser._find_page_for_char(350, sample_page_map)
+        result = parser._page_lookup(sample_page_map)(350)
         assert result == 3
 
     def test_find_page_for_char_boundary(
@@ -88,23 +96,23 @@ class TestFindPageForChar:
     ) -> None:
         """Character exactly at page boundary."""
         # Position 100 is start of page 2
-        result = parser._find_page_for_char(100, sample_page_map)
+        result = parser._page_lookup(sample_page_map)(100)
         assert result == 2
 
         # Position 99 is last char of page 1
-        result = parser._find_page_for_char(99, sample_page_map)
+        result = parser._page_lookup(sample_page_map)(99)
         assert result == 1
 
     def test_find_page_for_char_out_of_range(
         self, parser: DoclingParser, sample_page_map: dict[int, tuple[int, int]]
     ) -> None:
         """Out-of-bounds position should return last page."""
-        result = parser._find_page_for_char(999, sample_page_map)
+        result = parser._page_lookup(sample_page_map)(999)
         assert result == 3  # Last page
 
 
 class TestExtractStructureFromMarkdown:
-    """Tests for the _extract_structure_from_markdown method."""
+    """Tests for structure extraction (_scan_markdown + _build_structure)."""
 
     def test_extract_structure_with_headers(
         self,
@@ -113,8 +121,8 @@ class TestExtractStructureFromMarkdown:
         sample_markdown_with_headers: str,
     ) -> None:
         """Multiple # and ## markdown headers are extracted."""
-        result = parser._extract_structure_from_markdown(
-            sample_markdown_with_headers, sample_page_map
+        result = _extract_structure(
+            parser, sample_markdown_with_headers, sample_page_map
         )
 
         assert isinstance(result, DocumentStructure)
@@ -125,7 +133,7 @@ class TestExtractStructureFromMarkdown:
     ) -> None:
         """Fallback chapter when no headers found."""
         text = "This is plain text without any markdown headers at all."
-        result = parser._extract_structure_from_markdown(text, sample_page_map)
+        result = _extract_structure(parser, text, sample_page_map)
 
         assert len(result.chapters) == 1
         assert result.chapters[0].title == "Full Document"
@@ -136,7 +144,7 @@ class TestExtractStructureFromMarkdown:
     ) -> None:
         """Edge case: only one header in document."""
         text = "# Single Header\n\nContent after the header."
-        result = parser._extract_structure_from_markdown(text, sample_page_map)
+        result = _extract_structure(parser, text, sample_page_map)
 
         assert len(result.chapters) == 1
         assert result.chapters[0].title == "Single Header"
@@ -149,8 +157,8 @@ class TestExtractStructureFromMarkdown:
         sample_markdown_with_headers: str,
     ) -> None:
         """Last chapter's char_span ends at len(text)."""
-        result = parser._extract_structure_from_markdown(
-            sample_markdown_with_headers, sample_page_map
+        result = _extract_structure(
+            parser, sample_markdown_with_headers, sample_page_map
         )
 
         last_chapter = result.chapters[-1]
@@ -163,8 +171,8 @@ class TestExtractStructureFromMarkdown:
         sample_markdown_with_headers: str,
     ) -> None:
         """Chapter numbers should be sequential starting from 1."""
-        result = parser._extract_structure_from_markdown(
-            sample_markdown_with_headers, sample_page_map
+        result = _extract_structure(
+            parser, sample_markdown_with_headers, sample_page_map
         )
 
         for i, chapter in enumerate(result.chapters, start=1):
@@ -189,7 +197,7 @@ class TestExtractStructureFromMarkdown:
         expected_first_title: str,
     ) -> None:
         """Parametrized test for various markdown header scenarios."""
-        result = parser._extract_structure_from_markdown(markdown, sample_page_map)
+        result = _extract_structure(parser, markdown, sample_page_map)
 
         assert len(result.chapters) == expected_count
         assert result.chapters[0].title == expected_first_title
@@ -261,3 +269,208 @@ class TestExtractMetadata:
         # Empty string is falsy, so should fallback to "Unknown"
         assert result.title == "Unknown"
         assert result.nbr_pages == 2
+
+
+class TestParallelConversion:
+    """Tests for page-range splitting and stitching of large documents."""
+
+    def test_page_ranges_cover_document(self) -> None:
+        parser = DoclingParser(parallel_range_pages=50)
+
+        result = parser._page_ranges(120)
+
+        assert result == [(1, 50), (51, 100), (101, 120)]
+
+    def test_convert_page_range_keeps_empty_pages_aligned(self) -> None:
+        """An empty first page must not shift later pages of the range."""
+        page_break = DoclingParser.PAGE_BREAK
+        pages = {4: "", 5: "page five", 6: "", 7: "page seven"}
+        mock_converter = MagicMock()
+        mock_document = mock_converter.convert.return_value.document
+        mock_document.export_to_markdown.side_effect = lambda page_no: pages[page_no]
+
+        with (
+            patch("src.ingestion.parsers.parsers._worker_converter", None),
+            patch(
+                "src.ingestion.parsers.parsers._build_docling_converter",
+                return_value=mock_converter,
+            ),
+        ):
+            result = parsers._convert_page_range("book.pdf", (4, 7), num_threads=1)
+
+        mock_converter.convert.assert_called_once_with("book.pdf", page_range=(4, 7))
+        segments = [segment.strip() for segment in result.split(page_break)]
+        assert segments == ["", "page five", "", "page seven"]
+
+    def test_parse_stitches_ranges_into_global_page_map(
+        self, parser: DoclingParser
+    ) -> None:
+        page_break = parser.PAGE_BREAK
+        first = f"# Part One\n\n{'a' * 60}{page_break}{'b' * 40}"
+        second = f"# Part Two\n\n{'c' * 30}{page_break}{'d' * 20}"
+        parser.parallel_min_pages = 4
+        parser.parallel_range_pages = 2
+
+        with (
+            patch.object(parser, "_count_pages", return_value=4),
+            patch(
+                "src.ingestion.parsers.parsers.ProcessPoolExecutor"
+            ) as mock_pool_class,
+        ):
+            mock_pool = mock_pool_class.return_value.__enter__.return_value
+            mock_pool.map.return_value = iter([first, second])
+            result = parser.parse("book.pdf")
+
+        assert result.metadata.nbr_pages == 4
+        assert sorted(result.page_map) == [1, 2, 3, 4]
+        assert result.page_map[2][1] == result.page_map[3][0]
+        assert [c.title for c in result.structure.chapters] == ["Part One", "Part Two"]
+        assert result.structure.chapters[1].page_range == (3, 4)
+
+
+class TestScanMarkdown:
+    """Tests for the single-pass markdown post-processing."""
+
+    def test_scan_strips_breaks_and_maps_pages(self, parser: DoclingParser) -> None:
+        page_break = parser.PAGE_BREAK
+        text = f"# One\nAAAA\n{page_break}## Two\nBB{page_break}CC"
+
+        result = parser._scan_markdown(text)
+
+        assert page_break not in result.text
+        assert result.page_map == {1: (0, 11), 2: (11, 20), 3: (20, 22)}
+        assert result.headers == [(1, "One", 0), (2, "Two", 11)]
+
+    def test_scan_removes_duplicate_reference_sections(
+        self, parser: DoclingParser
+    ) -> None:
+        page_break = parser.PAGE_BREAK
+        text = (
+            "# Chapter 1\nBody one.\n\n## References\n\n[1] Foo.\n[2] Bar.\n\n"
+            f"# Chapter 2\nBody two.\n{page_break}## References\n\n[1] Foo.\n"
+            "- Baz.\n\n# Chapter 3\nBody three.\n"
+        )
+
+        result = parser._scan_markdown(text)
+
+        assert result.removed_references == 1
+        assert result.text.count("References") == 1
+        assert result.text.count("[1] Foo.") == 1
+        assert "- Baz." not in result.text
+        titles = [title for _, title, _ in result.headers]
+        assert titles == ["Chapter 1", "References", "Chapter 2", "Chapter 3"]
+        for _, title, pos in result.headers:
+            assert result.text[pos:].lstrip("#").lstrip().startswith(title)
+        page_two_start = result.text.index("Body two.\n") + len("Body two.\n")
+        assert result.page_map[2] == (page_two_start, len(result.text))
+
+    def test_scan_ignores_header_after_mid_line_break(
+        self, parser: DoclingParser
+    ) -> None:
+        text = f"text{parser.PAGE_BREAK}# Not a header"
+
+        result = parser._scan_markdown(text)
+
+        assert result.headers == []
+
+    def test_scan_without_deduplication_keeps_text(self, parser: DoclingParser) -> None:
+        text = "References\n[1] A\n\nReferences\n[1] A\n"
+
+        result = parser._scan_markdown(text, deduplicate_references=False)
+
+        assert result.text == text
+        assert result.removed_references == 0
+
+    def test_scan_keeps_bibliography_after_toc_entry(
+        self, parser: DoclingParser
+    ) -> None:
+        """A table-of-contents "References" line is not a reference section."""
+        text = (
+            "# Contents\n\nReferences\n\nIntro\n\n# Chapter 1\n\nbody\n\n"
+            "## References\n\n- [1] Foo\n- [2] Bar\n\n# Chapter 2\n"
+        )
+
+        result = parser._scan_markdown(text)
+
+        assert result.removed_references == 0
+        assert result.text == text
+
+    def test_scan_keeps_repeated_heading_followed_by_prose(
+        self, parser: DoclingParser
+    ) -> None:
+        text = (
+            "## References\n\n[1] Foo.\n\n# Chapter 2\n\n"
+            "## References\n\nSee the first chapter for sources.\n"
+        )
+
+        result = parser._scan_markdown(text)
+
+        assert result.removed_references == 0
+        assert result.text == text
+        assert [title for _, title, _ in result.headers] == [
+            "References",
+            "Chapter 2",
+            "References",
+        ]
+
+
+class TestHeadingTree:
+    """Tests for the section tree built alongside chapters."""
+
+    def test_deeper_headings_are_sections_only(
+        self, parser: DoclingParser, sample_page_map: dict[int, tuple[int, int]]
+    ) -> None:
+        text = "# Part\nIntro\n## Chapter\nBody\n### Section\nMore\n#### Deep\nEnd"
+
+        result = _extract_structure(parser, text, sample_page_map)
+
+        assert [c.title for c in result.chapters] == ["Part", "Chapter"]
+        assert [c.section for c in result.chapters] == [0, 1]
+        assert result.chapters[-1].char_span[1] == len(text)
+        assert [s.title for s in result.sections] == [
+            "Part",
+            "Chapter",
+            "Section",
+            "Deep",
+        ]
+        assert result.section_at(text.index("More")) == 2
+        assert result.section_at(0) == 0
+
+    def test_only_deep_headings_fall_back_to_one_chapter(
+        self, parser: DoclingParser, sample_page_map: dict[int, tuple[int, int]]
+    ) -> None:
+        text = "Preface\n### Section\nBody"
+
+        result = _extract_structure(parser, text, sample_page_map)
+
+        assert [c.title for c in result.chapters] == ["Full Document"]
+        assert result.section_at(0) is None
+        assert result.section_path(result.section_at(len(text) - 1)) == ["Section"]
+
+    def test_sections_have_parent_pointers(
+        self,
+        parser: DoclingParser,
+        sample_page_map: dict[int, tuple[int, int]],
+        sample_markdown_with_headers: str,
+    ) -> None:
+        result = _extract_structure(
+            parser, sample_markdown_with_headers, sample_page_map
+        )
+
+        parents = {s.title: s.parent for s in result.sections}
+        assert parents["Introduction"] is None
+        assert parents["Background"] == 0
+        assert parents["Methods"] is None
+        assert result.sections[parents["Analysis"]].title == "Methods"
+        assert result.section_path(4) == ["Methods", "Analysis"]
+
+    def test_shallower_heading_closes_deeper_ones(
+        self, parser: DoclingParser, sample_page_map: dict[int, tuple[int, int]]
+    ) -> None:
+        text = "## A\nx\n### A.1\ny\n#### A.1.a\nz\n### A.2\nw\n# B\nv"
+
+        result = _extract_structure(parser, text, sample_page_map)
+
+        assert result.section_path(3) == ["A", "A.2"]
+        assert result.section_path(4) == ["B"]
+        assert result.section_path(None) == []
@@ -0,0 +1,106 @@
+"""Unit tests for the ingestion throughput benchmark."""
+
+import json
+from pathlib import Path
+
+from src.ingestion.benchmark import (
+    IngestBenchmark,
+    IngestBenchmarkRun,
+    PeakRss,
+    SyntheticParser,
+    synthetic_markdown,
+    write_pdf,
+)
+from src.ingestion.chunking.chunker import MarkdownChunker
+from src.ingestion.embedding.base_embed import TemplateEmbedder
+from src.ingestion.parsers.base import BaseParser
+from src.ingestion.parsers.parsers import PyMuPDFParser
+from src.utils.config import VectorStoreConfig
+
+
+class LetterEmbedder(TemplateEmbedder):
+    """Counts a few letters, enough to tell texts apart."""
+
+    def __init__(self) -> None:
+        super().__init__(batch_size=16)
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_text(text) for text in texts]
+
+    def embed_text(self, text: str) -> list[float]:
+        return [float(text.count(letter)) + 1.0 for letter in "aeiou"]
+
+
+class TestSyntheticDocuments:
+    """Generated books have the shape of parsed ones."""
+
+    def test_markdown_is_reproducible(self) -> None:
+        text = synthetic_markdown(pages=4, words_per_page=50, seed=3)
+
+        assert text == synthetic_markdown(pages=4, words_per_page=50, seed=3)
+        assert text != synthetic_markdown(pages=4, words_per_page=50, seed=4)
+        assert text.count(BaseParser.PAGE_BREAK) == 3
+
+    def test_parser_builds_pages_and_chapters(self) -> None:
+        doc = SyntheticParser(pages=25, words_per_page=40).parse(Path("book.pdf"))
+
+        assert doc.metadata.title == "book"
+        assert len(doc.page_map) == 25
+        assert [chapter.title for chapter in doc.structure.chapters[:1]] == [
+            "Chapter 1"
+        ]
+        assert BaseParser.PAGE_BREAK not in doc.text
+
+    def test_pdf_headings_are_detected(self, tmp_path: Path) -> None:
+        path = tmp_path / "book.pdf"
+        write_pdf(path, pages=3, words_per_page=80)
+
+        doc = PyMuPDFParser().parse(path)
+
+        assert doc.metadata.nbr_pages == 3
+        assert doc.structure.chapters[0].title == "Chapter 1"
+
+
+class TestPeakRss:
+    """Memory is sampled while the block runs."""
+
+    def test_peak_covers_allocations(self) -> None:
+        with PeakRss() as rss:
+            block = bytearray(64 * 2**20)
+            block[::4096] = b"x" * len(block[::4096])
+        del block
+
+        if rss.peak_mb is not None:
+            assert rss.peak_mb >= 64
+
+
+class TestIngestBenchmark:
+    """Every stage is measured on throwaway stores."""
+
+    def test_run_reports_each_stage(self, tmp_path: Path) -> None:
+        embedder = LetterEmbedder()
+        store_config = VectorStoreConfig(
+            backend="numpy",
+            client_path=tmp_path / "real" / "chroma",
+            numpy_path=tmp_path / "real" / "numpy",
+        )
+        benchmark = IngestBenchmark(
+            chunker=MarkdownChunker(chunk_size=64, chunk_overlap=8),
+            embedder=embedder,
+            store_config=store_config,
+            parser=PyMuPDFParser(),
+        )
+
+        run = benchmark.run(docs=2, pages=6, words_per_page=120, pdfs=2, pdf_pages=2)
+
+        stages = {stage.stage: stage for stage in run.stages}
+        assert list(stages) == ["chunk", "embed", "write", "sync"]
+        assert stages["chunk"].items > 0
+        assert stages["embed"].items == stages["chunk"].items
+        assert stages["write"].items == stages["chunk"].items
+        assert stages["sync"].items == 2
+        assert all(stage.per_second > 0 for stage in run.stages)
+        assert run.params["backend"] == "numpy"
+        # The configured store is left alone
+        assert not (tmp_path / "real").exists()
+        assert IngestBenchmarkRun.model_validate(json.loads(run.model_dump_json()))
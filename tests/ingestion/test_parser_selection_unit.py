@@ -0,0 +1,138 @@
+"""Unit tests for complexity sampling, PyMuPDFParser and AutoParser routing."""
+
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.ingestion.parsers.complexity import (
+    PageComplexity,
+    is_complex_document,
+    sample_page_numbers,
+)
+from src.ingestion.parsers.parsers import AutoParser, PyMuPDFParser
+
+
+def _line(text: str, size: float) -> dict:
+    return {"spans": [{"text": text, "size": size, "font": "Times"}]}
+
+
+class TestSamplePageNumbers:
+    """Tests for evenly spaced page sampling."""
+
+    def test_short_document_samples_every_page(self) -> None:
+        assert sample_page_numbers(2, 8) == [0, 1]
+
+    def test_skips_cover_and_back_cover(self) -> None:
+        result = sample_page_numbers(6, 8)
+
+        assert result == [1, 2, 3, 4]
+
+    def test_long_document_samples_interior_evenly(self) -> None:
+        result = sample_page_numbers(100, 4)
+
+        # Pages 0-9 are treated as front matter, page 99 as the back cover
+        assert result == [21, 43, 65, 87]
+        assert all(10 <= page < 99 for page in result)
+
+
+class TestPageComplexity:
+    """Tests for the per-page complexity heuristics."""
+
+    def test_plain_prose_is_simple(self) -> None:
+        page = PageComplexity(page_number=1, text_chars=2000)
+        assert not page.is_complex
+
+    def test_table_is_complex(self) -> None:
+        page = PageComplexity(page_number=1, text_chars=2000, has_table=True)
+        assert page.is_complex
+
+    def test_math_heavy_page_is_complex(self) -> None:
+        page = PageComplexity(page_number=1, text_chars=2000, math_ratio=0.1)
+        assert page.is_complex
+
+    def test_scanned_page_is_complex(self) -> None:
+        page = PageComplexity(page_number=1, text_chars=0, image_coverage=0.9)
+        assert page.is_scanned
+        assert page.is_complex
+
+    @pytest.mark.parametrize(
+        "complex_flags,ratio,expected",
+        [
+            ([False, False, False, False], 0.25, False),
+            ([True, False, False, False], 0.25, True),
+            ([True, False, False, False], 0.5, False),
+            ([], 0.25, True),
+        ],
+    )
+    def test_is_complex_document(
+        self, complex_flags: list[bool], ratio: float, expected: bool
+    ) -> None:
+        profiles = [
+            PageComplexity(page_number=i, text_chars=2000, has_table=flag)
+            for i, flag in enumerate(complex_flags, start=1)
+        ]
+        assert is_complex_document(profiles, ratio) is expected
+
+
+class TestPyMuPDFParserMarkdown:
+    """Tests for font-size based heading recovery."""
+
+    def test_heading_levels_ranked_by_size(self) -> None:
+        parser = PyMuPDFParser(heading_font_threshold=1.2)
+        blocks = [
+            {"lines": [_line("Chapter One", 24.0)]},
+            {"lines": [_line("Section", 16.0)]},
+            {"lines": [_line("Body text " * 20, 10.0)]},
+        ]
+        size_weights: Counter[float] = Counter()
+
+        parser._count_font_sizes(blocks, size_weights)
+        levels = parser._heading_levels(size_weights)
+
+        assert levels == {24.0: 1, 16.0: 2}
+
+    def test_page_to_markdown_emits_headers(self) -> None:
+        parser = PyMuPDFParser()
+        blocks = [
+            {"lines": [_line("Chapter One", 24.0)]},
+            {"lines": [_line("Some body", 10.0), _line("text.", 10.0)]},
+        ]
+
+        result = parser._page_to_markdown(blocks, {24.0: 1})
+
+        assert result == "# Chapter One\n\nSome body text.\n\n"
+
+
+class TestAutoParser:
+    """Tests for routing between the fast and accurate parsers."""
+
+    @pytest.fixture
+    def auto_parser(self) -> AutoParser:
+        return AutoParser(fast=MagicMock(), accurate=MagicMock(), complex_ratio=0.25)
+
+    def test_simple_book_uses_fast_parser(self, auto_parser: AutoParser) -> None:
+        profiles = [PageComplexity(page_number=i, text_chars=2000) for i in (1, 2)]
+        with patch(
+            "src.ingestion.parsers.parsers.estimate_complexity", return_value=profiles
+        ):
+            assert auto_parser.choose("book.pdf") is auto_parser.fast
+
+    def test_complex_book_uses_accurate_parser(self, auto_parser: AutoParser) -> None:
+        profiles = [
+            PageComplexity(page_number=1, text_chars=2000, has_table=True),
+            PageComplexity(page_number=2, text_chars=2000),
+        ]
+        with patch(
+            "src.ingestion.parsers.parsers.estimate_complexity", return_value=profiles
+        ):
+            assert auto_parser.choose("book.pdf") is auto_parser.accurate
+
+    def test_sampling_failure_falls_back_to_accurate(
+        self, auto_parser: AutoParser
+    ) -> None:
+        with patch(
+            "src.ingestion.parsers.parsers.estimate_complexity",
+            side_effect=RuntimeError("broken pdf"),
+        ):
+            assert auto_parser.choose("book.pdf") is auto_parser.accurate
@@ -0,0 +1,88 @@
+"""Fixtures for vector store tests."""
+
+from uuid import uuid4
+
+import pytest
+
+from src.ingestion.embedding.base_embed import TemplateEmbedder
+from src.ingestion.vector_store.numpy_store import NumpyStore
+from src.ingestion.vector_store.stores import ChromaStore
+from src.shared.models import Chunk, ChunkMetadata
+from src.utils.config import VectorStoreConfig
+
+
+class LetterEmbedder(TemplateEmbedder):
+    """Deterministic 26-d letter-count embeddings, no model download."""
+
+    def __init__(self, batch_size: int = 8, normalize: bool = True) -> None:
+        super().__init__(batch_size, normalize=normalize)
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_text(text) for text in texts]
+
+    def embed_text(self, text: str) -> list[float]:
+        vector = [0.0] * 26
+        for char in text.lower():
+            if "a" <= char <= "z":
+                vector[ord(char) - ord("a")] += 1.0
+        return vector
+
+
+@pytest.fixture
+def sample_chunks() -> list[Chunk]:
+    specs = [
+        ("alpha alpha apples", "a", ["Fruit"], (1, 2)),
+        ("banana bread baking", "a", ["Fruit", "Bananas"], (3, 4)),
+        ("zebra zone zigzag", "b", ["Animals"], (1, 1)),
+    ]
+    return [
+        Chunk(
+            content=content,
+            metadata=ChunkMetadata(
+                source_doc_title=title,
+                chapter_name=path[0],
+                section_path=path,
+                page_range=pages,
+                char_span=(0, len(content)),
+                chunk_id=uuid4(),
+            ),
+        )
+        for content, title, path, pages in specs
+    ]
+
+
+@pytest.fixture
+def store_config(tmp_path) -> VectorStoreConfig:
+    return VectorStoreConfig(
+        client_path=tmp_path / "chroma",
+        collection_name="test",
+        numpy_path=tmp_path / "numpy",
+    )
+
+
+@pytest.fixture
+def use_letter_embedder(mocker):
+    """Patch the stores to embed with LetterEmbedder(normalize=...)."""
+
+    def patch(normalize: bool = True) -> LetterEmbedder:
+        embedder = LetterEmbedder(normalize=normalize)
+        for module in ("stores", "numpy_store"):
+            mocker.patch(
+                f"src.ingestion.vector_store.{module}.get_embedder",
+                return_value=embedder,
+            )
+        return embedder
+
+    return patch
+
+
+@pytest.fixture
+def chroma_store(store_config: VectorStoreConfig, use_letter_embedder) -> ChromaStore:
+    use_letter_embedder()
+    return ChromaStore(store_config)
+
+
+@pytest.fixture
+def numpy_store(store_config: VectorStoreConfig, use_letter_embedder) -> NumpyStore:
+    use_letter_embedder()
+    return NumpyStore(store_config)
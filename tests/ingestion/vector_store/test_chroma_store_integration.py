@@ -0,0 +1,165 @@
+"""Integration tests for ChromaStore against a real on-disk collection."""
+
+import numpy as np
+
+from src.ingestion.vector_store.metadata import (
+    from_store_metadata,
+    to_store_metadata,
+)
+from src.ingestion.vector_store.stores import ChromaStore
+from src.retrieval.filters import SearchFilter
+from src.shared.models import Chunk
+from src.utils.config import VectorStoreConfig
+
+
+class TestStoreMetadata:
+    def test_spans_are_stored_as_ints(self, sample_chunks: list[Chunk]) -> None:
+        result = to_store_metadata(sample_chunks[1].metadata)
+
+        assert result["page_start"] == 3
+        assert result["page_end"] == 4
+        assert isinstance(result["char_end"], int)
+        assert result["section_path"] == "Fruit > Bananas"
+
+    def test_round_trip_without_validation(self, sample_chunks: list[Chunk]) -> None:
+        original = sample_chunks[1].metadata
+
+        result = from_store_metadata(to_store_metadata(original))
+
+        assert result == original
+
+    def test_round_trip_with_validation(self, sample_chunks: list[Chunk]) -> None:
+        original = sample_chunks[1].metadata
+
+        result = from_store_metadata(to_store_metadata(original), validate=True)
+
+        assert result == original
+
+    def test_legacy_string_spans_are_decoded(self, sample_chunks: list[Chunk]) -> None:
+        original = sample_chunks[0].metadata
+        legacy = original.model_dump(mode="json")
+
+        result = from_store_metadata(legacy)
+
+        assert result.page_range == (1, 2)
+        assert result.chunk_id == original.chunk_id
+
+
+class TestChromaStoreQuery:
+    def test_query_returns_nearest_chunk_first(
+        self, chroma_store: ChromaStore, sample_chunks: list[Chunk]
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+
+        results = chroma_store.query(["zebra"], n_result=3)
+
+        assert results[0].content == "zebra zone zigzag"
+        assert results[0].metadata == sample_chunks[2].metadata
+
+    def test_query_deduplicates_across_sentences(
+        self, chroma_store: ChromaStore, sample_chunks: list[Chunk]
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+
+        results = chroma_store.query(["zebra", "zigzag zone"], n_result=3)
+
+        assert len(results) == 3
+
+    def test_query_batch_keeps_sentences_apart(
+        self, chroma_store: ChromaStore, sample_chunks: list[Chunk]
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+
+        results = chroma_store.query_batch(["zebra", "banana"], n_result=2)
+
+        assert [r[0].content for r in results] == [
+            "zebra zone zigzag",
+            "banana bread baking",
+        ]
+        assert results[0] == chroma_store.query(["zebra"], n_result=2)
+
+    def test_query_applies_filters(
+        self, chroma_store: ChromaStore, sample_chunks: list[Chunk]
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+
+        results = chroma_store.query(
+            ["zebra"], n_result=3, filters=SearchFilter(books=["a"], pages=(3, 9))
+        )
+
+        assert [r.content for r in results] == ["banana bread baking"]
+
+    def test_validated_results_match_fast_path(
+        self, chroma_store: ChromaStore, sample_chunks: list[Chunk]
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+        fast = chroma_store.query(["banana"], n_result=3)
+
+        chroma_store.validate_results = True
+        validated = chroma_store.query(["banana"], n_result=3)
+
+        assert [r.model_dump() for r in fast] == [r.model_dump() for r in validated]
+
+    def test_delete_by_filename_matches_stem(
+        self, chroma_store: ChromaStore, sample_chunks: list[Chunk]
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+
+        chroma_store.delete_by_filename("a.pdf")
+
+        assert chroma_store.count() == 1
+
+
+class TestIndexSettings:
+    def test_collection_uses_configured_space(self, chroma_store: ChromaStore) -> None:
+        hnsw = chroma_store.collection.configuration["hnsw"]
+
+        assert hnsw["space"] == "cosine"
+        assert hnsw["max_neighbors"] == 16
+
+    def test_ef_search_is_applied_to_existing_collection(
+        self, chroma_store: ChromaStore, store_config: VectorStoreConfig
+    ) -> None:
+        reopened = ChromaStore(store_config.model_copy(update={"hnsw_ef_search": 40}))
+
+        assert reopened.collection.configuration["hnsw"]["ef_search"] == 40
+
+    def test_space_mismatch_is_reported(
+        self, chroma_store: ChromaStore, store_config: VectorStoreConfig, mocker
+    ) -> None:
+        mock_logger = mocker.patch("src.ingestion.vector_store.stores.logger")
+
+        ChromaStore(store_config.model_copy(update={"distance": "l2"}))
+
+        message = mock_logger.warning.call_args[0][0]
+        assert "space=cosine (config: l2)" in message
+
+    def test_rebuild_index_moves_chunks_to_new_space(
+        self,
+        chroma_store: ChromaStore,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+        store = ChromaStore(store_config.model_copy(update={"distance": "ip"}))
+
+        copied = store.rebuild_index(batch_size=2)
+
+        assert copied == 3
+        assert store.collection.configuration["hnsw"]["space"] == "ip"
+        assert store.count() == 3
+        assert store.query(["zebra"], n_result=1)[0].content == "zebra zone zigzag"
+
+    def test_rebuild_index_normalizes_stored_vectors(
+        self,
+        chroma_store: ChromaStore,
+        sample_chunks: list[Chunk],
+    ) -> None:
+        chroma_store.embedder.normalize = False
+        chroma_store.ingest(sample_chunks)
+        chroma_store.embedder.normalize = True
+
+        chroma_store.rebuild_index()
+
+        stored = chroma_store.collection.get(include=["embeddings"])["embeddings"]
+        np.testing.assert_allclose(np.linalg.norm(stored, axis=1), 1.0, rtol=1e-5)
@@ -0,0 +1,242 @@
+"""Integration tests for the memory-mapped NumPy vector store."""
+
+import numpy as np
+import pytest
+
+from src.ingestion.vector_store.numpy_store import CODES_FILE, SCALES_FILE, NumpyStore
+from src.ingestion.vector_store.quantization import quantize_int8
+from src.ingestion.vector_store.stores import ChromaStore
+from src.retrieval.filters import SearchFilter
+from src.shared.models import Chunk
+from src.utils.config import VectorStoreConfig
+
+QUERIES = ["zebra", "banana bread", "apples and zebras"]
+
+
+class TestNumpyStore:
+    def test_query_returns_nearest_chunk_first(
+        self, numpy_store: NumpyStore, sample_chunks: list[Chunk]
+    ) -> None:
+        numpy_store.ingest(sample_chunks)
+
+        results = numpy_store.query(["zebra"], n_result=3)
+
+        assert results[0].content == "zebra zone zigzag"
+        assert results[0].metadata == sample_chunks[2].metadata
+        assert [r.score for r in results] == sorted(r.score for r in results)
+
+    def test_query_batch_matches_single_queries(
+        self, numpy_store: NumpyStore, sample_chunks: list[Chunk]
+    ) -> None:
+        numpy_store.ingest(sample_chunks)
+
+        results = numpy_store.query_batch(QUERIES, n_result=2)
+
+        for query, batched in zip(QUERIES, results):
+            single = numpy_store.query([query], n_result=2)
+            assert [r.content for r in batched] == [r.content for r in single]
+            assert [r.score for r in batched] == pytest.approx(
+                [r.score for r in single], abs=1e-6
+            )
+
+    def test_store_is_reloaded_from_disk(
+        self,
+        numpy_store: NumpyStore,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+    ) -> None:
+        numpy_store.ingest(sample_chunks[:2])
+        numpy_store.ingest(sample_chunks[2:])
+
+        reopened = NumpyStore(store_config)
+
+        assert reopened.count() == 3
+        assert reopened.query(["zebra"], n_result=1)[0].content == "zebra zone zigzag"
+
+    @pytest.mark.parametrize(
+        "search_filter,expected",
+        [
+            (SearchFilter(books=["b"]), {"zebra zone zigzag"}),
+            (SearchFilter(pages=(3, 3)), {"banana bread baking"}),
+            (SearchFilter(section="Bananas"), {"banana bread baking"}),
+            (SearchFilter(books=["a"], chapter="Animals"), set()),
+        ],
+    )
+    def test_query_applies_filters(
+        self,
+        numpy_store: NumpyStore,
+        sample_chunks: list[Chunk],
+        search_filter: SearchFilter,
+        expected: set[str],
+    ) -> None:
+        numpy_store.ingest(sample_chunks)
+
+        results = numpy_store.query(["zebra"], n_result=3, filters=search_filter)
+
+        assert {r.content for r in results} == expected
+
+    def test_delete_by_filename_matches_stem(
+        self, numpy_store: NumpyStore, sample_chunks: list[Chunk]
+    ) -> None:
+        numpy_store.ingest(sample_chunks)
+
+        numpy_store.delete_by_filename("a.pdf")
+
+        assert numpy_store.count() == 1
+        assert numpy_store.query(["banana"], n_result=3)[0].content == (
+            "zebra zone zigzag"
+        )
+
+    def test_clear(self, numpy_store: NumpyStore, sample_chunks: list[Chunk]) -> None:
+        numpy_store.ingest(sample_chunks)
+
+        numpy_store.clear()
+
+        assert numpy_store.count() == 0
+        assert numpy_store.query(["zebra"], n_result=3) == []
+
+
+class TestNumpyStoreMatchesChroma:
+    """Both backends rank identical data the same way."""
+
+    @pytest.mark.parametrize("distance", ["cosine", "ip", "l2"])
+    def test_same_ranking_and_scores(
+        self,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+        use_letter_embedder,
+        distance: str,
+    ) -> None:
+        use_letter_embedder(normalize=distance != "l2")
+        config = store_config.model_copy(update={"distance": distance})
+        chroma, numpy = ChromaStore(config), NumpyStore(config)
+        chroma.ingest(sample_chunks)
+        numpy.ingest(sample_chunks)
+
+        for query in QUERIES:
+            expected = chroma.query([query], n_result=3)
+            result = numpy.query([query], n_result=3)
+
+            assert [r.content for r in result] == [r.content for r in expected]
+            assert [r.score for r in result] == pytest.approx(
+                [r.score for r in expected], abs=1e-4
+            )
+
+    def test_copy_from_chroma(
+        self,
+        chroma_store: ChromaStore,
+        numpy_store: NumpyStore,
+        sample_chunks: list[Chunk],
+    ) -> None:
+        chroma_store.ingest(sample_chunks)
+
+        copied = numpy_store.copy_from(chroma_store.collection, batch_size=2)
+
+        assert copied == 3
+        assert numpy_store.query(["zebra"], n_result=1)[0].metadata == (
+            sample_chunks[2].metadata
+        )
+
+
+class TestFaissIndex:
+    @pytest.mark.parametrize("index_type", ["hnsw", "ivf"])
+    def test_index_search_matches_exact(
+        self,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+        use_letter_embedder,
+        index_type: str,
+    ) -> None:
+        pytest.importorskip("faiss")
+        use_letter_embedder()
+        exact = NumpyStore(store_config)
+        exact.ingest(sample_chunks)
+        indexed = NumpyStore(
+            store_config.model_copy(update={"numpy_index": index_type, "ivf_nlist": 1})
+        )
+
+        for query in QUERIES:
+            expected = exact.query([query], n_result=3)
+            result = indexed.query([query], n_result=3)
+
+            assert [r.content for r in result] == [r.content for r in expected]
+            assert [r.score for r in result] == pytest.approx(
+                [r.score for r in expected], abs=1e-4
+            )
+        assert (store_config.numpy_path / "index.faiss").exists()
+
+
+class TestQuantizedSearch:
+    @pytest.mark.parametrize("mode", ["int8", "binary"])
+    def test_rescored_results_match_exact(
+        self,
+        numpy_store: NumpyStore,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+        mode: str,
+    ) -> None:
+        numpy_store.ingest(sample_chunks)
+        quantized = NumpyStore(store_config.model_copy(update={"quantization": mode}))
+
+        for query in QUERIES:
+            expected = numpy_store.query([query], n_result=2)
+            result = quantized.query([query], n_result=2)
+
+            assert [r.content for r in result] == [r.content for r in expected]
+            assert [r.score for r in result] == pytest.approx(
+                [r.score for r in expected]
+            )
+
+    def test_codes_follow_appends_and_deletes(
+        self,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+        use_letter_embedder,
+    ) -> None:
+        use_letter_embedder()
+        config = store_config.model_copy(update={"quantization": "int8"})
+        store = NumpyStore(config)
+        store.ingest(sample_chunks[:2])
+        store.ingest(sample_chunks[2:])
+
+        store.delete_by_filename("a.pdf")
+        reopened = NumpyStore(config)
+
+        assert reopened.codes is not None
+        assert reopened.codes.shape == (1, 26)
+        assert reopened.query(["zebra"], n_result=1)[0].content == "zebra zone zigzag"
+
+    def test_appends_write_only_the_new_codes(
+        self,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+        use_letter_embedder,
+    ) -> None:
+        use_letter_embedder()
+        config = store_config.model_copy(update={"quantization": "int8"})
+        store = NumpyStore(config)
+        store.ingest(sample_chunks[:2])
+        codes_file = store.path / CODES_FILE
+        # Codes of a batch whose chunk records never made it to disk
+        with codes_file.open("ab") as f:
+            f.write(b"\x7f" * 26)
+        before = codes_file.read_bytes()[: 2 * 26]
+
+        store.ingest(sample_chunks[2:])
+
+        assert codes_file.stat().st_size == 3 * 26
+        assert (store.path / SCALES_FILE).stat().st_size == 3 * 4
+        assert codes_file.read_bytes()[: 2 * 26] == before
+        assert np.array_equal(store.codes, quantize_int8(np.asarray(store.vectors))[0])
+
+    def test_first_pass_memory_shrinks(
+        self,
+        numpy_store: NumpyStore,
+        store_config: VectorStoreConfig,
+        sample_chunks: list[Chunk],
+    ) -> None:
+        numpy_store.ingest(sample_chunks)
+        binary = NumpyStore(store_config.model_copy(update={"quantization": "binary"}))
+
+        assert numpy_store.first_pass_bytes == 3 * 26 * 4
+        assert binary.first_pass_bytes == 3 * 4
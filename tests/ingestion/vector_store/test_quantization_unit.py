@@ -0,0 +1,59 @@
+"""Unit tests for int8 and binary vector codes."""
+
+import numpy as np
+import pytest
+
+from src.ingestion.vector_store.quantization import (
+    code_bytes,
+    dequantize_int8,
+    hamming_distances,
+    quantize_binary,
+    quantize_int8,
+)
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    return np.random.default_rng(3).normal(size=(50, 20)).astype(np.float32)
+
+
+class TestInt8:
+    def test_round_trip_error_is_within_half_a_step(self, vectors: np.ndarray) -> None:
+        codes, scales = quantize_int8(vectors)
+
+        restored = dequantize_int8(codes, scales)
+
+        assert codes.dtype == np.int8
+        assert np.all(np.abs(restored - vectors) <= scales[:, None] / 2 + 1e-6)
+
+    def test_zero_row_stays_zero(self) -> None:
+        codes, scales = quantize_int8(np.zeros((1, 4), dtype=np.float32))
+
+        assert not codes.any()
+        assert np.isfinite(scales).all()
+
+
+class TestBinary:
+    def test_sign_bits_are_packed(self) -> None:
+        vectors = np.array([[1.0, -1.0, 0.5, -0.1, 0.0, 2.0, 3.0, -3.0, 1.0]])
+
+        codes = quantize_binary(vectors)
+
+        assert codes.tolist() == [[0b10100110, 0b10000000]]
+
+    def test_hamming_distances_match_naive(self, vectors: np.ndarray) -> None:
+        codes = quantize_binary(vectors)
+        queries = quantize_binary(vectors[:3])
+
+        result = hamming_distances(codes, queries)
+
+        bits = vectors > 0
+        expected = np.array([(bits != bits[i]).sum(axis=1) for i in range(3)])
+        np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize(
+    "mode,expected", [("none", 1536), ("int8", 388), ("binary", 48)]
+)
+def test_code_bytes(mode: str, expected: int) -> None:
+    assert code_bytes(mode, 384) == expected
@@ -0,0 +1,139 @@
+"""Unit tests for the HNSW recall/latency benchmark."""
+
+import tracemalloc
+
+import chromadb
+import numpy as np
+import pytest
+
+from src.retrieval.benchmark import (
+    IndexBenchmark,
+    benchmark_quantization,
+    exact_top_k,
+    latency_percentiles,
+    recall_at_k,
+)
+from src.utils.config import VectorStoreConfig
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    return np.random.default_rng(7).normal(size=(200, 16)).astype(np.float32)
+
+
+def _naive_top_k(matrix: np.ndarray, query: np.ndarray, k: int, space: str):
+    if space == "l2":
+        distances = ((matrix - query) ** 2).sum(axis=1)
+    elif space == "ip":
+        distances = -(matrix @ query)
+    else:
+        distances = -(matrix @ query) / (
+            np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        )
+    return np.argsort(distances)[:k]
+
+
+class TestExactTopK:
+    """Tests for the brute-force ground truth."""
+
+    @pytest.mark.parametrize("space", ["cosine", "ip", "l2"])
+    def test_matches_naive_search(self, vectors: np.ndarray, space: str) -> None:
+        queries = vectors[:20]
+
+        result = exact_top_k(vectors, queries, k=5, space=space)
+
+        for query, row in zip(queries, result):
+            np.testing.assert_array_equal(row, _naive_top_k(vectors, query, 5, space))
+
+    def test_k_larger_than_collection(self, vectors: np.ndarray) -> None:
+        result = exact_top_k(vectors[:3], vectors[:1], k=10, space="l2")
+
+        assert result.shape == (1, 3)
+
+    def test_excluded_rows_are_never_returned(self, vectors: np.ndarray) -> None:
+        picks = np.arange(20)
+
+        result = exact_top_k(
+            vectors, vectors[picks], k=5, space="cosine", exclude=picks
+        )
+
+        for pick, query, row in zip(picks, vectors[picks], result):
+            naive = _naive_top_k(vectors, query, 6, "cosine")
+            np.testing.assert_array_equal(row, [idx for idx in naive if idx != pick])
+
+    def test_cosine_does_not_copy_the_matrix(self) -> None:
+        matrix = np.random.default_rng(0).normal(size=(5000, 128)).astype(np.float32)
+
+        tracemalloc.start()
+        try:
+            exact_top_k(matrix, matrix[:16], k=10, space="cosine")
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert peak < matrix.nbytes / 2
+
+
+class TestMetrics:
+    """Tests for recall and latency summaries."""
+
+    def test_recall_at_k(self) -> None:
+        found = [["a", "b", "x"], ["c", "d", "e"]]
+        expected = [["a", "b", "c"], ["c", "d", "e"]]
+
+        assert recall_at_k(found, expected) == pytest.approx(5 / 6)
+
+    def test_latency_percentiles(self) -> None:
+        p50, p95, p99 = latency_percentiles(list(range(1, 101)))
+
+        assert p50 == pytest.approx(50.5)
+        assert p50 < p95 < p99 <= 100
+
+
+class TestIndexBenchmark:
+    """Runs a small sweep end to end against Chroma."""
+
+    def test_sweep_reports_each_setting(self, vectors: np.ndarray) -> None:
+        client = chromadb.EphemeralClient()
+        collection = client.create_collection(
+            name="bench-source", configuration={"hnsw": {"space": "cosine"}}
+        )
+        collection.add(ids=[str(i) for i in range(len(vectors))], embeddings=vectors)
+        benchmark = IndexBenchmark(collection, space="cosine", k=5, num_queries=10)
+
+        results = list(benchmark.run([8], [50], [5, 50]))
+
+        assert [(r.m, r.ef_search) for r in results] == [(8, 5), (8, 50)]
+        assert results[-1].recall > 0.9
+        # Each query's own row is not one of its neighbours
+        assert all(
+            query_id not in row
+            for query_id, row in zip(benchmark.query_ids, benchmark.expected)
+        )
+        assert all(r.p99_ms >= r.p50_ms for r in results)
+        assert collection.count() == len(vectors)
+
+
+class TestBenchmarkQuantization:
+    """Compares quantization modes on the same vectors."""
+
+    def test_reports_recall_and_memory_per_mode(
+        self, vectors: np.ndarray, tmp_path
+    ) -> None:
+        ids = [str(i) for i in range(len(vectors))]
+        config = VectorStoreConfig(numpy_path=tmp_path / "unused", rescore_factor=20)
+
+        results = {
+            r.mode: r
+            for r in benchmark_quantization(
+                ids, vectors, config, k=5, num_queries=10, batch_size=64
+            )
+        }
+
+        assert results["none"].recall == pytest.approx(1.0)
+        assert results["int8"].recall > 0.9
+        assert (
+            results["binary"].first_pass_mb
+            < results["int8"].first_pass_mb
+            < results["none"].first_pass_mb
+        )
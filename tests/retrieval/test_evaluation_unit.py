@@ -0,0 +1,203 @@
+"""Unit tests for the retrieval evaluation suite."""
+
+import math
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from src.generation.answerer import QueryAnswerer, estimate_tokens
+from src.generation.pipeline import SimpleRAGPipeline
+from src.retrieval import evaluation
+from src.retrieval.evaluation import (
+    EvalQuestion,
+    EvalRun,
+    RetrievalEvaluator,
+    StageTimer,
+    TimedEmbedder,
+    load_dataset,
+    load_runs,
+    ndcg,
+    reciprocal_rank,
+)
+from src.shared.models import ChunkMetadata, SearchResult
+
+
+def result(book: str, pages: tuple[int, int]) -> SearchResult:
+    return SearchResult(
+        content=f"{book} {pages}",
+        score=0.0,
+        metadata=ChunkMetadata(
+            source_doc_title=book,
+            chapter_name="Chapter",
+            page_range=pages,
+            char_span=(0, 1),
+            chunk_id=uuid4(),
+        ),
+    )
+
+
+QUESTION = EvalQuestion(
+    id="q1", query="What is a monad?", book="haskell.pdf", pages=(10, 12)
+)
+RANKING = [
+    result("haskell", (1, 2)),
+    result("haskell", (12, 13)),
+    result("sicp", (10, 11)),
+]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestMetrics:
+    """Relevance and ranking metrics."""
+
+    def test_relevance_needs_book_and_page_overlap(self) -> None:
+        assert [QUESTION.is_relevant(r) for r in RANKING] == [False, True, False]
+
+    def test_reciprocal_rank(self) -> None:
+        assert reciprocal_rank([False, True, False]) == 0.5
+        assert reciprocal_rank([False, False]) == 0.0
+
+    def test_ndcg(self) -> None:
+        assert ndcg([True, True], relevant_available=2) == 1.0
+        assert ndcg([False, True], relevant_available=1) == pytest.approx(
+            1 / math.log2(3)
+        )
+        assert ndcg([False, False], relevant_available=0) == 0.0
+
+    def test_dataset_ids_default_to_line_numbers(self, tmp_path: Path) -> None:
+        path = tmp_path / "eval.jsonl"
+        path.write_text('{"query": "q", "book": "b.pdf", "pages": [1, 2]}\n')
+
+        assert load_dataset(path)[0].id == "1"
+
+
+class TestStageTimer:
+    """Stage times exclude the stages nested in them."""
+
+    def test_nested_stage_is_not_counted_twice(self, monkeypatch) -> None:
+        clock = FakeClock()
+        monkeypatch.setattr(evaluation.time, "perf_counter", clock)
+        timer = StageTimer()
+
+        with timer.stage("search"):
+            clock.now += 1
+            with timer.stage("embed"):
+                clock.now += 2
+            clock.now += 3
+
+        assert timer.take() == {"search": 4000.0, "embed": 2000.0}
+        assert timer.take() == {}
+
+
+class TestRetrievalEvaluator:
+    """Pipelines are scored per question and summarized per pipeline."""
+
+    def make_evaluator(self, **kwargs) -> tuple[RetrievalEvaluator, MagicMock]:
+        timer = StageTimer()
+        embedder = TimedEmbedder(MagicMock(batch_size=8, normalize=False), timer)
+        store = MagicMock()
+
+        def query(sentences, n_result, filters=None):
+            embedder.embed_batch(sentences)
+            if filters is not None:
+                # Two chunks of the book overlap the labeled pages
+                return [r for r in RANKING if QUESTION.is_relevant(r)] * 2
+            return RANKING[:n_result]
+
+        store.query.side_effect = query
+        answerer = QueryAnswerer(MagicMock())
+        evaluator = RetrievalEvaluator(store, answerer, timer, **kwargs)
+        return evaluator, store
+
+    def test_simple_pipeline(self) -> None:
+        evaluator, _ = self.make_evaluator(k=3)
+
+        reports, results = evaluator.run([QUESTION])
+
+        assert results[0].first_relevant_rank == 2
+        assert results[0].relevant_available == 2
+        assert results[0].prompt_tokens > 0
+        assert set(results[0].stages_ms) == {"embed", "search"}
+        report = reports[0]
+        assert (report.recall, report.mrr) == (1.0, 0.5)
+        assert report.ndcg == pytest.approx((1 / math.log2(3)) / (1 + 1 / math.log2(3)))
+
+    def test_multi_pipeline_expands_queries(self) -> None:
+        constructor = MagicMock()
+        constructor.refine_query.return_value = ["monads", "bind"]
+        evaluator, store = self.make_evaluator(query_constructor=constructor)
+
+        reports, results = evaluator.run([QUESTION], pipelines=["simple", "multi"])
+
+        assert [report.pipeline for report in reports] == ["simple", "multi"]
+        assert store.query.call_args.args[0] == ["monads", "bind"]
+        assert "expand" in results[1].stages_ms
+
+    def test_multi_pipeline_needs_a_constructor(self) -> None:
+        evaluator, _ = self.make_evaluator()
+
+        with pytest.raises(ValueError):
+            evaluator.run([QUESTION], pipelines=["multi"])
+
+    def test_generation_is_timed_when_asked(self) -> None:
+        evaluator, _ = self.make_evaluator(generate=True)
+
+        _, results = evaluator.run([QUESTION])
+
+        evaluator.answerer.generator.generate.assert_called_once()
+        assert "generate" in results[0].stages_ms
+        # The contexts the pipeline answered from are the ones scored
+        assert results[0].first_relevant_rank == 2
+
+    def test_questions_run_through_the_pipelines(self, mocker) -> None:
+        retrieve = mocker.spy(SimpleRAGPipeline, "retrieve")
+        evaluator, _ = self.make_evaluator()
+
+        evaluator.run([QUESTION])
+
+        assert retrieve.call_args.args[1] == QUESTION.query
+
+    def test_prompt_tokens_include_the_instructions(self) -> None:
+        evaluator, _ = self.make_evaluator(k=3)
+        answerer = evaluator.answerer
+        prompt = answerer.build_prompt(RANKING, QUESTION.query)
+
+        _, results = evaluator.run([QUESTION])
+
+        assert results[0].prompt_tokens == estimate_tokens(
+            answerer.instructions + prompt
+        )
+
+
+class TestEvalRuns:
+    """Runs are saved and found again for comparison."""
+
+    def test_runs_load_oldest_first(self, tmp_path: Path) -> None:
+        evaluator, _ = TestRetrievalEvaluator().make_evaluator()
+        reports, results = evaluator.run([QUESTION])
+        now = datetime.now()
+        for run_id, created in [("b", now), ("a", now - timedelta(days=1))]:
+            EvalRun(
+                run_id=run_id,
+                created=created,
+                dataset="eval.jsonl",
+                settings={},
+                reports=reports,
+                questions=results,
+            ).save(tmp_path)
+
+        runs = load_runs(tmp_path)
+
+        assert [run.run_id for run in runs] == ["a", "b"]
+        assert runs[-1].report("simple", 5) == reports[0]
+        assert runs[-1].report("multi", 5) is None
@@ -0,0 +1,128 @@
+"""Unit tests for SearchFilter -> Chroma where translation."""
+
+import chromadb
+import pytest
+
+from src.retrieval.filters import SearchFilter, page_fields, section_fields
+
+METADATAS = [
+    {"source_doc_title": "a.pdf", "chapter_name": "Part I"}
+    | page_fields((1, 4))
+    | section_fields(["Part I", "Intro"]),
+    {"source_doc_title": "a.pdf", "chapter_name": "Part I"}
+    | page_fields((5, 9))
+    | section_fields(["Part I", "Intro", "Setup"]),
+    {"source_doc_title": "b.pdf", "chapter_name": "Intro"}
+    | page_fields((1, 2))
+    | section_fields(["Intro"]),
+]
+
+FILTER_CASES = [
+    (SearchFilter(books=["a.pdf"]), {"1", "2"}),
+    (SearchFilter(section="Intro"), {"1", "2", "3"}),
+    (SearchFilter(section="Part I > Intro"), {"1", "2"}),
+    (SearchFilter(books=["a.pdf"], section="Setup"), {"2"}),
+    (SearchFilter(chapter="Intro"), {"3"}),
+    (SearchFilter(books=["a.pdf", "b.pdf"]), {"1", "2", "3"}),
+    (SearchFilter(pages=(4, 5)), {"1", "2"}),
+    (SearchFilter(books=["a.pdf"], pages=(6, 30)), {"2"}),
+]
+
+
+class TestSectionFields:
+    def test_one_field_per_depth(self) -> None:
+        result = section_fields(["Part I", "Intro", "Setup"])
+
+        assert result == {
+            "section_1": "Part I",
+            "section_2": "Intro",
+            "section_3": "Setup",
+        }
+
+    def test_empty_path(self) -> None:
+        assert section_fields([]) == {}
+
+
+class TestSearchFilter:
+    def test_empty_filter_has_no_where(self) -> None:
+        assert SearchFilter().to_where() is None
+
+    def test_single_clause_is_not_wrapped(self) -> None:
+        assert SearchFilter(books=["a.pdf"]).to_where() == {"source_doc_title": "a.pdf"}
+
+    def test_multiple_clauses_are_anded(self) -> None:
+        result = SearchFilter(books=["a.pdf"], chapter="Part I").to_where()
+
+        assert result == {
+            "$and": [{"source_doc_title": "a.pdf"}, {"chapter_name": "Part I"}]
+        }
+
+    def test_book_set_uses_in(self) -> None:
+        result = SearchFilter(books=["a.pdf", "b.pdf"]).to_where()
+
+        assert result == {"source_doc_title": {"$in": ["a.pdf", "b.pdf"]}}
+
+    def test_page_range_is_an_overlap_test(self) -> None:
+        result = SearchFilter(pages=(10, 20)).to_where()
+
+        assert result == {
+            "$and": [{"page_start": {"$lte": 20}}, {"page_end": {"$gte": 10}}]
+        }
+
+    def test_bare_section_matches_any_depth(self) -> None:
+        result = SearchFilter(section="Setup").to_where()
+
+        assert result is not None
+        assert {"section_3": "Setup"} in result["$or"]
+        assert len(result["$or"]) == 6
+
+    def test_section_path_pins_each_depth(self) -> None:
+        result = SearchFilter(section="Part I > Intro").to_where()
+
+        assert result == {"$and": [{"section_1": "Part I"}, {"section_2": "Intro"}]}
+
+
+class TestSearchFilterOnChroma:
+    """The generated clauses are accepted by Chroma and scope the search."""
+
+    @pytest.fixture
+    def collection(self):
+        client = chromadb.EphemeralClient()
+        collection = client.get_or_create_collection("filters_test")
+        collection.add(
+            ids=["1", "2", "3"],
+            embeddings=[[1.0, 0.0], [0.9, 0.1], [0.8, 0.2]],
+            documents=["one", "two", "three"],
+            metadatas=METADATAS,
+        )
+        yield collection
+        client.delete_collection("filters_test")
+
+    @pytest.mark.parametrize("search_filter,expected_ids", FILTER_CASES)
+    def test_where_scopes_results(
+        self, collection, search_filter: SearchFilter, expected_ids: set[str]
+    ) -> None:
+        results = collection.query(
+            query_embeddings=[[1.0, 0.0]], n_results=3, where=search_filter.to_where()
+        )
+
+        assert set(results["ids"][0]) == expected_ids
+
+
+class TestSearchFilterMatches:
+    """In-process evaluation agrees with what Chroma returns."""
+
+    @pytest.mark.parametrize("search_filter,expected_ids", FILTER_CASES)
+    def test_matches_selects_same_chunks(
+        self, search_filter: SearchFilter, expected_ids: set[str]
+    ) -> None:
+        result = {
+            str(idx)
+            for idx, metadata in enumerate(METADATAS, start=1)
+            if search_filter.matches(metadata)
+        }
+
+        assert result == expected_ids
+
+    def test_empty_filter_matches_everything(self) -> None:
+        assert SearchFilter().matches({})
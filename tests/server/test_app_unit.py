@@ -0,0 +1,230 @@
+"""Unit tests for the HTTP query server."""
+
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.generation.answerer import QueryAnswerer
+from src.generation.generator import BaseGenerator
+from src.generation.scheduler import GenerationScheduler
+from src.server.app import create_app
+from src.shared.context import AppContext
+from src.shared.models import ChunkMetadata, SearchResult
+from src.utils.config import ConfigModel
+
+
+class PiecewiseGenerator(BaseGenerator):
+    """Streams a fixed answer in two pieces."""
+
+    def generate(self, prompt: str, system: str | None = None) -> str:
+        return "".join(self.stream(prompt, system))
+
+    def stream(self, prompt: str, system: str | None = None):
+        yield "Monads "
+        yield "compose."
+
+
+def search_result(content: str) -> SearchResult:
+    return SearchResult(
+        content=content,
+        score=0.1,
+        metadata=ChunkMetadata(
+            source_doc_title="Haskell",
+            chapter_name="Monads",
+            page_range=(1, 2),
+            char_span=(0, 10),
+            chunk_id=uuid4(),
+        ),
+    )
+
+
+class FakeContext:
+    """AppContext stand-in with a real scheduler and answerer over fakes."""
+
+    warm_up = AppContext.warm_up
+
+    def __init__(self, **server: object) -> None:
+        self.config = ConfigModel()
+        self.config.server = self.config.server.model_copy(update=server)
+        self.library_manager = MagicMock()
+        self.library_manager.get_stats.return_value = {
+            "indexed_files": 1,
+            "total_chunks": 3,
+        }
+        self.vector_store = MagicMock()
+        self.vector_store.query.return_value = [search_result("A monad is...")]
+        self.embedder = MagicMock()
+        self.generator = GenerationScheduler(PiecewiseGenerator())
+        self.answerer = QueryAnswerer(self.generator)
+        self.query_constructor = MagicMock()
+        self.query_constructor.refine_query.return_value = ["What are monads?"]
+
+
+def events(body: str) -> list[tuple[str, object]]:
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        parsed.append(
+            (event.removeprefix("event: "), json.loads(data[len("data: ") :]))
+        )
+    return parsed
+
+
+@pytest.fixture
+def context() -> FakeContext:
+    return FakeContext()
+
+
+class TestHealth:
+    """Liveness answers at once, readiness after warm-up."""
+
+    def test_ready_once_warm(self) -> None:
+        context = FakeContext()
+        release = threading.Event()
+        context.embedder.embed_text.side_effect = lambda _: release.wait(timeout=5)
+
+        with TestClient(create_app(context)) as client:
+            assert client.get("/health/live").json() == {"status": "alive"}
+            loading = client.get("/health/ready")
+            assert loading.status_code == 503
+            assert loading.json()["pending"] == ["embedder"]
+
+            release.set()
+            for _ in range(100):
+                if client.get("/health/ready").status_code == 200:
+                    break
+                time.sleep(0.01)
+            assert client.get("/health/ready").json() == {"status": "ready"}
+
+    def test_failed_warm_up_is_not_ready(self, context: FakeContext) -> None:
+        context.embedder.embed_text.side_effect = RuntimeError("no GPU")
+
+        with TestClient(create_app(context)) as client:
+            for _ in range(100):
+                response = client.get("/health/ready")
+                if not response.json()["pending"]:
+                    break
+                time.sleep(0.01)
+
+        assert response.status_code == 503
+        assert response.json()["failed"] == {"embedder": "no GPU"}
+
+
+class TestEndpoints:
+    """Search, query (plain and streamed) and stats."""
+
+    def test_search_only_retrieves(self, context: FakeContext) -> None:
+        with TestClient(create_app(context)) as client:
+            response = client.post(
+                "/search",
+                json={"query": "monads", "top_k": 3, "filters": {"books": ["Haskell"]}},
+            )
+
+        assert response.status_code == 200
+        assert response.json()["results"][0]["content"] == "A monad is..."
+        args, kwargs = context.vector_store.query.call_args
+        assert args == (["monads"],)
+        assert kwargs["n_result"] == 3
+        assert kwargs["filters"].books == ["Haskell"]
+
+    def test_query_answers_with_sources(self, context: FakeContext) -> None:
+        with TestClient(create_app(context)) as client:
+            response = client.post("/query", json={"query": "What is a monad?"})
+
+        body = response.json()
+        assert body["answer"] == "Monads compose."
+        assert body["sources"][0]["metadata"]["chapter_name"] == "Monads"
+
+    def test_query_streams_server_sent_events(self, context: FakeContext) -> None:
+        with TestClient(create_app(context)) as client:
+            response = client.post(
+                "/query", json={"query": "What is a monad?", "stream": True}
+            )
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        parsed = events(response.text)
+        assert parsed[0][0] == "sources"
+        assert parsed[1:] == [
+            ("token", {"text": "Monads "}),
+            ("token", {"text": "compose."}),
+            ("done", {}),
+        ]
+
+    def test_expanded_query_searches_variations(self, context: FakeContext) -> None:
+        with TestClient(create_app(context)) as client:
+            client.post("/query", json={"query": "monads?", "expand": True})
+
+        assert context.vector_store.query.call_args.args == (
+            ["monads?", "What are monads?"],
+        )
+
+    def test_stats(self, context: FakeContext) -> None:
+        with TestClient(create_app(context)) as client:
+            client.post("/search", json={"query": "monads"})
+            stats = client.get("/stats").json()
+
+        assert stats["library"] == {"indexed_files": 1, "total_chunks": 3}
+        assert stats["requests"]["served"] == 1
+        assert "answer" in stats["generation"]["priorities"]
+        assert "perf" in stats
+
+    def test_prometheus_metrics_are_opt_in(self, context: FakeContext) -> None:
+        with TestClient(create_app(context)) as client:
+            assert client.get("/metrics").status_code == 404
+
+        context.config.metrics.prometheus = True
+        with TestClient(create_app(context)) as client:
+            client.post("/query", json={"query": "monads?"})
+            response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert 'stage="llm_generate"' in response.text
+
+
+class TestConcurrency:
+    """Requests beyond the limit wait, then get a 503."""
+
+    def test_busy_server_rejects_after_timeout(self) -> None:
+        context = FakeContext(max_concurrent_requests=1, queue_timeout=0.05)
+        release = threading.Event()
+        entered = threading.Event()
+
+        def slow_query(*args, **kwargs):
+            entered.set()
+            release.wait(timeout=5)
+            return []
+
+        context.vector_store.query.side_effect = slow_query
+
+        with TestClient(create_app(context)) as client:
+            first = threading.Thread(
+                target=client.post, args=("/search",), kwargs={"json": {"query": "a"}}
+            )
+            first.start()
+            assert entered.wait(timeout=5)
+
+            busy = client.post("/search", json={"query": "b"})
+            release.set()
+            first.join(timeout=5)
+            stats = client.get("/stats").json()["requests"]
+
+        assert busy.status_code == 503
+        assert busy.headers["retry-after"] == "1"
+        assert stats["rejected"] == 1
+        assert stats["served"] == 1
+        assert stats["in_flight"] == 0
+
+    def test_streamed_answer_frees_its_slot(self) -> None:
+        context = FakeContext(max_concurrent_requests=1, queue_timeout=0.05)
+
+        with TestClient(create_app(context)) as client:
+            for _ in range(2):
+                response = client.post("/query", json={"query": "q", "stream": True})
+                assert response.status_code == 200
+
+            assert client.get("/stats").json()["requests"]["in_flight"] == 0
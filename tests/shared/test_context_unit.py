@@ -0,0 +1,150 @@
+"""Unit tests for the shared application context."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.ingestion.vector_store.numpy_store import NumpyStore
+from src.ingestion.vector_store.stores import ChromaStore
+from src.shared.context import WARMUP_STEPS, AppContext
+from src.utils.config import ConfigModel, LibreryConfig, VectorStoreConfig
+
+
+@pytest.fixture
+def config(tmp_path) -> ConfigModel:
+    return ConfigModel(
+        vector_store=VectorStoreConfig(
+            client_path=tmp_path / "chroma", numpy_path=tmp_path / "numpy"
+        ),
+        librery=LibreryConfig(
+            books_paths=tmp_path / "books", manifest_path=tmp_path / "manifest.json"
+        ),
+    )
+
+
+@pytest.fixture
+def patched_factories(mocker) -> dict[str, MagicMock]:
+    return {
+        "embedder": mocker.patch(
+            "src.ingestion.embedding.get_embbedder.build_embedder",
+            return_value=MagicMock(),
+        ),
+        "parser": mocker.patch(
+            "src.ingestion.parsers.get_parser.get_parser", return_value=MagicMock()
+        ),
+    }
+
+
+class TestAppContext:
+    def test_nothing_is_built_up_front(self, config: ConfigModel) -> None:
+        context = AppContext(config)
+
+        assert not any(
+            context.is_built(name)
+            for name in ("chroma_client", "embedder", "vector_store", "generator")
+        )
+
+    def test_components_are_built_once(
+        self, config: ConfigModel, patched_factories: dict[str, MagicMock]
+    ) -> None:
+        context = AppContext(config)
+
+        assert context.embedder is context.embedder
+        assert context.vector_store is context.vector_store
+        patched_factories["embedder"].assert_called_once()
+
+    def test_manager_and_pipeline_share_one_store(
+        self, config: ConfigModel, patched_factories: dict[str, MagicMock], mocker
+    ) -> None:
+        client_factory = mocker.patch(
+            "chromadb.PersistentClient", wraps=__import__("chromadb").PersistentClient
+        )
+        context = AppContext(config)
+
+        manager = context.library_manager
+        store = context.vector_store
+
+        assert isinstance(store, ChromaStore)
+        assert manager.store is store
+        assert store.client is context.chroma_client
+        assert store.embedder is context.embedder
+        client_factory.assert_called_once()
+
+    def test_manager_defers_models_and_parser(
+        self, config: ConfigModel, patched_factories: dict[str, MagicMock]
+    ) -> None:
+        context = AppContext(config)
+
+        assert context.library_manager.get_stats()["total_chunks"] == 0
+        patched_factories["embedder"].assert_not_called()
+        patched_factories["parser"].assert_not_called()
+
+    def test_numpy_backend_shares_embedder(
+        self, config: ConfigModel, patched_factories: dict[str, MagicMock]
+    ) -> None:
+        config.vector_store.backend = "numpy"
+        context = AppContext(config)
+
+        store = context.vector_store
+
+        assert isinstance(store, NumpyStore)
+        assert store.embedder is context.embedder
+        assert not context.is_built("chroma_client")
+
+    def test_slow_build_does_not_block_built_components(
+        self, config: ConfigModel
+    ) -> None:
+        context = AppContext(config)
+        context._get("parser", object)
+        building = threading.Event()
+        release = threading.Event()
+
+        def slow_build() -> object:
+            building.set()
+            release.wait(5)
+            return object()
+
+        builder = threading.Thread(target=context._get, args=("embedder", slow_build))
+        builder.start()
+        building.wait(5)
+        try:
+            started = time.perf_counter()
+            context._get("parser", object)
+            assert time.perf_counter() - started < 0.5
+            assert not context.is_built("embedder")
+        finally:
+            release.set()
+            builder.join()
+
+    def test_concurrent_reads_build_once(self, config: ConfigModel) -> None:
+        context = AppContext(config)
+        factory = MagicMock(side_effect=lambda: time.sleep(0.05) or object())
+        threads = [
+            threading.Thread(target=context._get, args=("embedder", factory))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        factory.assert_called_once()
+
+    def test_warm_up_loads_each_step(self, config: ConfigModel, mocker) -> None:
+        context = AppContext(config)
+        embedder = mocker.patch.object(AppContext, "embedder")
+        generator = mocker.patch.object(AppContext, "generator")
+        manager = mocker.patch.object(
+            AppContext, "library_manager", new_callable=mocker.PropertyMock
+        )
+
+        for step in WARMUP_STEPS:
+            context.warm_up(step)
+
+        embedder.embed_text.assert_called_once()
+        generator.warm_up.assert_called_once()
+        manager.assert_called_once()
+        with pytest.raises(ValueError, match="Unknown warm-up step"):
+            context.warm_up("cache")
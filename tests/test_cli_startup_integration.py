@@ -0,0 +1,77 @@
+"""Startup-time regression tests for the open-books CLI."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Generous enough for a cold interpreter on a slow CI runner; loading torch,
+# docling or textual alone blows through them
+HELP_BUDGET_SECONDS = 2.0
+INFO_BUDGET_SECONDS = 4.0
+# Modules that only chat/sync/ask should load (ours wrap the heavy libraries)
+HEAVY_MODULES = [
+    "textual",
+    "ollama",
+    "redisvl",
+    "src.ui.app",
+    "src.generation.generator",
+    "src.ingestion.embedding.embedder",
+    "src.ingestion.parsers.parsers",
+    "src.ingestion.chunking.chunker",
+]
+# Runs the CLI in-process and reports which heavy modules it imported
+DRIVER = """
+import json, sys
+from src.cli import app
+try:
+    app(sys.argv[1:], standalone_mode=False)
+finally:
+    heavy = [name for name in {heavy!r} if name in sys.modules]
+    print("\\n" + json.dumps(heavy))
+"""
+
+
+def run_cli(args: list[str], project_root: Path) -> tuple[float, list[str]]:
+    env = {
+        **os.environ,
+        "PROJECT_ROOT": str(project_root),
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])
+        ),
+    }
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", DRIVER.format(heavy=HEAVY_MODULES), *args],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        check=False,
+        text=True,
+        timeout=60,
+    )
+    elapsed = time.perf_counter() - started
+    assert result.returncode == 0, result.stderr
+    return elapsed, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.integration
+class TestCliStartup:
+    """`--help` and `info` must not pay for models, parsers or the TUI."""
+
+    def test_help_is_fast(self, tmp_path: Path) -> None:
+        elapsed, heavy = run_cli(["--help"], tmp_path)
+
+        assert heavy == []
+        assert elapsed < HELP_BUDGET_SECONDS
+
+    def test_info_is_fast(self, tmp_path: Path) -> None:
+        elapsed, heavy = run_cli(["info"], tmp_path)
+
+        assert heavy == []
+        assert elapsed < INFO_BUDGET_SECONDS
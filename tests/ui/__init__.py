@@ -0,0 +1 @@
+# Test package for ui module
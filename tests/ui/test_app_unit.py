@@ -0,0 +1,130 @@
+"""Unit tests for the TUI's background warm-up and question queue."""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+from textual.widgets import Input, Label
+
+from src.shared.context import AppContext
+from src.ui.app import RAGApp
+from src.ui.widgets import AssistantMessage
+from src.utils.config import ConfigModel
+
+
+class SlowContext:
+    """AppContext stand-in whose library only loads once released."""
+
+    warm_up = AppContext.warm_up
+
+    def __init__(self) -> None:
+        self.config = ConfigModel()
+        self.release = threading.Event()
+        self.manager = MagicMock(manifest={"book.pdf": {"hash": "abc"}})
+        self.manager.get_stats.return_value = {"indexed_files": 1, "total_chunks": 3}
+        self.vector_store = MagicMock()
+        self.vector_store.query.return_value = []
+        self.embedder = MagicMock()
+        self.generator = MagicMock()
+        self.answerer = MagicMock()
+        self.answerer.answer.return_value = "The answer"
+
+        self.manager_readers: set[str] = set()
+
+    @property
+    def library_manager(self) -> MagicMock:
+        self.manager_readers.add(threading.current_thread().name)
+        self.release.wait(timeout=5)
+        return self.manager
+
+
+async def settle(app: RAGApp, pilot) -> None:
+    # Finishing warm-up starts the queue worker, so wait twice
+    for _ in range(2):
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+
+
+class TestWarmUp:
+    """The UI comes up first and questions wait for the models."""
+
+    def test_question_is_queued_until_warm_up_completes(self) -> None:
+        context = SlowContext()
+
+        async def scenario() -> None:
+            app = RAGApp(context)
+            async with app.run_test() as pilot:
+                status = app.query_one("#warmup-status", Label)
+                assert "library" in app.warming
+                assert status.display
+
+                app.query_one(Input).value = "What is a monad?"
+                await pilot.press("enter")
+                await pilot.pause()
+
+                assert len(app.queued) == 1
+                context.answerer.answer.assert_not_called()
+
+                context.release.set()
+                await settle(app, pilot)
+
+                assert not app.warming
+                assert not status.display
+                assert app.queued == []
+                context.answerer.answer.assert_called_once_with([], "What is a monad?")
+                messages = app.query(AssistantMessage)
+                assert messages.last().text == "The answer"
+                assert "Chunks: 3" in app.sub_title
+
+        asyncio.run(scenario())
+
+    def test_models_are_warmed_in_background(self) -> None:
+        context = SlowContext()
+        context.release.set()
+
+        async def scenario() -> None:
+            app = RAGApp(context)
+            async with app.run_test() as pilot:
+                await settle(app, pilot)
+
+        asyncio.run(scenario())
+
+        context.embedder.embed_text.assert_called_once()
+        context.generator.warm_up.assert_called_once()
+
+    def test_ui_thread_never_waits_for_the_library(self) -> None:
+        context = SlowContext()
+        context.release.set()
+
+        async def scenario() -> None:
+            app = RAGApp(context)
+            async with app.run_test() as pilot:
+                await settle(app, pilot)
+                app.action_sync_library()
+                await settle(app, pilot)
+                assert "Chunks: 3" in app.sub_title
+
+        asyncio.run(scenario())
+
+        context.manager.sync.assert_called_once()
+        assert context.manager_readers
+        assert threading.main_thread().name not in context.manager_readers
+
+    def test_failed_step_does_not_block_questions(self) -> None:
+        context = SlowContext()
+        context.release.set()
+        context.generator.warm_up.side_effect = ConnectionError("ollama is down")
+
+        async def scenario() -> None:
+            app = RAGApp(context)
+            async with app.run_test() as pilot:
+                await settle(app, pilot)
+                assert not app.warming
+
+                app.query_one(Input).value = "Still there?"
+                await pilot.press("enter")
+                await settle(app, pilot)
+
+                assert app.query(AssistantMessage).last().text == "The answer"
+
+        asyncio.run(scenario())
@@ -0,0 +1,69 @@
+"""Unit tests for lazy configuration loading and explicit logger setup."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+from src.utils.config import LoggingConfig
+from src.utils.logger import setup_logger
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+class TestImportSideEffects:
+    """Importing config and logger must not touch the project directory."""
+
+    def test_import_writes_nothing(self, tmp_path: Path) -> None:
+        env = {
+            **os.environ,
+            "PROJECT_ROOT": str(tmp_path),
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])
+            ),
+        }
+        subprocess.run(
+            [sys.executable, "-c", "import src.utils.logger, src.shared.context"],
+            cwd=REPO_ROOT,
+            env=env,
+            check=True,
+        )
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_settings_load_on_first_access(self, mocker) -> None:
+        from src.utils import config
+
+        get_config = mocker.patch.object(config, "get_config")
+        get_config.return_value.llm.model = "test-model"
+
+        assert config.settings.llm.model == "test-model"
+        get_config.assert_called_once()
+
+
+class TestSetupLogger:
+    """Tests for the explicit sink setup."""
+
+    def test_writes_configured_files(self, tmp_path: Path) -> None:
+        setup_logger(LoggingConfig(log_dir=tmp_path, json_file=False, enqueue=True))
+        try:
+            logger.info("hello from the test")
+            logger.complete()
+        finally:
+            logger.remove()
+
+        assert [path.name for path in tmp_path.iterdir()] == ["app.log"]
+        assert "hello from the test" in (tmp_path / "app.log").read_text()
+
+    def test_filtered_debug_is_not_formatted(self, tmp_path: Path, mocker) -> None:
+        expensive = mocker.MagicMock(return_value="details")
+        setup_logger(LoggingConfig(log_dir=tmp_path, file_level="INFO"))
+        try:
+            logger.opt(lazy=True).debug("state: {}", expensive)
+            logger.complete()
+        finally:
+            logger.remove()
+
+        expensive.assert_not_called()
@@ -0,0 +1,111 @@
+"""Unit tests for the in-process timers and counters."""
+
+from pathlib import Path
+
+import pytest
+
+from src.utils import metrics as metrics_module
+from src.utils.metrics import BUCKETS, MetricsRegistry, MetricsSnapshot, TimerStats
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTimerStats:
+    """Bucketed observations and the percentiles estimated from them."""
+
+    def test_observations_land_in_their_bucket(self) -> None:
+        stats = TimerStats()
+        for seconds in (0.0005, 0.001, 0.002, 1000.0):
+            stats.observe(seconds)
+
+        assert stats.buckets[0] == 2  # le=0.001 includes the bound
+        assert stats.buckets[1] == 1
+        assert stats.buckets[-1] == 1
+        assert stats.count == 4
+        assert stats.max_s == 1000.0
+
+    def test_quantile_interpolates_within_bucket(self) -> None:
+        stats = TimerStats()
+        for _ in range(10):
+            stats.observe(0.2)  # 0.1 < s <= 0.25
+
+        assert 0.1 < stats.quantile(0.5) <= 0.2
+        assert stats.quantile(1.0) == 0.2
+        assert TimerStats().quantile(0.5) == 0.0
+
+    def test_merge_adds_up(self) -> None:
+        first, second = TimerStats(), TimerStats()
+        first.observe(0.01)
+        second.observe(3.0)
+
+        first.merge(second)
+
+        assert first.count == 2
+        assert first.total_s == pytest.approx(3.01)
+        assert sum(first.buckets) == 2
+
+
+class TestMetricsRegistry:
+    """Timers, counters, snapshots and their exports."""
+
+    def test_timer_records_duration_even_on_failure(self, monkeypatch) -> None:
+        clock = FakeClock()
+        monkeypatch.setattr(metrics_module.time, "perf_counter", clock)
+        registry = MetricsRegistry()
+
+        with registry.timer("parse"):
+            clock.now += 2
+        with pytest.raises(ValueError), registry.timer("parse"):
+            clock.now += 1
+            raise ValueError
+
+        stats = registry.snapshot().timers["parse"]
+        assert (stats.count, stats.total_s) == (2, 3.0)
+
+    def test_disabled_registry_records_nothing(self) -> None:
+        registry = MetricsRegistry()
+        registry.enabled = False
+
+        with registry.timer("parse"):
+            pass
+        registry.inc("files_indexed")
+
+        snapshot = registry.snapshot()
+        assert (snapshot.timers, snapshot.counters) == ({}, {})
+
+    def test_flush_accumulates_across_runs(self, tmp_path: Path) -> None:
+        path = tmp_path / "metrics.json"
+        registry = MetricsRegistry()
+        for _ in range(2):
+            registry.observe("embed_batch", 0.01)
+            registry.inc("texts_embedded", 32)
+            registry.flush(path)
+
+        saved = MetricsSnapshot.load(path)
+        assert saved is not None
+        assert saved.timers["embed_batch"].count == 2
+        assert saved.counters == {"texts_embedded": 64}
+        # Flushed recordings are not counted again
+        assert registry.snapshot().timers == {}
+
+    def test_prometheus_exposition(self) -> None:
+        registry = MetricsRegistry()
+        registry.observe("store_query", 0.003)
+        registry.inc("cache_hits")
+
+        text = registry.snapshot().to_prometheus()
+
+        name = "openbooks_stage_duration_seconds"
+        assert f"# TYPE {name} histogram" in text
+        assert f'{name}_bucket{{stage="store_query",le="0.0025"}} 0' in text
+        assert f'{name}_bucket{{stage="store_query",le="0.005"}} 1' in text
+        assert f'{name}_bucket{{stage="store_query",le="+Inf"}} 1' in text
+        assert f'{name}_count{{stage="store_query"}} 1' in text
+        assert "openbooks_cache_hits_total 1.0" in text
+        assert text.count("_bucket{") == len(BUCKETS) + 1
@@ -0,0 +1,97 @@
+"""Unit tests for the --profile hooks."""
+
+import pstats
+import tracemalloc
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.generation.pipeline import SimpleRAGPipeline
+from src.utils import profiling
+from src.utils.profiling import Profiler
+
+
+def build_strings() -> list[str]:
+    return [str(i) * 10 for i in range(20_000)]
+
+
+@pytest.fixture
+def profiler(tmp_path: Path):
+    profiler = Profiler()
+    profiler.start(tmp_path, top_n=5)
+    yield profiler
+    profiler.stop()
+
+
+class TestProfiler:
+    """Each unit leaves a call tree, a summary and its hottest functions."""
+
+    def test_unit_is_profiled(self, profiler: Profiler) -> None:
+        with profiler.profile("linear algebra.pdf"):
+            kept = build_strings()
+
+        [report] = profiler.reports
+        assert report.label == "linear algebra.pdf"
+        assert report.profile_path.name.endswith("-linear_algebra.pdf.prof")
+        assert "build_strings" in str(pstats.Stats(str(report.profile_path)).stats)
+        assert "linear algebra.pdf" in report.summary_path.read_text()
+        assert any("build_strings" in f.function for f in report.functions)
+        assert len(report.functions) <= 5
+        # The strings are still alive, so their allocations show as growth
+        assert report.peak_mb is not None and report.peak_mb > 0
+        assert report.allocations[0].grown_mb > 0
+        assert len(kept) == 20_000
+
+    def test_idle_profiler_records_nothing(self) -> None:
+        profiler = Profiler()
+
+        with profiler.profile("book.pdf"):
+            build_strings()
+
+        assert profiler.reports == []
+
+    def test_nested_units_belong_to_the_outer_one(self, profiler: Profiler) -> None:
+        with profiler.profile("outer"), profiler.profile("inner"):
+            build_strings()
+
+        assert [report.label for report in profiler.reports] == ["outer"]
+
+    def test_hot_functions_span_all_units(self, profiler: Profiler) -> None:
+        for label in ("first", "second"):
+            with profiler.profile(label):
+                build_strings()
+
+        [hottest] = [
+            f for f in profiler.hot_functions() if "build_strings" in f.function
+        ]
+        assert hottest.calls == 2
+
+    def test_stop_leaves_foreign_tracemalloc_running(self, tmp_path: Path) -> None:
+        tracemalloc.start()
+        try:
+            profiler = Profiler()
+            profiler.start(tmp_path)
+            profiler.stop()
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+
+class TestPipelineProfiling:
+    """A pipeline question is one profiled unit."""
+
+    def test_query_is_profiled(self, profiler: Profiler, monkeypatch) -> None:
+        monkeypatch.setattr("src.generation.pipeline.profiler", profiler)
+        store = MagicMock()
+        store.query.return_value = []
+        answerer = MagicMock()
+        answerer.answer.return_value = "An answer."
+
+        SimpleRAGPipeline(store, answerer).query("What is a monad?")
+
+        assert [report.label for report in profiler.reports] == ["What is a monad?"]
+
+
+def test_module_profiler_is_idle() -> None:
+    assert not profiling.profiler.enabled
@@ -0,0 +1,231 @@
+"""Unit tests for request tracing."""
+
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from src.generation.answerer import QueryAnswerer
+from src.generation.pipeline import MultiQueryRAGPipeline, SimpleRAGPipeline
+from src.shared.models import ChunkMetadata, SearchResult
+from src.utils import tracing
+from src.utils.config import TracingConfig
+from src.utils.tracing import (
+    NOOP_SPAN,
+    FileExporter,
+    Span,
+    SpanExporter,
+    Tracer,
+    get_span_exporter,
+)
+
+
+class ListExporter(SpanExporter):
+    def __init__(self) -> None:
+        self.traces: list[list[Span]] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(spans)
+
+
+def search_result() -> SearchResult:
+    return SearchResult(
+        content="A monad is a monoid in the category of endofunctors.",
+        score=0.1,
+        metadata=ChunkMetadata(
+            source_doc_title="Haskell",
+            chapter_name="Monads",
+            page_range=(1, 2),
+            char_span=(0, 10),
+            chunk_id=uuid4(),
+        ),
+    )
+
+
+@pytest.fixture
+def exporter(monkeypatch) -> ListExporter:
+    """Routes the process tracer to a list for the test."""
+    exporter = ListExporter()
+    monkeypatch.setattr(tracing, "tracer", Tracer(exporter))
+    for module in ("src.generation.pipeline", "src.generation.answerer"):
+        monkeypatch.setattr(f"{module}.tracer", tracing.tracer)
+    return exporter
+
+
+class TestTracer:
+    """Spans nest under a sampled root and are exported with it."""
+
+    def test_spans_nest_under_the_root(self) -> None:
+        exporter = ListExporter()
+        tracer = Tracer(exporter)
+
+        with tracer.trace("request", user="a") as root:
+            with tracer.span("child") as child:
+                with tracer.span("grandchild"):
+                    pass
+                child.set(items=3)
+            root.set(done=True)
+
+        [spans] = exporter.traces
+        assert [span.name for span in spans] == ["request", "child", "grandchild"]
+        assert spans[1].parent_id == spans[0].span_id
+        assert spans[2].parent_id == spans[1].span_id
+        assert {span.trace_id for span in spans} == {spans[0].trace_id}
+        assert spans[0].attributes == {"user": "a", "done": True}
+        assert spans[1].attributes == {"items": 3}
+        assert all(span.end is not None for span in spans)
+
+    def test_spans_outside_a_trace_are_noops(self) -> None:
+        exporter = ListExporter()
+        tracer = Tracer(exporter)
+
+        with tracer.span("embed") as span:
+            span.set(texts=1)
+
+        assert span is NOOP_SPAN
+        assert exporter.traces == []
+
+    def test_sample_rate_zero_records_nothing(self) -> None:
+        exporter = ListExporter()
+        tracer = Tracer(exporter, sample_rate=0.0)
+
+        with tracer.trace("request"), tracer.span("child") as span:
+            pass
+
+        assert span is NOOP_SPAN
+        assert exporter.traces == []
+
+    def test_errors_are_recorded_and_raised(self) -> None:
+        exporter = ListExporter()
+        tracer = Tracer(exporter)
+
+        with (
+            pytest.raises(RuntimeError),
+            tracer.trace("request"),
+            tracer.span("generate"),
+        ):
+            raise RuntimeError("model not found")
+
+        [spans] = exporter.traces
+        assert [span.error for span in spans] == [
+            "RuntimeError: model not found",
+            "RuntimeError: model not found",
+        ]
+
+    def test_failing_exporter_does_not_fail_the_request(self) -> None:
+        exporter = MagicMock(spec=SpanExporter)
+        exporter.export.side_effect = OSError("disk full")
+
+        with Tracer(exporter).trace("request"):
+            pass
+
+        exporter.export.assert_called_once()
+
+
+class TestExporters:
+    """Built-in exporters and their selection from config."""
+
+    def test_file_exporter_writes_a_line_per_span(self, tmp_path: Path) -> None:
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(FileExporter(path))
+
+        with tracer.trace("request"), tracer.span("child"):
+            pass
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [record["name"] for record in records] == ["request", "child"]
+
+    def test_otel_exporter_replays_the_tree(self) -> None:
+        pytest.importorskip("opentelemetry.sdk")
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+            InMemorySpanExporter,
+        )
+
+        memory = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(memory))
+        exporter = tracing.OTelExporter()
+        exporter.tracer = provider.get_tracer("test")
+        tracer = Tracer(exporter)
+
+        with tracer.trace("request"), tracer.span("retrieve") as span:
+            span.set(chunk_ids=["a", "b"], filters={"books": ["x"]})
+
+        request, retrieve = sorted(memory.get_finished_spans(), key=lambda s: s.name)
+        assert retrieve.parent.span_id == request.context.span_id
+        assert retrieve.attributes["chunk_ids"] == ("a", "b")
+        assert retrieve.attributes["filters"] == "{'books': ['x']}"
+
+    def test_exporter_from_config(self, tmp_path: Path) -> None:
+        assert get_span_exporter(TracingConfig()) is None
+        exporter = get_span_exporter(
+            TracingConfig(exporter="file", file_path=tmp_path / "t.jsonl")
+        )
+        assert isinstance(exporter, FileExporter)
+
+
+class TestPipelineTracing:
+    """A question answered by a pipeline is one trace of its stages."""
+
+    def test_simple_pipeline(self, exporter: ListExporter) -> None:
+        store = MagicMock()
+        store.query.return_value = [search_result()]
+        generator = MagicMock()
+        generator.generate.return_value = "A monoid of endofunctors."
+        pipeline = SimpleRAGPipeline(store, QueryAnswerer(generator))
+
+        answer = pipeline.query("What is a monad?")
+
+        [spans] = exporter.traces
+        root, retrieve, generate = spans
+        assert (root.name, retrieve.name, generate.name) == (
+            "rag.query",
+            "retrieve",
+            "generate",
+        )
+        assert root.attributes["answer"] == answer
+        assert retrieve.attributes["chunk_ids"] == [
+            str(store.query.return_value[0].metadata.chunk_id)
+        ]
+        assert generate.kind == "llm"
+        assert generate.attributes["prompt_tokens"] > 0
+        assert generate.attributes["completion_tokens"] > 0
+
+    def test_multi_pipeline_traces_expansion(self, exporter: ListExporter) -> None:
+        store = MagicMock()
+        store.query.return_value = [search_result()]
+        constructor = MagicMock()
+        constructor.refine_query.return_value = ["monads", "bind"]
+        pipeline = MultiQueryRAGPipeline(store, QueryAnswerer(MagicMock()), constructor)
+
+        pipeline.query("What is a monad?")
+
+        [spans] = exporter.traces
+        assert [span.name for span in spans] == [
+            "rag.query",
+            "expand",
+            "retrieve",
+            "generate",
+        ]
+        assert spans[1].attributes["variations"] == ["monads", "bind"]
+
+    def test_hook_sees_the_results_inside_the_trace(
+        self, exporter: ListExporter
+    ) -> None:
+        store = MagicMock()
+        store.query.return_value = [search_result()]
+        pipeline = SimpleRAGPipeline(store, QueryAnswerer(MagicMock()))
+        seen = []
+
+        pipeline.query(
+            "What is a monad?",
+            on_retrieved=lambda query, results: seen.append((query, results)),
+        )
+
+        assert seen == [("What is a monad?", store.query.return_value)]
+        [spans] = exporter.traces
+        assert [span.name for span in spans] == ["rag.query", "retrieve", "generate"]